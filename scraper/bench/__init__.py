@@ -0,0 +1,10 @@
+"""
+Benchmark suite for the scraper's hot paths.
+Synthetic fixtures shaped like real Coles __NEXT_DATA__ pages, Woolworths browse API
+bundles and special_history rows; a local stand-in for the Supabase REST endpoint.
+
+Usage:
+    python -m scraper.bench                         # every case at 1k, 10k, 100k
+    python -m scraper.bench --scale 10k --case intel_batch
+    python -m scraper.bench --out bench.json        # also write results to a file
+"""
@@ -0,0 +1,131 @@
+"""
+Benchmark runner. Each (case, scale) pair runs in its own interpreter so that
+peak RSS belongs to that case alone; results are printed as one JSON document.
+"""
+
+import argparse
+import json
+import platform
+import resource
+import subprocess
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import List
+
+SCALES = ["1k", "10k", "100k"]
+REPO_ROOT = Path(__file__).resolve().parents[2]
+
+
+def _parse_scale(s: str) -> int:
+    s = s.lower()
+    if s.endswith("k"):
+        return int(float(s[:-1]) * 1000)
+    if s.endswith("m"):
+        return int(float(s[:-1]) * 1_000_000)
+    return int(s)
+
+
+def _percentile(sorted_values: List[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    idx = min(len(sorted_values) - 1, max(0, round(pct / 100 * len(sorted_values) + 0.5) - 1))
+    return sorted_values[idx]
+
+
+def _peak_rss_kib() -> int:
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss // 1024 if sys.platform == "darwin" else rss  # bytes on macOS, KiB on Linux
+
+
+def run_case(name: str, scale: str) -> dict:
+    """Run one case in this process and return its measurements."""
+    from scraper.bench.cases import CASES
+
+    n = _parse_scale(scale)
+    extra: dict = {}
+    with CASES[name](n, extra) as calls:
+        setup_rss = _peak_rss_kib()
+        latencies = []
+        items = 0
+        started = time.perf_counter()
+        for call in calls:
+            t0 = time.perf_counter()
+            items += call()
+            latencies.append(time.perf_counter() - t0)
+        elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "case": name,
+        "scale": scale,
+        "items": items,
+        "calls": len(latencies),
+        "seconds": round(elapsed, 4),
+        "throughput_per_s": round(items / elapsed, 1) if elapsed else None,
+        "p50_ms": round(_percentile(latencies, 50) * 1000, 3),
+        "p99_ms": round(_percentile(latencies, 99) * 1000, 3),
+        "setup_rss_kib": setup_rss,
+        "peak_rss_kib": _peak_rss_kib(),
+        **extra,
+    }
+
+
+def _run_isolated(name: str, scale: str) -> dict:
+    proc = subprocess.run(
+        [sys.executable, "-m", "scraper.bench", "--worker", name, scale],
+        cwd=REPO_ROOT, capture_output=True, text=True,
+    )
+    if proc.returncode != 0:
+        return {"case": name, "scale": scale, "error": proc.stderr.strip().splitlines()[-1:]}
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def _git_rev() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT, capture_output=True, text=True,
+        ).stdout.strip()
+    except OSError:
+        return ""
+
+
+def main(argv: List[str]):
+    from scraper.bench.cases import CASES
+
+    parser = argparse.ArgumentParser(prog="python -m scraper.bench")
+    parser.add_argument("--scale", action="append", help=f"fixture size, repeatable (default {', '.join(SCALES)})")
+    parser.add_argument("--case", action="append", choices=sorted(CASES), help="case to run, repeatable (default all)")
+    parser.add_argument("--out", help="also write the JSON report to this file")
+    parser.add_argument("--worker", nargs=2, metavar=("CASE", "SCALE"), help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.worker:
+        print(json.dumps(run_case(*args.worker)))
+        return
+
+    results = []
+    for scale in args.scale or SCALES:
+        for name in args.case or list(CASES):
+            result = _run_isolated(name, scale)
+            results.append(result)
+            print(f"{name:18} {scale:>5}  {result.get('throughput_per_s', 'error')}/s", file=sys.stderr)
+
+    report = {
+        "meta": {
+            "git_rev": _git_rev(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+        },
+        "results": results,
+    }
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.out:
+        Path(args.out).write_text(text + "\n")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
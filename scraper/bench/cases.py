@@ -0,0 +1,346 @@
+"""
+Benchmark cases. Each case is a context manager that builds its fixtures for a
+given scale and yields a list of zero-argument calls; every call processes one
+unit of work (a page, a flush, a write batch) and returns the number of items
+it handled. Setup and teardown are excluded from the timings. Cases may add
+their own figures (e.g. bytes transferred) to `extra`, which is merged into
+the result.
+"""
+
+import json
+import re
+import shutil
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from scraper.bench import fixtures
+
+CHUNK = 1000  # products per intel flush / write call, matching main.PAGE_SIZE
+
+# The old catalogue path's whole-document parse, kept as the coles_parse_full baseline
+NEXT_DATA_RE = re.compile(
+    r'<script id="__NEXT_DATA__" type="application/json">(.*?)</script>', re.DOTALL
+)
+
+CASES: Dict[str, Callable] = {}
+
+
+def case(name: str):
+    def register(fn):
+        CASES[name] = contextmanager(fn)
+        return fn
+    return register
+
+
+def _parse_next_data(html: str) -> Optional[dict]:
+    match = NEXT_DATA_RE.search(html)
+    if not match:
+        return None
+    try:
+        return json.loads(match.group(1))
+    except json.JSONDecodeError:
+        return None
+
+
+def _chunks(items: list, size: int = CHUNK) -> List[list]:
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+
+@case("coles_parse")
+def coles_parse(n: int, extra: dict):
+    """Raw page bytes -> searchResults subtree -> ProductBatch (the specials path)."""
+    from scraper.coles import _parse_search_results, _products_from_search
+
+    def parse(html: bytes) -> int:
+        return len(_products_from_search(_parse_search_results(html))[0])
+
+    yield [lambda html=html.encode(): parse(html) for html in fixtures.coles_pages(n)]
+
+
+@case("coles_parse_full")
+def coles_parse_full(n: int, extra: dict):
+    """Decoded page -> regex -> whole __NEXT_DATA__ -> ProductBatch (the old catalogue path)."""
+    from scraper.coles import _extract_products
+
+    def parse(html: bytes) -> int:
+        return len(_extract_products(_parse_next_data(html.decode()))[0])
+
+    yield [lambda html=html.encode(): parse(html) for html in fixtures.coles_pages(n)]
+
+
+@case("woolworths_parse")
+def woolworths_parse(n: int, extra: dict):
+    """Browse API page -> ProductBatch, the loop _iter_category runs per page."""
+    from scraper.products import ProductBatch
+    from scraper.woolworths import _parse_product
+
+    def parse(data: dict) -> int:
+        products = ProductBatch()
+        for bundle in data.get("Bundles", []):
+            for raw_product in bundle.get("Products", []):
+                parsed = _parse_product(raw_product, "Bench")
+                if parsed:
+                    products.append(parsed)
+        return len(products)
+
+    yield [lambda data=data: parse(data) for data in fixtures.woolworths_pages(n)]
+
+
+@case("intel_scalar")
+def intel_scalar(n: int, extra: dict):
+    """compute_intel once per product, one call per CHUNK products."""
+    from scraper.intelligence import compute_intel
+
+    def run(groups: list) -> int:
+        for hist, on_special, discount in groups:
+            compute_intel(hist, on_special, discount)
+        return len(groups)
+
+    yield [lambda g=g: run(g) for g in _chunks(fixtures.history_groups(n))]
+
+
+@case("intel_batch")
+def intel_batch(n: int, extra: dict):
+    """compute_intel_groups over CHUNK products per call."""
+    from scraper.intelligence import compute_intel_groups
+
+    compute_intel_groups([[]], [False], [None])  # pay the lazy numpy import outside the timings
+
+    def run(groups: list) -> int:
+        return len(compute_intel_groups(
+            [g[0] for g in groups], [g[1] for g in groups], [g[2] for g in groups],
+        ))
+
+    yield [lambda g=g: run(g) for g in _chunks(fixtures.history_groups(n))]
+
+
+@case("products_retained")
+def products_retained(n: int, extra: dict):
+    """Parse pages into one growing ProductBatch, as scrape_coles_catalogue holds them.
+
+    Reports the memory the batch retains, its container overhead (the column
+    lists), and the overhead the same products would have as one dict each.
+    """
+    import sys
+    import tracemalloc
+    from scraper.coles import _parse_search_results, _products_from_search
+    from scraper.products import FIELDS, ProductBatch
+
+    pages = [html.encode() for html in fixtures.coles_pages(n)]
+    held = ProductBatch()
+
+    def parse(html: bytes) -> int:
+        batch = _products_from_search(_parse_search_results(html))[0]
+        held.extend(batch)
+        return len(batch)
+
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    try:
+        yield [lambda html=html: parse(html) for html in pages]
+    finally:
+        extra["retained_kib"] = (tracemalloc.get_traced_memory()[0] - before) // 1024
+        tracemalloc.stop()
+        extra["columns_kib"] = sum(sys.getsizeof(getattr(held, f)) for f in FIELDS) // 1024
+        as_dicts = [{f: getattr(p, f) for f in FIELDS} for p in held]
+        extra["as_dicts_kib"] = (sys.getsizeof(as_dicts) + sum(sys.getsizeof(d) for d in as_dicts)) // 1024
+
+
+def _coles_fetch(n: int, extra: dict, backend: str, revalidate: bool = False):
+    import tempfile
+    from scraper import coles, httpcache
+    from scraper.bench.stub_site import StubSite
+
+    coles.FETCH_BACKEND = backend
+    cookie_jar = tempfile.NamedTemporaryFile(suffix=".txt", delete=False).name
+    httpcache.ENABLED = revalidate
+    httpcache.CACHE_DIR = Path(tempfile.mkdtemp(prefix="bench-httpcache-"))
+
+    with StubSite(fixtures.coles_pages(n)) as site:
+        urls = [f"{site.url}/on-special?page={i}" for i in range(1, len(site.pages) + 1)]
+
+        def fetch(url: str) -> int:
+            html = coles._fetch_page(url, cookie_jar, "bench")
+            return fixtures.COLES_PAGE_SIZE if html else 0
+
+        if revalidate:
+            for url in urls:  # prime the cache; only the revalidating pass is timed
+                fetch(url)
+            coles.fetch_stats.update(pages=0, bytes=0, latencies=[])
+            httpcache._stats.update(requests=0, hits=0, bytes_saved=0, parses_saved=0)
+
+        try:
+            yield [lambda url=url: fetch(url) for url in urls]
+        finally:
+            coles._close_http_client()
+            shutil.rmtree(httpcache.CACHE_DIR, ignore_errors=True)
+            extra["wire_bytes"] = coles.fetch_stats["bytes"]
+            extra["bytes_per_page"] = coles.fetch_stats["bytes"] // max(1, coles.fetch_stats["pages"])
+            if revalidate:
+                extra["cache"] = httpcache.describe()
+
+
+@case("coles_fetch_httpx")
+def coles_fetch_httpx(n: int, extra: dict):
+    """Specials page fetches over the pooled httpx client against a local gzip-capable site."""
+    yield from _coles_fetch(n, extra, "httpx")
+
+
+@case("coles_fetch_curl")
+def coles_fetch_curl(n: int, extra: dict):
+    """Specials page fetches with one curl process per page (identity encoding)."""
+    yield from _coles_fetch(n, extra, "curl")
+
+
+@case("coles_fetch_revalidate")
+def coles_fetch_revalidate(n: int, extra: dict):
+    """Second pass over unchanged pages with the conditional-request cache (all 304s)."""
+    yield from _coles_fetch(n, extra, "httpx", revalidate=True)
+
+
+@case("writer_upsert")
+def writer_upsert(n: int, extra: dict):
+    """BulkWriter.upsert of CHUNK specials rows per call against the local REST stand-in."""
+    from scraper.bench.stub_rest import StubRest
+    from scraper.writer import BulkWriter
+
+    with StubRest() as stub:
+        writer = BulkWriter(stub.url, "bench-key")
+        try:
+            yield [
+                lambda rows=rows: writer.upsert("specials", rows, on_conflict="store,product_id")
+                for rows in _chunks(fixtures.special_rows(n))
+            ]
+        finally:
+            writer.close()
+
+
+SEARCH_QUERIES = [
+    "milk", "tasty cheddar", "free range", "rice 1kg", "choc", "greek yoghurt",
+    "coffee 500g", "wholemeal", "organic beef", "2l", "smooth", "sourdough",
+]
+
+
+@case("search_key")
+def search_key(n: int, extra: dict):
+    """search_keys for CHUNK products per call, the normalization each upsert now pays."""
+    from scraper.search import search_keys
+
+    def run(rows: list) -> int:
+        return len(search_keys([r["name"] for r in rows], [r["brand"] for r in rows], [r["size"] for r in rows]))
+
+    yield [lambda rows=rows: run(rows) for rows in _chunks(fixtures.special_rows(n))]
+
+
+@case("search_scan")
+def search_scan(n: int, extra: dict):
+    """One search per call by testing every name, as ILIKE '%query%' scans without an index."""
+    names = [r["name"] for r in fixtures.special_rows(n)]
+    matches = []
+
+    def run(query: str) -> int:
+        matches.append(sum(1 for name in names if query in name.lower()))
+        return 1
+
+    try:
+        yield [lambda q=q: run(q) for q in SEARCH_QUERIES * 5]
+    finally:
+        extra["avg_matches"] = round(sum(matches) / len(matches), 1) if matches else 0
+
+
+@case("search_trigram")
+def search_trigram(n: int, extra: dict):
+    """One search per call through an inverted trigram index over search keys.
+
+    Models what the pg_trgm GIN index in migration 010 does for LIKE '%query%':
+    intersect the posting lists of the query's trigrams, then recheck the
+    candidates. Index build time is reported, not timed.
+    """
+    import time
+    from scraper.search import normalize, search_keys
+
+    rows = fixtures.special_rows(n)
+    started = time.perf_counter()
+    keys = search_keys([r["name"] for r in rows], [r["brand"] for r in rows], [r["size"] for r in rows])
+    postings: dict = {}
+    for i, key in enumerate(keys):
+        for gram in {key[j:j + 3] for j in range(len(key) - 2)}:
+            postings.setdefault(gram, []).append(i)
+    extra["build_s"] = round(time.perf_counter() - started, 3)
+    matches = []
+
+    def run(query: str) -> int:
+        q = normalize(query)
+        grams = sorted({q[j:j + 3] for j in range(len(q) - 2)}, key=lambda g: len(postings.get(g, ())))
+        if not grams:  # under three characters: the index cannot narrow it, recheck everything
+            candidates = range(len(keys))
+        else:
+            candidates = set(postings.get(grams[0], ()))
+        for gram in grams[1:]:
+            candidates.intersection_update(postings.get(gram, ()))
+            if not candidates:
+                break
+        matches.append(sum(1 for i in candidates if q in keys[i]))
+        return 1
+
+    try:
+        yield [lambda q=q: run(q) for q in SEARCH_QUERIES * 5]
+    finally:
+        extra["avg_matches"] = round(sum(matches) / len(matches), 1) if matches else 0
+
+
+def _match_fixture(n: int):
+    from scraper.matcher import CatalogueIndex, ItemIndex
+    from scraper.search import search_key
+
+    rows = fixtures.catalogue_rows(n)
+    for r in rows:
+        r["search_key"] = search_key(r["name"], r["brand"], r["size"])
+    return rows, CatalogueIndex.from_rows(rows), ItemIndex()
+
+
+@case("match_full")
+def match_full(n: int, extra: dict):
+    """Canonical item and counterpart for CHUNK catalogue products per call, as a full re-match does."""
+    from scraper.matcher import match_row
+
+    rows, catalogue, items = _match_fixture(n)
+    linked = []
+
+    def run(keys: list) -> int:
+        linked.extend(1 for key in keys if match_row(catalogue, items, key)["counterpart_id"])
+        return len(keys)
+
+    try:
+        yield [lambda keys=keys: run(keys) for keys in _chunks(sorted(catalogue.entries))]
+    finally:
+        extra["linked_pct"] = round(100 * len(linked) / max(len(catalogue.entries), 1), 1)
+
+
+@case("match_incremental")
+def match_incremental(n: int, extra: dict):
+    """One rematch() after 1% of the catalogue was renamed, against the stored full match.
+
+    Items are the products re-scored; `written` counts the rows that changed.
+    """
+    from scraper.matcher import CatalogueIndex, rematch
+
+    rows, catalogue, items = _match_fixture(n)
+    full, _, _ = rematch(catalogue, items, {}, full=True)
+    stored = {(r["store"], r["product_id"]): r for r in full}
+    for r in rows[::100]:
+        r["name"] += " Value Pack"
+        r["search_key"] += " value"
+    catalogue = CatalogueIndex.from_rows(rows)
+    written = []
+
+    def run() -> int:
+        out, _, scored = rematch(catalogue, items, stored)
+        written.append(len(out))
+        return scored
+
+    try:
+        yield [run]
+    finally:
+        extra["written"] = written[0] if written else 0
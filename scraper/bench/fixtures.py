@@ -0,0 +1,275 @@
+"""
+Deterministic synthetic fixtures for the benchmark suite.
+Shapes follow what the live sites and database return; values are random but
+seeded, so two runs at the same scale parse and write identical data.
+"""
+
+import json
+import random
+from datetime import date, timedelta
+from typing import List, Optional, Tuple
+
+SEED = 20240501
+
+COLES_PAGE_SIZE = 48
+WOOLWORTHS_PAGE_SIZE = 36
+
+_WORDS = [
+    "Organic", "Free Range", "Light", "Classic", "Original", "Smooth", "Crunchy",
+    "Greek", "Tasty", "Full Cream", "Wholemeal", "Sourdough", "Chicken", "Beef",
+    "Tomato", "Cheddar", "Yoghurt", "Pasta", "Rice", "Coffee", "Tea", "Chocolate",
+]
+_BRANDS = ["Coles", "Woolworths", "Devondale", "Arnott's", "Bega", "Sanitarium", "Cadbury", "Vittoria"]
+_SIZES = ["500g", "1kg", "2L", "1L", "375ml", "6 pack", "250g", "750g", "each"]
+_CATEGORIES = [
+    ("Dairy, Eggs & Fridge", "Milk"), ("Pantry", "Pasta & Rice"), ("Bakery", "Bread"),
+    ("Meat & Seafood", "Chicken"), ("Drinks", "Soft Drinks"), ("Fruit & Vegetables", "Fruit"),
+]
+_WOOLIES_DEPTS = ["DAIRY", "GROCERIES", "BAKERY", "MEAT", "FRUIT & VEG", "DELI", "GENERAL MERCHANDISE"]
+
+
+def _name(rng: random.Random) -> str:
+    return " ".join(rng.sample(_WORDS, 3)) + f" {rng.choice(_SIZES)}"
+
+
+def _pricing(rng: random.Random) -> Tuple[float, Optional[float], float]:
+    now = round(rng.uniform(1.0, 30.0), 2)
+    if rng.random() < 0.7:
+        was = round(now * rng.choice([1.25, 1.5, 2.0]), 2)
+        return now, was, round(was - now, 2)
+    return now, None, 0.0
+
+
+# ---------------------------------------------------------------------------
+# Coles __NEXT_DATA__ pages
+# ---------------------------------------------------------------------------
+
+def _coles_result(rng: random.Random, pid: int) -> dict:
+    now, was, save = _pricing(rng)
+    cat, sub = rng.choice(_CATEGORIES)
+    return {
+        "_type": "PRODUCT",
+        "id": pid,
+        "adId": None,
+        "name": _name(rng),
+        "brand": rng.choice(_BRANDS),
+        "description": " ".join(rng.choices(_WORDS, k=12)).upper(),
+        "size": rng.choice(_SIZES),
+        "availability": True,
+        "availabilityType": "SHIPPING",
+        "imageUris": [{"altText": "", "type": "default", "uri": f"/{pid % 10}/{pid}.jpg"}],
+        "locations": [{"aisle": str(rng.randint(1, 30)), "aisleSide": "L", "description": "Aisle"}],
+        "restrictions": {"retailLimit": 20, "promotionalLimit": 20, "liquorAgeRestrictionFlag": False},
+        "merchandiseHeir": {"tradeProfitCentre": cat.upper(), "category": sub.upper(), "subCategory": sub.upper()},
+        "onlineHeirs": [{"aisle": sub, "category": cat, "subCategory": sub, "categoryId": str(pid % 97)}],
+        "pricing": {
+            "now": now,
+            "was": was or 0,
+            "saveAmount": save,
+            "promotionType": "SPECIAL" if save else "",
+            "priceDescription": f"Was ${was}" if was else "",
+            "comparable": f"${now / 2:.2f} per 100g",
+            "unit": {"quantity": 1, "ofMeasureUnits": "g", "price": now, "isWeighted": False},
+            "onlineSpecial": bool(save),
+            "multiBuyPromotion": None,
+        },
+    }
+
+
+def _coles_tile(rng: random.Random) -> dict:
+    return {"_type": "SINGLE_TILE", "adId": f"ad-{rng.randint(0, 10**6)}", "heading": "Great value", "imageUri": "/tile.jpg"}
+
+
+def _coles_cms(rng: random.Random, blocks: int) -> List[dict]:
+    """Layout/CMS content that real pages carry alongside the search results."""
+    return [{
+        "id": f"cms-{i}",
+        "type": rng.choice(["banner", "carousel", "richText", "navigationLink"]),
+        "title": _name(rng),
+        "body": " ".join(rng.choices(_WORDS, k=40)),
+        "link": {"href": f"/browse/{rng.choice(_CATEGORIES)[1].lower()}", "target": "_self"},
+        "image": {"src": f"/content/dam/coles/{i}.jpg", "width": 1200, "height": 400},
+    } for i in range(blocks)]
+
+
+def coles_pages(n_products: int) -> List[str]:
+    """Full HTML pages embedding a __NEXT_DATA__ payload, COLES_PAGE_SIZE products each."""
+    rng = random.Random(SEED)
+    layout = _coles_cms(rng, 400)  # shared across pages, like the real site chrome
+    pages = []
+    for start in range(0, n_products, COLES_PAGE_SIZE):
+        count = min(COLES_PAGE_SIZE, n_products - start)
+        results = [_coles_result(rng, 1_000_000 + start + i) for i in range(count)]
+        results.insert(rng.randrange(len(results) + 1), _coles_tile(rng))
+        next_data = {
+            "props": {
+                "pageProps": {
+                    "searchResults": {
+                        "didYouMean": None,
+                        "noOfResults": n_products,
+                        "start": start,
+                        "pageSize": COLES_PAGE_SIZE,
+                        "keyword": None,
+                        "resultType": 1,
+                        "results": results,
+                        "catalogGroupView": [{"level": 1, "name": c, "productCount": 100} for c, _ in _CATEGORIES],
+                        "filters": [{"name": "brand", "values": [{"name": b, "count": 10} for b in _BRANDS]}],
+                    },
+                    "initStoreId": "0584",
+                    "layout": layout,
+                    "featureFlags": {f"flag_{i}": i % 3 == 0 for i in range(300)},
+                },
+                "__N_SSP": True,
+            },
+            "page": "/on-special",
+            "query": {"page": str(start // COLES_PAGE_SIZE + 1)},
+            "buildId": "bench-build",
+            "isFallback": False,
+        }
+        head = "<html><head>" + '<link rel="preload" href="/_next/static/chunk.js" as="script"/>' * 40 + "</head><body>"
+        body = '<div class="product-tile">&nbsp;</div>' * 200
+        script = f'<script id="__NEXT_DATA__" type="application/json">{json.dumps(next_data)}</script>'
+        pages.append(head + body + script + "</body></html>")
+    return pages
+
+
+# ---------------------------------------------------------------------------
+# Woolworths browse API responses
+# ---------------------------------------------------------------------------
+
+def _woolworths_product(rng: random.Random, stockcode: int) -> dict:
+    now, was, save = _pricing(rng)
+    dept = rng.choice(_WOOLIES_DEPTS)
+    return {
+        "TileID": 1,
+        "Stockcode": stockcode,
+        "Barcode": str(9300000000000 + stockcode),
+        "Name": _name(rng),
+        "DisplayName": _name(rng),
+        "Brand": rng.choice(_BRANDS),
+        "Price": now,
+        "WasPrice": was or now,
+        "SavingsAmount": save,
+        "CupString": f"${now / 2:.2f} / 100G",
+        "PackageSize": rng.choice(_SIZES),
+        "IsOnSpecial": bool(save),
+        "IsHalfPrice": bool(was) and was == now * 2,
+        "IsMarketProduct": rng.random() < 0.05,
+        "Vendor": None,
+        "ThirdPartyProductInfo": None,
+        "MediumImageFile": f"https://cdn0.woolworths.media/content/wowproductimages/medium/{stockcode}.jpg" if rng.random() < 0.9 else None,
+        "Description": " ".join(rng.choices(_WORDS, k=20)),
+        "AdditionalAttributes": {
+            "sapdepartmentname": dept,
+            "sapcategoryname": rng.choice(_CATEGORIES)[1].upper(),
+            "piesdepartmentnamesjson": json.dumps([rng.choice(_CATEGORIES)[0]]) if rng.random() < 0.8 else None,
+            "piescategorynamesjson": json.dumps([rng.choice(_CATEGORIES)[1]]),
+            "ingredients": " ".join(rng.choices(_WORDS, k=15)),
+        },
+        "Rating": {"ReviewCount": rng.randint(0, 500), "Average": round(rng.uniform(1, 5), 1)},
+    }
+
+
+def woolworths_pages(n_products: int) -> List[dict]:
+    """Decoded /apis/ui/browse/category responses, WOOLWORTHS_PAGE_SIZE products each."""
+    rng = random.Random(SEED)
+    pages = []
+    for start in range(0, n_products, WOOLWORTHS_PAGE_SIZE):
+        count = min(WOOLWORTHS_PAGE_SIZE, n_products - start)
+        bundles = [
+            {"Name": f"bundle-{start + i}", "Products": [_woolworths_product(rng, 100_000 + start + i)]}
+            for i in range(count)
+        ]
+        pages.append({"TotalRecordCount": n_products, "Bundles": bundles, "Facets": [], "SeoMetaTags": {}})
+    return pages
+
+
+# ---------------------------------------------------------------------------
+# special_history rows and write payloads
+# ---------------------------------------------------------------------------
+
+def history_groups(n_products: int, today: Optional[date] = None) -> List[Tuple[List[dict], bool, Optional[int]]]:
+    """(history rows, is_on_special_now, current_discount) per product, 0-12 past specials each."""
+    rng = random.Random(SEED)
+    today = today or date.today()
+    groups = []
+    for _ in range(n_products):
+        hist = []
+        day = today - timedelta(days=rng.randint(30, 400))
+        for _ in range(rng.randint(0, 12)):
+            length = rng.randint(1, 14)
+            hist.append({
+                "first_seen": day.isoformat(),
+                "last_seen": (day + timedelta(days=length)).isoformat(),
+                "discount_pct": rng.choice([None, 10, 20, 25, 33, 50]),
+            })
+            day += timedelta(days=length + rng.randint(7, 60))
+        on_special = rng.random() < 0.3
+        groups.append((hist, on_special, rng.choice([20, 25, 50]) if on_special else None))
+    return groups
+
+
+def special_rows(n_products: int) -> List[dict]:
+    """Rows shaped like a `specials` upsert payload."""
+    rng = random.Random(SEED)
+    today = date.today().isoformat()
+    rows = []
+    for i in range(n_products):
+        now, was, save = _pricing(rng)
+        cat, _ = rng.choice(_CATEGORIES)
+        rows.append({
+            "store": "coles" if i % 2 else "woolworths",
+            "product_id": str(1_000_000 + i),
+            "name": _name(rng),
+            "brand": rng.choice(_BRANDS),
+            "category": cat,
+            "current_price": now,
+            "original_price": was,
+            "discount_pct": round(save / was * 100) if was else None,
+            "image_url": f"https://cdn.example.com/{i}.jpg",
+            "product_url": f"https://www.coles.com.au/product/{i}",
+            "special_type": "reduced" if was else None,
+            "size": rng.choice(_SIZES),
+            "scraped_at": today,
+        })
+    return rows
+
+
+# ---------------------------------------------------------------------------
+# Catalogue rows for cross-store matching
+# ---------------------------------------------------------------------------
+
+_SYLLABLES = ["ba", "co", "di", "fe", "go", "hu", "ki", "lo", "ma", "ne", "pi", "ro", "sa", "tu", "ve", "zo"]
+_MATCH_SIZES = ["500g", "1kg", "2L", "1L", "375ml", "6pk", "250g", "750g", "1.25L", "12pk", "200g", "95g"]
+
+
+def catalogue_rows(n_products: int) -> List[dict]:
+    """`products` rows for both stores; most products are stocked by both under slightly different names.
+
+    Words come from a few thousand made-up ones with a long-tailed frequency, as
+    product vocabularies do, so a product's rarest words are shared by few others.
+    """
+    rng = random.Random(SEED)
+    vocab = sorted({"".join(rng.choices(_SYLLABLES, k=rng.randint(2, 4))) for _ in range(4000)})
+    weights = [1 / (rank + 1) for rank in range(len(vocab))]
+    brands = sorted({"".join(rng.choices(_SYLLABLES, k=3)).title() for _ in range(300)})
+    rows = []
+    pid = 0
+    while len(rows) < n_products:
+        words = list(dict.fromkeys(rng.choices(vocab, weights, k=rng.randint(3, 5))))
+        brand = rng.choice(brands)
+        size = rng.choice(_MATCH_SIZES)
+        stores = ["coles", "woolworths"] if rng.random() < 0.8 else [rng.choice(["coles", "woolworths"])]
+        for store in stores:
+            name_words = list(words)
+            if store == "woolworths" and rng.random() < 0.3:
+                name_words.append(rng.choice(vocab))  # e.g. "Potato" in one store's name only
+            pid += 1
+            rows.append({
+                "store": store,
+                "product_id": str(pid),
+                "name": f"{brand} {' '.join(w.title() for w in name_words)} {size}",
+                "brand": brand,
+                "size": size,
+            })
+    return rows[:n_products]
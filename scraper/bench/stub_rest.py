@@ -0,0 +1,69 @@
+"""
+Local stand-in for the Supabase REST (PostgREST) endpoint.
+Accepts table writes and RPC calls, decodes the JSON body like the real server
+would, and answers after a configurable per-request latency. Nothing is stored.
+"""
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, like PostgREST behind its proxy
+    disable_nagle_algorithm = True  # headers and body go out in separate writes
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length)
+        rows = json.loads(body) if body else []
+
+        stub = self.server.stub
+        time.sleep(stub.latency)
+        with stub.lock:
+            stub.stats["requests"] += 1
+            stub.stats["rows"] += len(rows) if isinstance(rows, list) else 1
+            stub.stats["bytes"] += length
+
+        self._reply(201 if "/rpc/" not in self.path else 200, b"[]")
+
+    def do_GET(self):
+        time.sleep(self.server.stub.latency)
+        self._reply(200, b"[]")
+
+    def _reply(self, status: int, payload: bytes):
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+class StubRest:
+    """Threaded HTTP server on an ephemeral localhost port; use as a context manager."""
+
+    def __init__(self, latency_ms: float = 5.0):
+        self.latency = latency_ms / 1000
+        self.lock = threading.Lock()
+        self.stats = {"requests": 0, "rows": 0, "bytes": 0}
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+        self._server.daemon_threads = True
+        self._server.stub = self
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def __enter__(self) -> "StubRest":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._server.shutdown()
+        self._server.server_close()
@@ -0,0 +1,74 @@
+"""
+Local stand-in for the Coles website.
+Serves fixture HTML pages at /on-special?page=N over keep-alive HTTP/1.1,
+gzip-compressed when the client asks for it, and sets a session cookie.
+Pages carry an ETag and answer a matching If-None-Match with 304.
+"""
+
+import gzip
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List
+from urllib.parse import parse_qs, urlparse
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True  # headers and body go out in separate writes
+
+    def do_GET(self):
+        site = self.server.site
+        query = parse_qs(urlparse(self.path).query)
+        page_num = int(query.get("page", ["1"])[0])
+        if not 1 <= page_num <= len(site.pages):
+            self._reply(404, b"not found", gzipped=False)
+            return
+
+        etag = f'"page-{page_num}"'
+        if self.headers.get("If-None-Match") == etag:
+            self._reply(304, b"", gzipped=False, etag=etag)
+            return
+
+        gzipped = "gzip" in (self.headers.get("Accept-Encoding") or "")
+        body = site.gzipped[page_num - 1] if gzipped else site.pages[page_num - 1]
+        self._reply(200, body, gzipped, etag)
+
+    def _reply(self, status: int, payload: bytes, gzipped: bool, etag: str = ""):
+        self.send_response(status)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(payload)))
+        self.send_header("Set-Cookie", "visitorId=bench; Path=/")
+        if gzipped:
+            self.send_header("Content-Encoding", "gzip")
+        if etag:
+            self.send_header("ETag", etag)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+class StubSite:
+    """Threaded HTTP server on an ephemeral localhost port; use as a context manager."""
+
+    def __init__(self, pages: List[str]):
+        self.pages = [p.encode() for p in pages]
+        self.gzipped = [gzip.compress(p, compresslevel=6) for p in self.pages]
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+        self._server.daemon_threads = True
+        self._server.site = self
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def __enter__(self) -> "StubSite":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._server.shutdown()
+        self._server.server_close()
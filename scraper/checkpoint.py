@@ -0,0 +1,139 @@
+"""
+Checkpoint store for long catalogue crawls.
+Records completed (store, category, page) tuples in a small JSON file, and the
+product ids of each persisted page in an append-only side file, so
+`catalogue --resume` can skip work a failed run already persisted without
+rewriting every seen id per page. The checkpoint directory can be cached
+between CI runs.
+"""
+
+import json
+import os
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Iterable, Optional
+
+from scraper.logger import get_logger
+
+log = get_logger("checkpoint")
+
+CHECKPOINT_DIR = Path(os.environ.get("BRAVO_CHECKPOINT_DIR") or Path(__file__).parent / "checkpoints")
+MAX_AGE_HOURS = 48  # older checkpoints belong to a previous weekly run
+
+
+class Checkpoint:
+    """Progress of one store's catalogue crawl."""
+
+    def __init__(self, store: str, path: Path, state: Optional[dict] = None):
+        self.store = store
+        self.path = path
+        state = state or {}
+        self.started = state.get("started") or datetime.now().isoformat(timespec="seconds")
+        self.categories = state.get("categories", {})
+        self.seen_ids: set = set(state.get("seen_ids", []))  # checkpoints from before the side file
+
+    @property
+    def seen_path(self) -> Path:
+        return self.path.with_suffix(".seen")
+
+    @classmethod
+    def open(cls, store: str, resume: bool = False) -> "Checkpoint":
+        """Load the store's checkpoint when resuming, otherwise start a fresh one."""
+        path = CHECKPOINT_DIR / f"catalogue_{store}.json"
+        if not resume or not path.exists():
+            return cls._fresh(store, path)
+
+        try:
+            state = json.loads(path.read_text())
+        except (OSError, ValueError) as e:
+            log.warning(f"{store}: unreadable checkpoint ({e}), starting fresh")
+            return cls._fresh(store, path)
+
+        started = datetime.fromisoformat(state.get("started", "1970-01-01"))
+        if state.get("complete") or datetime.now() - started > timedelta(hours=MAX_AGE_HOURS):
+            log.info(f"{store}: previous checkpoint is complete or stale, starting fresh")
+            return cls._fresh(store, path)
+
+        cp = cls(store, path, state)
+        try:
+            with open(cp.seen_path, encoding="utf-8") as f:
+                cp.seen_ids.update(line.rstrip("\n") for line in f if line.strip())
+        except OSError:
+            pass
+        done = sum(1 for c in cp.categories.values() if c.get("done"))
+        log.info(
+            f"{store}: resuming checkpoint from {cp.started} "
+            f"({done} categories done, {len(cp.seen_ids)} products seen)"
+        )
+        return cp
+
+    def is_done(self, category: str) -> bool:
+        return bool(self.categories.get(category, {}).get("done"))
+
+    def next_page(self, category: str) -> int:
+        """First page of `category` not yet persisted."""
+        pages = self.categories.get(category, {}).get("pages", [])
+        return max(pages) + 1 if pages else 1
+
+    def found(self, category: str) -> int:
+        """Products of `category` counted up to its last persisted page, for the crawl's stop rule."""
+        return self.categories.get(category, {}).get("found", 0)
+
+    def mark_page(
+        self, category: str, page_num: int, found: Optional[int] = None, product_ids: Iterable[str] = (),
+    ):
+        """Record a persisted page; its product ids are appended to the side file."""
+        ids = "".join(f"{pid}\n" for pid in product_ids)
+        if ids:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.seen_path, "a", encoding="utf-8") as f:
+                f.write(ids)
+        state = self.categories.setdefault(category, {"pages": [], "done": False})
+        state["pages"].append(page_num)
+        if found is not None:
+            state["found"] = found
+        self._save()
+
+    def mark_done(self, category: str):
+        self.categories.setdefault(category, {"pages": [], "done": False})["done"] = True
+        self._save()
+
+    def track(self, pages: Iterable, progress: Optional[dict] = None):
+        """Pass (category, page_num, products) batches through, marking each page
+        complete once the consumer has taken it (i.e. persisted it) and asked for
+        the next one. `progress["found"]`, set by the crawl as it yields a page,
+        is recorded with that page. Returns the wrapped generator's return value."""
+        it = iter(pages)
+        while True:
+            try:
+                item = next(it)
+            except StopIteration as stop:
+                return stop.value
+            yield item
+            self.mark_page(item[0], item[1], (progress or {}).get("found"), item[2].product_id)
+
+    def finish(self, categories: Iterable[str]):
+        """Flag the crawl complete if every category finished; keep it resumable otherwise."""
+        pending = [c for c in categories if not self.is_done(c)]
+        if pending:
+            log.warning(f"{self.store}: {len(pending)} categories incomplete, checkpoint kept for --resume")
+            self._save()
+        else:
+            self._save(complete=True)
+
+    @classmethod
+    def _fresh(cls, store: str, path: Path) -> "Checkpoint":
+        cp = cls(store, path)
+        cp.seen_path.unlink(missing_ok=True)
+        return cp
+
+    def _save(self, complete: bool = False):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(".tmp")
+        tmp.write_text(json.dumps({
+            "store": self.store,
+            "started": self.started,
+            "complete": complete,
+            "categories": self.categories,
+        }))
+        os.replace(tmp, self.path)
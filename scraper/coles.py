@@ -1,7 +1,8 @@
 """
 Coles scraper.
-Specials: curl + __NEXT_DATA__ parsing (lightweight, proven).
+Specials: pooled httpx client (or curl) + __NEXT_DATA__ parsing (lightweight, proven).
 Catalogue: Playwright + __NEXT_DATA__ extraction (handles JS bot challenges).
+Both read pages after the first from the Next.js data route (_next/data JSON).
 """
 
 import json
@@ -10,26 +11,45 @@ import re
 import random
 import subprocess
 import time
-from typing import List, Optional, Tuple
+from contextlib import contextmanager
+from typing import Iterator, List, Optional, Tuple
+from urllib.parse import urlencode
 
+try:
+    import orjson
+except ImportError:  # optional: ~3x faster JSON decoding
+    orjson = None
+
+from scraper import httpcache, replay
+from scraper.checkpoint import Checkpoint
 from scraper.logger import get_logger, gha_warning, gha_error
+from scraper.metrics import metrics
+from scraper.products import ProductBatch
+from scraper.scheduler import scheduler
 from scraper.stealth import (
     stealth_delay,
     session_break,
     pick_user_agent,
     create_stealth_context,
     bot_challenge_detected,
+    wait_for_selector,
+    LEAN_BROWSER,
+    describe_lean,
 )
 
 log = get_logger("coles")
 
-BASE_URL = "https://www.coles.com.au"
+HOST = "www.coles.com.au"
+BASE_URL = f"https://{HOST}"
 SPECIALS_URL = f"{BASE_URL}/on-special"
 IMAGE_CDN = "https://cdn.productimages.coles.com.au/productimages"
 
-NEXT_DATA_RE = re.compile(
-    r'<script id="__NEXT_DATA__" type="application/json">(.*?)</script>', re.DOTALL
-)
+NEXT_DATA_SELECTOR = "script#__NEXT_DATA__"
+NEXT_DATA_OPEN = b'<script id="__NEXT_DATA__" type="application/json">'
+SEARCH_RESULTS_KEY = b'"searchResults":'
+PAGE_PROPS_KEY = b'"pageProps":'
+NEXT_DATA_STRING_VALUE = re.compile(rb'\s*:\s*"([^"\\]+)"')
+_json_decoder = json.JSONDecoder()
 
 CATALOGUE_CATEGORIES = [
     {"slug": "fruit-vegetables", "name": "Fruit & Vegetables"},
@@ -42,28 +62,116 @@ CATALOGUE_CATEGORIES = [
 
 BOT_BACKOFF_SECONDS = 600  # 10 minutes
 
+# "httpx" keeps one pooled, compressed, cookie-holding connection for the whole run;
+# "curl" spawns a curl process per page (the original approach, kept as a fallback).
+FETCH_BACKEND = os.environ.get("COLES_FETCH_BACKEND", "httpx").strip().lower()
+
+PAGE_HEADERS = {
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+    "Accept-Language": "en-AU,en;q=0.9",
+    "Referer": f"{BASE_URL}/on-special",
+}
+
 
 # ---------------------------------------------------------------------------
 # Shared parsers
 # ---------------------------------------------------------------------------
 
-def _parse_next_data(html: str) -> Optional[dict]:
-    match = NEXT_DATA_RE.search(html)
-    if not match:
+def _loads(data: bytes):
+    if orjson is not None:
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            pass  # e.g. integers beyond 64 bits; let json decide
+    return json.loads(data)
+
+
+def _parse_search_results(html: bytes) -> Optional[dict]:
+    """Return props.pageProps.searchResults from a page's raw bytes.
+
+    Finds the __NEXT_DATA__ script by byte offset and decodes only the
+    searchResults value (raw_decode stops at its closing brace), so the
+    layout/CMS payload before it is never materialised. Falls back to decoding
+    the whole script when the key is ambiguous. Returns None if the page has
+    no (valid) __NEXT_DATA__, {} if it has no search results.
+    """
+    start = html.find(NEXT_DATA_OPEN)
+    if start < 0:
         return None
+    start += len(NEXT_DATA_OPEN)
+    end = html.find(b"</script>", start)
+    if end < 0:
+        return None
+
+    # An unescaped `"searchResults":` can only be an object key; use it when it
+    # is the only one and sits inside pageProps.
+    key = html.find(SEARCH_RESULTS_KEY, start, end)
+    if (
+        key >= 0
+        and html.find(SEARCH_RESULTS_KEY, key + 1, end) < 0
+        and 0 <= html.find(PAGE_PROPS_KEY, start, key)
+    ):
+        tail = html[key + len(SEARCH_RESULTS_KEY):end].decode("utf-8", "replace").lstrip()
+        if tail.startswith("{"):
+            try:
+                return _json_decoder.raw_decode(tail)[0]
+            except ValueError:
+                pass
+
     try:
-        return json.loads(match.group(1))
-    except json.JSONDecodeError:
+        nd = _loads(html[start:end])
+    except ValueError:
+        return None
+    if not isinstance(nd, dict):
+        return None
+    return nd.get("props", {}).get("pageProps", {}).get("searchResults", {})
+
+
+def _extract_products(nd: dict) -> Tuple[ProductBatch, int]:
+    """Extract product list and total count from __NEXT_DATA__ or a _next/data response."""
+    props = nd.get("pageProps") or nd.get("props", {}).get("pageProps", {})
+    return _products_from_search(props.get("searchResults", {}))
+
+
+def _data_route(nd: dict, path: str) -> Optional[Tuple[str, dict]]:
+    """The Next.js data route (url, query) serving `path`'s pageProps as JSON,
+    from the page's __NEXT_DATA__. None if it has no build id."""
+    build_id = nd.get("buildId")
+    if not build_id:
+        return None
+    locale = nd.get("locale")
+    prefix = f"/{locale}" if locale else ""
+    query = {k: v for k, v in (nd.get("query") or {}).items() if k != "page"}
+    return f"{BASE_URL}/_next/data/{build_id}{prefix}{path}.json", query
+
+
+def _data_route_from_html(html: bytes, path: str) -> Optional[Tuple[str, dict]]:
+    """Like _data_route, reading buildId/locale from the raw page bytes without
+    decoding __NEXT_DATA__ (both are top-level keys after props, hence rfind)."""
+    start = html.find(NEXT_DATA_OPEN)
+    end = html.find(b"</script>", start) if start >= 0 else -1
+    if end < 0:
         return None
+    meta = {}
+    for key in ("buildId", "locale"):
+        i = html.rfind(f'"{key}"'.encode(), start, end)
+        match = NEXT_DATA_STRING_VALUE.match(html, i + len(key) + 2, end) if i >= 0 else None
+        if match:
+            meta[key] = match.group(1).decode()
+    return _data_route(meta, path)
 
 
-def _extract_products(nd: dict) -> Tuple[List[dict], int]:
-    """Extract product list and total count from __NEXT_DATA__."""
-    search = nd.get("props", {}).get("pageProps", {}).get("searchResults", {})
+def _data_route_url(route: Tuple[str, dict], page_num: int) -> str:
+    url, query = route
+    return f"{url}?{urlencode({**query, 'page': page_num}, doseq=True)}"
+
+
+def _products_from_search(search: dict) -> Tuple[ProductBatch, int]:
+    """Extract products and total count from a searchResults object."""
     total = search.get("noOfResults", 0)
     raw_results = search.get("results", [])
 
-    products = []
+    products = ProductBatch()
     for r in raw_results:
         if r.get("_type") != "PRODUCT":
             continue
@@ -94,30 +202,116 @@ def _extract_products(nd: dict) -> Tuple[List[dict], int]:
         if heirs and isinstance(heirs[0], dict):
             category = heirs[0].get("subCategory") or heirs[0].get("category")
 
-        products.append({
-            "store": "coles",
-            "product_id": str(r.get("id", "")),
-            "name": r.get("name", ""),
-            "brand": r.get("brand"),
-            "category": category,
-            "current_price": float(now_price),
-            "original_price": float(was_price) if was_price and was_price > 0 else None,
-            "discount_pct": discount_pct if discount_pct > 0 else None,
-            "image_url": image_uri,
-            "product_url": f"{BASE_URL}/product/{r.get('id', '')}",
-            "special_type": special_type,
-            "size": r.get("size"),
-        })
+        products.add(
+            store="coles",
+            product_id=str(r.get("id", "")),
+            name=r.get("name", ""),
+            brand=r.get("brand"),
+            category=category,
+            current_price=float(now_price),
+            original_price=float(was_price) if was_price and was_price > 0 else None,
+            discount_pct=discount_pct if discount_pct > 0 else None,
+            image_url=image_uri,
+            product_url=f"{BASE_URL}/product/{r.get('id', '')}",
+            special_type=special_type,
+            size=r.get("size"),
+        )
 
     return products, total
 
 
 # ---------------------------------------------------------------------------
-# Specials scraper (curl-based, proven approach)
+# Specials scraper (plain HTTP, proven approach)
 # ---------------------------------------------------------------------------
 
-def _fetch_page_curl(url: str, cookie_jar: str, user_agent: str) -> Optional[str]:
-    """Fetch a page using curl with persistent cookies."""
+_http_client = None
+fetch_stats = {"pages": 0, "bytes": 0, "latencies": []}
+
+
+def _fetch_page(url: str, cookie_jar: str, user_agent: str) -> Optional[bytes]:
+    """Fetch a page with the configured backend, through the record/replay archive
+    and the conditional-request cache (a 304 returns the cached body)."""
+    if replay.REPLAY:
+        html = replay.load(url)
+        if html is not None:
+            metrics.count("pages")
+        return html.encode() if isinstance(html, str) else html  # archives recorded as text
+
+    validators = httpcache.conditional_headers(url)
+    started = time.perf_counter()
+    with metrics.span("coles.fetch"):
+        if FETCH_BACKEND == "curl":
+            status, headers, html, wire_bytes = _fetch_page_curl(url, cookie_jar, user_agent, validators)
+        else:
+            status, headers, html, wire_bytes = _fetch_page_httpx(url, user_agent, validators)
+
+    if status == 304:
+        html = httpcache.not_modified(url)
+    elif status == 200:
+        httpcache.store(url, headers, html, wire_bytes)
+
+    if html is not None:
+        fetch_stats["pages"] += 1
+        fetch_stats["bytes"] += wire_bytes
+        fetch_stats["latencies"].append(time.perf_counter() - started)
+        metrics.count("pages")
+        metrics.count("bytes", wire_bytes)
+    return replay.record(url, html)
+
+
+def _fetch_page_httpx(url: str, user_agent: str, validators: dict) -> Tuple[int, dict, Optional[bytes], int]:
+    """Fetch a page over the shared keep-alive client.
+
+    Returns (status, headers, html, bytes on the wire); html is None on a 304.
+    """
+    global _http_client
+    import httpx
+
+    if _http_client is None:
+        from importlib.util import find_spec
+        # Cookies live in the client's jar; Accept-Encoding is left to httpx,
+        # which advertises gzip/deflate and br/zstd when their decoders are installed.
+        _http_client = httpx.Client(
+            http2=find_spec("h2") is not None,
+            follow_redirects=True,
+            timeout=30.0,
+            headers=PAGE_HEADERS,
+        )
+
+    try:
+        resp = _http_client.get(url, headers={"User-Agent": user_agent, **validators})
+    except httpx.HTTPError as e:
+        log.error(f"httpx error: {e}")
+        return 0, {}, None, 0
+    if resp.status_code == 304:
+        return 304, resp.headers, None, resp.num_bytes_downloaded
+    if resp.status_code >= 500:
+        log.warning(f"{url}: HTTP {resp.status_code}")
+        return resp.status_code, resp.headers, None, 0
+    return resp.status_code, resp.headers, resp.content, resp.num_bytes_downloaded
+
+
+def _parse_curl_headers(text: str) -> Tuple[int, dict]:
+    """Status and lower-cased headers of the final response in a curl --dump-header file."""
+    status, headers = 0, {}
+    for line in text.splitlines():
+        if line.startswith("HTTP/"):
+            parts = line.split()
+            status = int(parts[1]) if len(parts) > 1 and parts[1].isdigit() else 0
+            headers = {}
+        elif ":" in line:
+            name, _, value = line.partition(":")
+            headers[name.strip().lower()] = value.strip()
+    return status, headers
+
+
+def _fetch_page_curl(url: str, cookie_jar: str, user_agent: str, validators: dict) -> Tuple[int, dict, Optional[bytes], int]:
+    """Fetch a page using curl with persistent cookies.
+
+    Returns (status, headers, html, bytes on the wire); html is None on a 304.
+    """
+    header_file = f"{cookie_jar}.headers"
+    extra = [arg for name, value in validators.items() for arg in ("-H", f"{name}: {value}")]
     try:
         result = subprocess.run(
             [
@@ -125,90 +319,160 @@ def _fetch_page_curl(url: str, cookie_jar: str, user_agent: str) -> Optional[str
                 "--cookie", cookie_jar,
                 "--cookie-jar", cookie_jar,
                 "-H", f"User-Agent: {user_agent}",
-                "-H", "Accept: text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
-                "-H", "Accept-Language: en-AU,en;q=0.9",
+                "-H", f"Accept: {PAGE_HEADERS['Accept']}",
+                "-H", f"Accept-Language: {PAGE_HEADERS['Accept-Language']}",
                 "-H", "Accept-Encoding: identity",
                 "-H", "Connection: keep-alive",
-                "-H", f"Referer: {BASE_URL}/on-special",
+                "-H", f"Referer: {PAGE_HEADERS['Referer']}",
+                "--dump-header", header_file,
+                *extra,
                 url,
             ],
-            capture_output=True, text=True, timeout=30,
+            capture_output=True, timeout=30,
         )
-        if result.returncode == 0:
-            return result.stdout
-        return None
+        if result.returncode != 0:
+            return 0, {}, None, 0
+        try:
+            with open(header_file) as f:
+                status, headers = _parse_curl_headers(f.read())
+        except OSError:
+            status, headers = 200, {}
+        if status == 304:
+            return 304, headers, None, 0
+        return status or 200, headers, result.stdout, len(result.stdout)
     except Exception as e:
         log.error(f"curl error: {e}")
+        return 0, {}, None, 0
+
+
+def _close_http_client():
+    global _http_client
+    if _http_client is not None:
+        _http_client.close()
+        _http_client = None
+
+
+def _fetch_search_data(route: Tuple[str, dict], page_num: int, cookie_jar: str, user_agent: str) -> Optional[dict]:
+    """searchResults for one page from the _next/data route, or None if the route
+    did not return usable JSON (stale build id, challenge page, not archived)."""
+    url = _data_route_url(route, page_num)
+    body = _fetch_page(url, cookie_jar, user_agent)
+    if not body or not body.lstrip().startswith(b"{"):
+        return None
+    # A 304 revalidated the cached body; reuse its parse as well
+    search = httpcache.parsed(url)
+    if search is not None:
+        return search
+    try:
+        with metrics.span("coles.parse"):
+            data = _loads(body)
+    except ValueError:
         return None
+    search = data.get("pageProps", {}).get("searchResults") if isinstance(data, dict) else None
+    if not search:
+        return None
+    httpcache.store_parsed(url, search)
+    return search
+
+
+def describe_fetches() -> str:
+    lat = sorted(fetch_stats["latencies"])
+    p50 = lat[len(lat) // 2] * 1000 if lat else 0
+    return (
+        f"{fetch_stats['pages']} pages via {FETCH_BACKEND}, "
+        f"{fetch_stats['bytes'] / 1024:.0f} KiB on the wire, p50 {p50:.0f} ms"
+    )
 
 
-def scrape_coles(max_pages: int = 200) -> List[dict]:
-    """Scrape Coles specials via curl + __NEXT_DATA__."""
+def iter_coles(max_pages: int = 200) -> Iterator[Tuple[str, int, ProductBatch]]:
+    """Scrape Coles specials via plain HTTP + __NEXT_DATA__.
+
+    Yields (category, page_num, new_products) as each page is parsed, so callers
+    can persist pages while the crawl is still running.
+    """
     import tempfile
     cookie_jar = os.path.join(tempfile.gettempdir(), "coles_cookies.txt")
     user_agent = pick_user_agent()
 
-    all_products = []
+    total_new = 0
     seen_ids: set = set()
     consecutive_failures = 0
 
     log.info("Establishing session ...")
-    _fetch_page_curl(f"{BASE_URL}/on-special", cookie_jar, user_agent)
-    stealth_delay(3, 6, "session warmup")
+    _fetch_page(f"{BASE_URL}/on-special", cookie_jar, user_agent)
+    stealth_delay(3, 6, "session warmup", host=HOST)
 
+    data_route = None
     for page_num in range(1, max_pages + 1):
         url = SPECIALS_URL if page_num == 1 else f"{SPECIALS_URL}?page={page_num}"
 
-        html = _fetch_page_curl(url, cookie_jar, user_agent)
-        if not html:
-            consecutive_failures += 1
-            if consecutive_failures >= 3:
-                log.error("3 consecutive fetch failures, stopping")
-                gha_warning("Coles specials: 3 consecutive failures")
-                break
-            stealth_delay(5, 10, "retry backoff")
-            continue
-
-        if "Pardon Our Interruption" in html:
-            log.warning(f"Bot challenge on page {page_num}. Backing off {BOT_BACKOFF_SECONDS}s ...")
-            gha_warning(f"Coles bot challenge on page {page_num}")
-            time.sleep(BOT_BACKOFF_SECONDS)
-            consecutive_failures += 1
-            if consecutive_failures >= 3:
-                log.error("Blocked after retries, stopping")
-                gha_error("Coles specials blocked by bot detection")
-                break
-            continue
-
-        nd = _parse_next_data(html)
-        if not nd:
-            consecutive_failures += 1
-            if consecutive_failures >= 3:
-                log.error("3 consecutive parse failures, stopping")
-                break
-            log.warning(f"Page {page_num}: no __NEXT_DATA__, backing off ...")
-            stealth_delay(5 * consecutive_failures, 10 * consecutive_failures, "parse backoff")
-            continue
+        # Pages after the first come from the _next/data JSON route; the HTML page
+        # is the fallback (and refreshes the build id) if that fails
+        search = _fetch_search_data(data_route, page_num, cookie_jar, user_agent) if data_route else None
+        if search is None:
+            html = _fetch_page(url, cookie_jar, user_agent)
+            if not html:
+                consecutive_failures += 1
+                if consecutive_failures >= 3:
+                    log.error("3 consecutive fetch failures, stopping")
+                    gha_warning("Coles specials: 3 consecutive failures")
+                    break
+                stealth_delay(5, 10, "retry backoff", host=HOST)
+                continue
+
+            if b"Pardon Our Interruption" in html:
+                log.warning(f"Bot challenge on page {page_num}. Backing off {BOT_BACKOFF_SECONDS}s ...")
+                gha_warning(f"Coles bot challenge on page {page_num}")
+                scheduler.wait(HOST, BOT_BACKOFF_SECONDS, "bot backoff")
+                consecutive_failures += 1
+                if consecutive_failures >= 3:
+                    log.error("Blocked after retries, stopping")
+                    gha_error("Coles specials blocked by bot detection")
+                    break
+                continue
+
+            search = httpcache.parsed(url)
+            if search is None:
+                with metrics.span("coles.parse"):
+                    search = _parse_search_results(html)
+                if search is not None:
+                    httpcache.store_parsed(url, search)
+            if search is None:
+                consecutive_failures += 1
+                if consecutive_failures >= 3:
+                    log.error("3 consecutive parse failures, stopping")
+                    break
+                log.warning(f"Page {page_num}: no __NEXT_DATA__, backing off ...")
+                stealth_delay(5 * consecutive_failures, 10 * consecutive_failures, "parse backoff", host=HOST)
+                continue
+            data_route = _data_route_from_html(html, "/on-special") or data_route
 
         consecutive_failures = 0
-        products, total = _extract_products(nd)
+        products, total = _products_from_search(search)
+        metrics.count("products", len(products))
 
-        new_count = 0
-        for p in products:
-            if p["product_id"] not in seen_ids:
-                seen_ids.add(p["product_id"])
-                all_products.append(p)
-                new_count += 1
+        new_products = products.new(seen_ids)
+        total_new += len(new_products)
 
-        log.info(f"Specials p{page_num}: +{new_count} ({len(all_products)}/{total})")
+        log.info(f"Specials p{page_num}: +{len(new_products)} ({total_new}/{total})")
+        if new_products:
+            yield "on-special", page_num, new_products
 
-        if len(all_products) >= total or new_count == 0:
+        if total_new >= total or not new_products:
             break
 
-        stealth_delay(30, 75, f"specials p{page_num}")
+        stealth_delay(30, 75, f"specials p{page_num}", host=HOST)
 
-    log.info(f"Specials done: {len(all_products)} products")
-    return all_products
+    _close_http_client()
+    log.info(f"Specials done: {total_new} products ({describe_fetches()})")
+
+
+def scrape_coles(max_pages: int = 200) -> ProductBatch:
+    """Scrape Coles specials via plain HTTP + __NEXT_DATA__."""
+    products = ProductBatch()
+    for _, _, batch in iter_coles(max_pages):
+        products.extend(batch)
+    return products
 
 
 # ---------------------------------------------------------------------------
@@ -228,186 +492,234 @@ def _extract_next_data_from_page(page) -> Optional[dict]:
     return None
 
 
-def _scrape_catalogue_category(page, category: dict, max_pages: int) -> List[dict]:
-    """Scrape a single Coles browse category using Playwright."""
+def _catalogue_page_url(slug: str, page_num: int) -> str:
+    """Archive key for one page of a browse category, however it was fetched."""
+    return f"{BASE_URL}/browse/{slug}?page={page_num}"
+
+
+def _iter_catalogue_category(
+    page, category: dict, max_pages: int,
+    seen_ids: Optional[set] = None,
+    start_page: int = 1,
+    found: int = 0,
+    progress: Optional[dict] = None,
+):
+    """Scrape a single Coles browse category using Playwright, yielding each page's new products.
+
+    The first page is rendered for its __NEXT_DATA__ (session cookies, bot checks,
+    build id); later pages are fetched from the Next.js data route as JSON.
+    Products already in `seen_ids` (shared across categories) are not yielded again.
+    A resumed crawl passes the products `found` on the pages before `start_page`;
+    the running count is kept in `progress["found"]` as each page is yielded.
+    Returns True once the category is exhausted, False if any page could not be
+    loaded (so a checkpoint keeps it open for --resume).
+    """
     slug = category["slug"]
     name = category["name"]
-    all_products = []
-    seen_ids: set = set()
+    cat_seen: set = set()
+    if seen_ids is None:
+        seen_ids = set()
+    if progress is None:
+        progress = {}
+
+    def fresh(products: ProductBatch) -> ProductBatch:
+        return products.new(seen_ids)
 
-    browse_url = f"{BASE_URL}/browse/{slug}"
-    log.info(f"Loading {name} ({browse_url}) ...")
+    if page is replay.OFFLINE_PAGE:
+        return (yield from _replay_catalogue_category(category, max_pages, fresh, start_page, found, progress))
 
-    page.goto(browse_url, wait_until="domcontentloaded", timeout=45000)
-    page.wait_for_timeout(8000)
+    path = f"/browse/{slug}"
+    nd = _load_browse_page(page, name, _catalogue_page_url(slug, start_page) if start_page > 1 else f"{BASE_URL}{path}")
+    if not nd:
+        return False
+    replay.record(_catalogue_page_url(slug, start_page), json.dumps(nd))
+    route = _data_route(nd, path)
+
+    products, total = _extract_products(nd)
+    metrics.count("products", len(products))
+    new_products = products.new(cat_seen)
+    found += len(new_products)
+
+    log.info(f"{name} p{start_page}: +{len(new_products)} ({found}/{total})")
+    first = fresh(new_products)
+    if first:
+        progress["found"] = found
+        yield slug, start_page, first
+
+    if found >= total or total <= len(products):
+        return True
+
+    # Next pages: fetch the _next/data JSON directly; render the page only if the
+    # data route fails (e.g. a deploy changed the build id mid-crawl)
+    data_pages = loaded_pages = 0
+    for page_num in range(start_page + 1, max_pages + 1):
+        if found >= total:
+            break
+
+        stealth_delay(45, 120, f"{name} p{page_num}", host=HOST)
+
+        data = _fetch_data_route(page, route, page_num) if route else None
+        if data is not None:
+            data_pages += 1
+        else:
+            data = _load_browse_page(page, name, _catalogue_page_url(slug, page_num))
+            if not data:
+                log.warning(f"{name} p{page_num}: could not load, leaving the category open")
+                return False
+            loaded_pages += 1
+            route = _data_route(data, path) or route
+        replay.record(_catalogue_page_url(slug, page_num), json.dumps(data))
+        products_page, _ = _extract_products(data)
+        metrics.count("products", len(products_page))
+
+        new_products = products_page.new(cat_seen)
+        found += len(new_products)
+
+        log.info(f"{name} p{page_num}: +{len(new_products)} ({found}/{total})")
+
+        if not new_products:
+            log.warning(f"{name} p{page_num}: no new products, stopping")
+            break
+
+        page_products = fresh(new_products)
+        if page_products:
+            progress["found"] = found
+            yield slug, page_num, page_products
+
+        if page_num % SESSION_BREAK_EVERY == 0:
+            session_break(2.0, 5.0, label=f"{name} session break", host=HOST)
+
+    log.info(f"{name}: {data_pages} pages via _next/data, {loaded_pages} rendered")
+    return True
+
+
+SESSION_BREAK_EVERY = 10
+
+
+def _load_browse_page(page, name: str, url: str) -> Optional[dict]:
+    """Render a browse page (backing off once on a bot challenge) and return its __NEXT_DATA__."""
+    log.info(f"Loading {name} ({url}) ...")
+    with metrics.span("coles.render"):
+        page.goto(url, wait_until="domcontentloaded", timeout=45000)
+        wait_for_selector(page, NEXT_DATA_SELECTOR, 8000)
+    metrics.count("pages")
 
     if bot_challenge_detected(page):
         log.warning(f"{name}: bot challenge. Waiting {BOT_BACKOFF_SECONDS}s ...")
-        time.sleep(BOT_BACKOFF_SECONDS)
+        scheduler.wait(HOST, BOT_BACKOFF_SECONDS, f"{name} bot backoff")
         page.reload(wait_until="domcontentloaded", timeout=45000)
-        page.wait_for_timeout(8000)
+        wait_for_selector(page, NEXT_DATA_SELECTOR, 8000)
         if bot_challenge_detected(page):
             log.error(f"{name}: still blocked after backoff")
             gha_error(f"Coles catalogue blocked for {name}")
-            return []
+            return None
 
-    # Page 1: extract from __NEXT_DATA__ (available on SSR page load)
     nd = _extract_next_data_from_page(page)
     if not nd:
-        log.error(f"{name}: no __NEXT_DATA__ on page 1")
-        return []
-
-    products, total = _extract_products(nd)
-    for p in products:
-        if p["product_id"] not in seen_ids:
-            seen_ids.add(p["product_id"])
-            all_products.append(p)
-
-    log.info(f"{name} p1: +{len(all_products)} ({len(all_products)}/{total})")
+        log.error(f"{name}: no __NEXT_DATA__ at {url}")
+    return nd
 
-    if total <= len(products):
-        return all_products
 
-    # Pages 2+: click pagination links and intercept _next/data responses
-    for page_num in range(2, max_pages + 1):
-        if len(all_products) >= total:
-            break
+def _fetch_data_route(page, route: Tuple[str, dict], page_num: int) -> Optional[dict]:
+    """Fetch one page of a data route from inside the page (same cookies and
+    fingerprint as navigation). Returns the JSON, or None if it is not usable."""
+    url = _data_route_url(route, page_num)
+    try:
+        with metrics.span("coles.fetch"):
+            resp = page.evaluate("""async (url) => {
+                const r = await fetch(url, {headers: {'x-nextjs-data': '1'}});
+                return {status: r.status, body: r.ok ? await r.text() : null};
+            }""", url)
+    except Exception as e:
+        log.warning(f"_next/data fetch failed: {e}")
+        return None
 
-        stealth_delay(45, 120, f"{name} p{page_num}")
-
-        # Scroll to bottom to reveal pagination
-        page.evaluate("window.scrollTo(0, document.body.scrollHeight)")
-        page.wait_for_timeout(1500)
-
-        # Set up response interception for the data fetch
-        captured_data = []
-
-        def capture_response(response):
-            url = response.url
-            if "_next/data" in url and response.status == 200:
-                try:
-                    body = response.json()
-                    if body.get("pageProps", {}).get("searchResults"):
-                        captured_data.append(body)
-                except Exception:
-                    pass
-
-        page.on("response", capture_response)
-
-        # Click the next page link
-        next_href = f"/browse/{slug}?page={page_num}"
-        clicked = page.evaluate(f"""() => {{
-            const link = document.querySelector('a[href="{next_href}"]');
-            if (link) {{ link.click(); return true; }}
-            const next = document.querySelector('a[aria-label="Go to next page"]');
-            if (next) {{ next.click(); return true; }}
-            return false;
-        }}""")
-
-        if not clicked:
-            log.warning(f"{name} p{page_num}: no pagination link found, stopping")
-            page.remove_listener("response", capture_response)
-            break
+    if resp["status"] != 200 or not resp["body"]:
+        log.warning(f"_next/data p{page_num}: HTTP {resp['status']}")
+        return None
+    metrics.count("pages")
+    metrics.count("bytes", len(resp["body"]))
+    try:
+        with metrics.span("coles.parse"):
+            data = _loads(resp["body"])
+    except ValueError:
+        return None  # e.g. a challenge page instead of JSON
+    if not isinstance(data, dict) or not data.get("pageProps", {}).get("searchResults"):
+        return None
+    return data
 
-        page.wait_for_timeout(6000)
-        page.remove_listener("response", capture_response)
 
-        if captured_data:
-            # Use intercepted _next/data response
-            nd_page = captured_data[-1]
-            products_page, _ = _extract_products(nd_page)
+def _replay_catalogue_category(
+    category: dict, max_pages: int, fresh, start_page: int, found: int = 0, progress: Optional[dict] = None,
+):
+    """Replay a category from the archive with the same paging and stop rules as the live crawl."""
+    slug = category["slug"]
+    name = category["name"]
+    total = None
+    cat_seen: set = set()
+    if progress is None:
+        progress = {}
+
+    for page_num in range(start_page, max_pages + 1):
+        text = replay.load(_catalogue_page_url(slug, page_num))
+        if text is None:
+            return page_num > start_page
+
+        data = json.loads(text)
+        if "dom_products" in data:  # DOM-tile fallback in archives from the old click pager
+            products = ProductBatch.from_rows(data["dom_products"])
         else:
-            # Fallback: try __NEXT_DATA__ from DOM (may be stale)
-            # Second fallback: extract product tiles from rendered DOM
-            products_page = _extract_products_from_dom(page)
-
-        new_count = 0
-        for p in products_page:
-            if p["product_id"] not in seen_ids:
-                seen_ids.add(p["product_id"])
-                all_products.append(p)
-                new_count += 1
+            products, page_total = _extract_products(data)
+            total = page_total if total is None else total
 
-        log.info(f"{name} p{page_num}: +{new_count} ({len(all_products)}/{total})")
+        new_products = products.new(cat_seen)
+        found += len(new_products)
 
-        if new_count == 0:
-            log.warning(f"{name} p{page_num}: no new products, stopping")
+        log.info(f"{name} p{page_num}: +{len(new_products)} ({found}/{total}) [replay]")
+        if not new_products:
             break
 
-        if page_num % SESSION_BREAK_EVERY == 0:
-            session_break(2.0, 5.0, label=f"{name} session break")
-
-    return all_products
+        page_products = fresh(new_products)
+        if page_products:
+            progress["found"] = found
+            yield slug, page_num, page_products
 
+        if total is not None and found >= total:
+            break
 
-SESSION_BREAK_EVERY = 10
+    return True
 
 
-def _extract_products_from_dom(page) -> List[dict]:
-    """Fallback: extract product data directly from rendered DOM tiles."""
+def _revalidate_next_data(route):
+    """Playwright route handler: fetch _next/data with cached validators and serve
+    the cached body on a 304, so unchanged pages are not transferred again."""
+    url = route.request.url
+    validators = httpcache.conditional_headers(url)
     try:
-        raw = page.evaluate("""() => {
-            const products = [];
-            const links = document.querySelectorAll('a[href*="/product/"]');
-            const seen = new Set();
-            for (const link of links) {
-                const href = link.getAttribute('href') || '';
-                const idMatch = href.match(/\\/product\\/(\\d+)/);
-                if (!idMatch || seen.has(idMatch[1])) continue;
-                seen.add(idMatch[1]);
-
-                const tile = link.closest('section, article, [class*="tile"], [class*="card"]') || link;
-                const text = tile.innerText || '';
-                const img = tile.querySelector('img');
-
-                // Try to extract price from text
-                const priceMatch = text.match(/\\$([\\d.]+)/);
-                const nameEl = tile.querySelector('h3, h4, [class*="name"], [class*="title"]');
-
-                products.push({
-                    id: idMatch[1],
-                    name: nameEl ? nameEl.innerText.trim() : text.split('\\n')[0]?.trim() || '',
-                    price: priceMatch ? parseFloat(priceMatch[1]) : null,
-                    image: img ? img.getAttribute('src') : null,
-                    href: href,
-                });
-            }
-            return products;
-        }""")
-
-        return [{
-            "store": "coles",
-            "product_id": str(r["id"]),
-            "name": r["name"],
-            "brand": None,
-            "category": None,
-            "current_price": r["price"],
-            "original_price": None,
-            "discount_pct": None,
-            "image_url": r.get("image"),
-            "product_url": f"{BASE_URL}{r['href']}" if r.get("href") else None,
-            "special_type": None,
-            "size": None,
-        } for r in raw if r.get("price") is not None]
-
-    except Exception as e:
-        log.error(f"DOM extraction failed: {e}")
-        return []
+        resp = route.fetch(headers={**route.request.headers, **validators})
+    except Exception:
+        route.continue_()
+        return
+
+    if resp.status == 304:
+        cached = httpcache.not_modified(url)
+        if cached is not None:
+            route.fulfill(status=200, body=cached, content_type="application/json")
+            return
+    elif resp.status == 200:
+        httpcache.store(url, resp.headers, resp.body())
+    route.fulfill(response=resp)
+
+
+@contextmanager
+def _catalogue_browser():
+    """Yield a stealth Playwright page, or the offline placeholder in replay mode."""
+    if replay.REPLAY:
+        yield replay.OFFLINE_PAGE
+        return
 
-
-def scrape_coles_catalogue(
-    categories: Optional[List[dict]] = None,
-    max_pages_per_category: int = 200,
-) -> List[dict]:
-    """Scrape full product catalogue for given Coles categories via Playwright."""
     from playwright.sync_api import sync_playwright
 
-    if categories is None:
-        categories = CATALOGUE_CATEGORIES
-
-    all_products = []
-    seen_ids: set = set()
-
     with sync_playwright() as p:
         browser = p.chromium.launch(
             channel="chrome" if not os.environ.get("COLES_HEADLESS") else None,
@@ -416,25 +728,70 @@ def scrape_coles_catalogue(
         )
         ctx = create_stealth_context(browser)
         page = ctx.new_page()
+        if httpcache.ENABLED:
+            page.route("**/_next/data/**", _revalidate_next_data)
+        try:
+            yield page
+        finally:
+            browser.close()
+            if LEAN_BROWSER:
+                log.info(describe_lean())
 
-        for i, category in enumerate(categories):
-            log.info(f"Catalogue [{i+1}/{len(categories)}]: {category['name']} ...")
-            cat_products = _scrape_catalogue_category(page, category, max_pages_per_category)
 
-            for cp in cat_products:
-                if cp["product_id"] not in seen_ids:
-                    seen_ids.add(cp["product_id"])
-                    all_products.append(cp)
+def iter_coles_catalogue(
+    categories: Optional[List[dict]] = None,
+    max_pages_per_category: int = 200,
+    checkpoint: Optional[Checkpoint] = None,
+) -> Iterator[Tuple[str, int, ProductBatch]]:
+    """Scrape full product catalogue for given Coles categories via Playwright.
+
+    Yields (category_slug, page_num, new_products) per page, deduplicated across categories.
+    With a checkpoint, finished categories are skipped, partly done ones resume at
+    their next page, and each page is recorded once the caller has consumed it.
+    """
+    if categories is None:
+        categories = CATALOGUE_CATEGORIES
 
-            log.info(f"  {category['name']}: {len(cat_products)} products")
+    seen_ids: set = checkpoint.seen_ids if checkpoint else set()
+    total_before = len(seen_ids)
+
+    with _catalogue_browser() as page:
+        for i, category in enumerate(categories):
+            if checkpoint and checkpoint.is_done(category["slug"]):
+                log.info(f"Catalogue [{i+1}/{len(categories)}]: {category['name']} done in previous run, skipping")
+                continue
+
+            start_page = checkpoint.next_page(category["slug"]) if checkpoint else 1
+            resume_note = f" (resuming at p{start_page})" if start_page > 1 else ""
+            log.info(f"Catalogue [{i+1}/{len(categories)}]: {category['name']} ...{resume_note}")
+            before = len(seen_ids)
+            progress: dict = {}
+            pages = _iter_catalogue_category(
+                page, category, max_pages_per_category,
+                seen_ids=seen_ids, start_page=start_page,
+                found=checkpoint.found(category["slug"]) if checkpoint else 0, progress=progress,
+            )
+            complete = yield from (checkpoint.track(pages, progress) if checkpoint else pages)
+            if checkpoint and complete:
+                checkpoint.mark_done(category["slug"])
+
+            log.info(f"  {category['name']}: {len(seen_ids) - before} products")
 
             if i < len(categories) - 1:
-                session_break(3.0, 7.0, label=f"between categories ({category['name']})")
+                session_break(3.0, 7.0, label=f"between categories ({category['name']})", host=HOST)
+
+    log.info(f"Catalogue done: {len(seen_ids) - total_before} products across {len(categories)} categories")
 
-        browser.close()
 
-    log.info(f"Catalogue done: {len(all_products)} products across {len(categories)} categories")
-    return all_products
+def scrape_coles_catalogue(
+    categories: Optional[List[dict]] = None,
+    max_pages_per_category: int = 200,
+) -> ProductBatch:
+    """Scrape full product catalogue for given Coles categories via Playwright."""
+    products = ProductBatch()
+    for _, _, batch in iter_coles_catalogue(categories, max_pages_per_category):
+        products.extend(batch)
+    return products
 
 
 if __name__ == "__main__":
@@ -446,4 +803,4 @@ if __name__ == "__main__":
         products = scrape_coles(max_pages=3)
     print(f"\nGot {len(products)} products")
     for p in products[:5]:
-        print(f"  {p.get('brand', '')} {p['name']} | ${p['current_price']}")
+        print(f"  {p.brand or ''} {p.name} | ${p.current_price}")
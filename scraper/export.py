@@ -0,0 +1,200 @@
+"""
+Static JSON snapshot of the app's read models, for serving from the CDN.
+Current specials are sharded per store and category, intel summaries per store
+and product-id bucket (so looking up a few products loads a few small files),
+plus a category index. Each shard's file name carries a hash of
+its content, so it can be cached forever; manifest.json (cached briefly) maps
+logical shard names to the current files. Every shard is also written
+precompressed (.gz, and .br when brotli is installed) for hosts that serve
+static compressed siblings.
+BRAVO_EXPORT_DIR overrides the output directory (default web/public/data, which
+the web build publishes as /data).
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import re
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from scraper.logger import get_logger
+
+try:
+    import brotli
+except ImportError:  # optional: gzip siblings only
+    brotli = None
+
+log = get_logger("export")
+
+EXPORT_DIR = Path(
+    os.environ.get("BRAVO_EXPORT_DIR")
+    or Path(__file__).resolve().parent.parent / "web" / "public" / "data"
+)
+MANIFEST = "manifest.json"
+MANIFEST_VERSION = 1
+
+SPECIAL_COLUMNS = (
+    "id,store,product_id,name,brand,category,current_price,original_price,discount_pct,"
+    "saving,image_url,product_url,special_type,valid_from,valid_to,scraped_at,"
+    "frequency_class,avg_frequency_days,expected_days_until_next,total_times_on_special,last_special_date"
+)
+INTEL_COLUMNS = (
+    "id,store,product_id,name,category,image_url,frequency_class,avg_frequency_days,"
+    "days_since_last_special,expected_days_until_next,is_on_special_now,last_special_date,"
+    "last_discount_pct,total_times_on_special,updated_at"
+)
+UNCATEGORISED = "uncategorised"
+INTEL_BUCKETS = 16
+
+_stats = {"shards": 0, "written": 0, "unchanged": 0, "pruned": 0, "bytes": 0, "gzip_bytes": 0}
+
+
+def slug(text: Optional[str]) -> str:
+    """File-name form of a category, e.g. "Dairy, Eggs & Fridge" -> "dairy-eggs-fridge"."""
+    s = re.sub(r"[^a-z0-9]+", "-", (text or "").lower()).strip("-")
+    return s or UNCATEGORISED
+
+
+def bucket(product_id: str, buckets: int = INTEL_BUCKETS) -> int:
+    """Intel shard for a product id: 32-bit FNV-1a of its UTF-8 bytes (mirrored in web/src/lib/snapshot.ts)."""
+    h = 0x811C9DC5
+    for b in product_id.encode("utf-8"):
+        h = ((h ^ b) * 0x01000193) & 0xFFFFFFFF
+    return h % buckets
+
+
+def _by_discount(rows: List[dict]) -> List[dict]:
+    """Highest discount first (nulls last), then by product id, so shard bytes are stable."""
+    return sorted(rows, key=lambda r: (r.get("discount_pct") is None, -(r.get("discount_pct") or 0), r["product_id"]))
+
+
+def _encode(rows: List[dict]) -> bytes:
+    return json.dumps(rows, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+def _write_shard(out_dir: Path, name: str, rows: List[dict]) -> dict:
+    """Write `rows` as <name>.<hash>.json plus compressed siblings; returns the manifest entry.
+
+    Content-addressed: a shard whose bytes are unchanged since the last export
+    keeps its file (and its cached copies on the CDN and in browsers).
+    """
+    body = _encode(rows)
+    digest = hashlib.sha256(body).hexdigest()[:12]
+    path = out_dir / f"{name}.{digest}.json"
+    _stats["shards"] += 1
+    _stats["bytes"] += len(body)
+
+    gz_path = path.with_name(path.name + ".gz")
+    if path.exists() and gz_path.exists():
+        _stats["unchanged"] += 1
+        gz_size = gz_path.stat().st_size
+    else:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(body)
+        gz = gzip.compress(body, compresslevel=9, mtime=0)
+        gz_path.write_bytes(gz)
+        if brotli is not None:
+            path.with_name(path.name + ".br").write_bytes(brotli.compress(body, quality=11))
+        _stats["written"] += 1
+        gz_size = len(gz)
+    _stats["gzip_bytes"] += gz_size
+
+    return {"file": path.relative_to(out_dir).as_posix(), "rows": len(rows), "bytes": len(body), "gzip_bytes": gz_size}
+
+
+def _referenced(manifest: dict) -> set:
+    """Shard files a manifest points at."""
+    files = set()
+
+    def walk(node):
+        if isinstance(node, dict):
+            if "file" in node:
+                files.add(node["file"])
+            else:
+                for child in node.values():
+                    walk(child)
+
+    walk({k: v for k, v in manifest.items() if k in ("specials", "intel", "categories")})
+    return files
+
+
+def _prune(out_dir: Path, keep: set):
+    """Delete shard files (and their compressed siblings) that no manifest in `keep` references."""
+    for path in out_dir.rglob("*.json*"):
+        rel = path.relative_to(out_dir).as_posix()
+        if rel == MANIFEST:
+            continue
+        base = re.sub(r"\.(gz|br)$", "", rel)
+        if base not in keep:
+            path.unlink()
+            _stats["pruned"] += 1
+
+
+def _load_manifest(out_dir: Path) -> dict:
+    try:
+        return json.loads((out_dir / MANIFEST).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+
+
+def export_snapshot(db, out_dir: Optional[Path] = None) -> dict:
+    """Write the snapshot from specials_feed, special_intel and category_counts; returns the manifest.
+
+    The manifest is replaced last, atomically, so readers never see it point at
+    a missing shard. Shards referenced by the previous manifest are kept for one
+    more export, for clients that loaded it just before the swap.
+    """
+    from scraper.main import _select_pages  # main is loaded by the time it calls us
+
+    out_dir = Path(out_dir or EXPORT_DIR)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    previous = _load_manifest(out_dir)
+
+    specials: Dict[str, Dict[str, List[dict]]] = {}
+    for row in _select_pages(lambda: db.table("specials_feed").select(SPECIAL_COLUMNS)):
+        specials.setdefault(row["store"], {}).setdefault(row.get("category") or "", []).append(row)
+
+    intel: Dict[str, Dict[int, List[dict]]] = {}
+    for row in _select_pages(lambda: db.table("special_intel").select(INTEL_COLUMNS)):
+        intel.setdefault(row["store"], {}).setdefault(bucket(row["product_id"]), []).append(row)
+
+    categories = (
+        db.table("category_counts").select("store,category,specials,max_discount_pct")
+        .order("store").order("category").execute().data or []
+    )
+
+    manifest = {
+        "version": MANIFEST_VERSION,
+        "generated_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "specials": {},
+        "intel": {},
+    }
+    for store, by_category in sorted(specials.items()):
+        shards = manifest["specials"][store] = {}
+        for category, rows in sorted(by_category.items()):
+            entry = _write_shard(out_dir, f"specials/{store}/{slug(category)}", _by_discount(rows))
+            shards[category or UNCATEGORISED] = entry
+    for store, by_bucket in sorted(intel.items()):
+        shards = {}
+        for b, rows in sorted(by_bucket.items()):
+            rows.sort(key=lambda r: r["product_id"])
+            shards[str(b)] = _write_shard(out_dir, f"intel/{store}/{b}", rows)
+        manifest["intel"][store] = {"buckets": INTEL_BUCKETS, "shards": shards}
+    manifest["categories"] = _write_shard(out_dir, "categories", categories)
+
+    tmp = out_dir / f"{MANIFEST}.tmp"
+    tmp.write_text(json.dumps(manifest, indent=1), encoding="utf-8")
+    os.replace(tmp, out_dir / MANIFEST)
+    _prune(out_dir, _referenced(manifest) | _referenced(previous))
+    return manifest
+
+
+def describe() -> str:
+    s = _stats
+    return (
+        f"{s['shards']} shards ({s['written']} written, {s['unchanged']} unchanged, {s['pruned']} files pruned), "
+        f"{s['bytes'] / 1024:.0f} KiB JSON, {s['gzip_bytes'] / 1024:.0f} KiB gzipped"
+    )
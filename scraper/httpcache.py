@@ -0,0 +1,154 @@
+"""
+On-disk conditional-request cache for scraper fetches.
+Stores each response's ETag/Last-Modified validators with its body (and,
+optionally, the parsed result). The next fetch of the same URL and request body
+sends If-None-Match/If-Modified-Since; a 304 reuses the stored copy, skipping
+both the transfer and the re-parse.
+BRAVO_HTTP_CACHE overrides the cache directory (default scraper/http_cache);
+BRAVO_HTTP_CACHE=off disables it.
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Any, Optional, Union
+
+from scraper.logger import get_logger
+
+log = get_logger("httpcache")
+
+_setting = os.environ.get("BRAVO_HTTP_CACHE", "").strip()
+ENABLED = _setting.lower() not in ("off", "0", "false")
+CACHE_DIR = Path(_setting) if ENABLED and _setting else Path(__file__).parent / "http_cache"
+
+_stats = {"requests": 0, "hits": 0, "bytes_saved": 0, "parses_saved": 0}
+_entries: dict = {}  # key -> entry loaded this run
+_lock = threading.Lock()  # fetches run on worker threads; guards _stats and _entries
+
+
+def _key(url: str, body: Optional[str]) -> str:
+    return hashlib.sha256(f"{url}\n{body or ''}".encode()).hexdigest()[:32]
+
+
+def _load(key: str) -> Optional[dict]:
+    with _lock:
+        if key in _entries:
+            return _entries[key]
+    try:
+        with gzip.open(CACHE_DIR / f"{key}.json.gz", "rt", encoding="utf-8") as f:
+            entry = json.load(f)
+    except (OSError, ValueError):
+        entry = None
+    with _lock:
+        return _entries.setdefault(key, entry)
+
+
+def conditional_headers(url: str, body: Optional[str] = None) -> dict:
+    """Validators to send with a request for (url, body); empty if nothing is cached."""
+    if not ENABLED:
+        return {}
+    with _lock:
+        _stats["requests"] += 1
+    entry = _load(_key(url, body))
+    if not entry:
+        return {}
+    headers = {}
+    if entry.get("etag"):
+        headers["If-None-Match"] = entry["etag"]
+    if entry.get("last_modified"):
+        headers["If-Modified-Since"] = entry["last_modified"]
+    return headers
+
+
+def not_modified(url: str, body: Optional[str] = None) -> Optional[Union[str, bytes]]:
+    """Handle a 304 for (url, body): count the hit and return the cached content."""
+    entry = _load(_key(url, body)) if ENABLED else None
+    if not entry:
+        return None
+    with _lock:
+        entry["revalidated"] = True
+        _stats["hits"] += 1
+        _stats["bytes_saved"] += entry.get("wire_bytes", 0)
+    if entry.get("bytes"):
+        return entry["content"].encode("utf-8", "surrogateescape")
+    return entry["content"]
+
+
+def store(
+    url: str,
+    headers,
+    content: Union[str, bytes],
+    wire_bytes: int = 0,
+    body: Optional[str] = None,
+):
+    """Cache a 200 response if it carries an ETag or Last-Modified validator."""
+    if not ENABLED or content is None:
+        return
+    etag = headers.get("etag")
+    last_modified = headers.get("last-modified")
+    if not etag and not last_modified:
+        return
+
+    raw = isinstance(content, bytes)
+    key = _key(url, body)
+    entry = {
+        "url": url,
+        "etag": etag,
+        "last_modified": last_modified,
+        "wire_bytes": wire_bytes or len(content),
+        "bytes": raw,
+        "content": content.decode("utf-8", "surrogateescape") if raw else content,
+        "parsed": None,
+    }
+    with _lock:
+        _entries[key] = entry
+    _save(key, entry)
+
+
+def parsed(url: str, body: Optional[str] = None) -> Optional[Any]:
+    """Parsed result stored for (url, body), but only if this run's fetch was a 304."""
+    if not ENABLED:
+        return None
+    with _lock:
+        entry = _entries.get(_key(url, body))
+        if entry and entry.get("revalidated") and entry.get("parsed") is not None:
+            _stats["parses_saved"] += 1
+            return entry["parsed"]
+    return None
+
+
+def store_parsed(url: str, value: Any, body: Optional[str] = None):
+    """Attach a JSON-serialisable parse result to the cached response for (url, body)."""
+    if not ENABLED:
+        return
+    key = _key(url, body)
+    with _lock:
+        entry = _entries.get(key)
+        if not entry or entry.get("parsed") is not None:
+            return
+        entry["parsed"] = value
+    _save(key, entry)
+
+
+def _save(key: str, entry: dict):
+    with _lock:
+        entry = {k: v for k, v in entry.items() if k != "revalidated"}
+    CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    path = CACHE_DIR / f"{key}.json.gz"
+    tmp = path.with_suffix(".tmp")
+    with gzip.open(tmp, "wt", encoding="utf-8") as f:
+        json.dump(entry, f)
+    os.replace(tmp, path)
+
+
+def describe() -> str:
+    with _lock:
+        s = dict(_stats)
+    rate = s["hits"] / s["requests"] * 100 if s["requests"] else 0
+    return (
+        f"{s['hits']}/{s['requests']} revalidated ({rate:.0f}% hit rate), "
+        f"{s['bytes_saved'] / 1024:.0f} KiB not transferred, {s['parses_saved']} parses skipped"
+    )
@@ -5,6 +5,8 @@ Compute sale frequency and forward-looking predictions from special_history.
 from datetime import date, timedelta
 from typing import List, Optional, Tuple
 
+from scraper.metrics import metrics
+
 
 def compute_intel(
     history: List[dict],
@@ -104,3 +106,188 @@ def _parse_date(s) -> Optional[date]:
         return date.fromisoformat(str(s)[:10])
     except (ValueError, TypeError):
         return None
+
+
+# ---------------------------------------------------------------------------
+# Batch computation
+# ---------------------------------------------------------------------------
+
+_EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+
+def compute_intel_batch(
+    product_idx,
+    first_seen,
+    last_seen,
+    discount,
+    is_on_special_now,
+    current_discount=None,
+    today: Optional[date] = None,
+) -> List[dict]:
+    """
+    Columnar equivalent of calling compute_intel once per product.
+
+    History arrays have one entry per special_history row:
+      product_idx: product code 0..n-1 the row belongs to
+      first_seen / last_seen: day ordinals (date.toordinal()), 0 when missing
+      discount: discount_pct as float, NaN when missing
+    Product arrays have one entry per product (length n):
+      is_on_special_now: bool
+      current_discount: float, NaN when missing
+
+    Returns n intel dicts identical to compute_intel's output, in product order.
+    """
+    import numpy as np
+
+    today = today or date.today()
+    t = today.toordinal()
+    today_str = str(today)
+
+    on = np.asarray(is_on_special_now, dtype=bool)
+    n = len(on)
+    cur = (
+        np.full(n, np.nan) if current_discount is None
+        else np.asarray(current_discount, dtype=float)
+    )
+
+    pidx = np.asarray(product_idx, dtype=np.int64)
+    fs = np.asarray(first_seen, dtype=np.int64)
+    ls = np.asarray(last_seen, dtype=np.int64)
+    disc = np.asarray(discount, dtype=float)
+
+    # Stable sort by (product, first_seen), matching sorted(history, key=first_seen)
+    order = np.lexsort((np.arange(len(pidx)), fs, pidx))
+    pidx, fs, ls, disc = pidx[order], fs[order], ls[order], disc[order]
+
+    counts = np.bincount(pidx, minlength=n)
+    has_hist = counts > 0
+    total_times = counts + on
+
+    # Last row (by first_seen) of each product
+    ends = np.clip(np.cumsum(counts) - 1, 0, None)
+    if len(pidx):
+        last_ls = np.where(has_hist, ls[ends], 0)
+        last_disc = np.where(has_hist, disc[ends], np.nan)
+    else:
+        last_ls = np.zeros(n, dtype=np.int64)
+        last_disc = np.full(n, np.nan)
+
+    # Gaps between consecutive appearances of the same product
+    same = pidx[1:] == pidx[:-1]
+    gap = fs[1:] - ls[:-1]
+    valid = same & (fs[1:] > 0) & (ls[:-1] > 0) & (gap > 1)
+    gap_sum = np.bincount(pidx[1:][valid], weights=gap[valid], minlength=n)
+    gap_cnt = np.bincount(pidx[1:][valid], minlength=n)
+    has_avg = gap_cnt > 0
+    avg = np.where(has_avg, np.rint(gap_sum / np.maximum(gap_cnt, 1)), 0).astype(np.int64)
+
+    has_last = last_ls > 0
+    days_since = np.where(on, 0, t - last_ls)
+    has_days = on | has_last
+
+    has_expected = ~on & has_avg & (avg != 0) & has_days
+    expected = np.maximum(0, avg - days_since)
+
+    freq_class = np.select(
+        [total_times == 0, ~has_avg, avg <= 21, avg <= 56],
+        ["never", "", "frequent", "sometimes"],
+        default="rare",
+    )
+
+    cur_set = ~np.isnan(cur) & (cur != 0)
+    out_disc = np.where(cur_set | ~has_hist, cur, last_disc)
+
+    # Resolve per-product values to plain Python objects in bulk; indexing numpy
+    # arrays element by element would dominate the runtime otherwise.
+    avg_l = np.where(has_avg, avg, -1).tolist()
+    days_l = days_since.tolist()
+    has_days_l = has_days.tolist()
+    expected_l = np.where(on, 0, np.where(has_expected, expected, -1)).tolist()
+    disc_l = [None if d != d else int(d) for d in out_disc.tolist()]
+    class_l = freq_class.tolist()
+    last_l = last_ls.tolist()
+    total_l = total_times.tolist()
+    hist_l = has_hist.tolist()
+
+    results = []
+    for i, is_on in enumerate(on.tolist()):
+        if not hist_l[i]:
+            results.append({
+                "avg_frequency_days": None,
+                "frequency_class": None,
+                "days_since_last_special": None,
+                "expected_days_until_next": None,
+                "is_on_special_now": is_on,
+                "last_special_date": today_str if is_on else None,
+                "last_discount_pct": disc_l[i],
+                "total_times_on_special": 1 if is_on else 0,
+            })
+            continue
+
+        if is_on:
+            last_special = today_str
+        elif last_l[i]:
+            last_special = str(date.fromordinal(last_l[i]))
+        else:
+            last_special = None
+
+        results.append({
+            "avg_frequency_days": avg_l[i] if avg_l[i] >= 0 else None,
+            "frequency_class": class_l[i] or None,
+            "days_since_last_special": days_l[i] if has_days_l[i] else None,
+            "expected_days_until_next": expected_l[i] if expected_l[i] >= 0 else None,
+            "is_on_special_now": is_on,
+            "last_special_date": last_special,
+            "last_discount_pct": disc_l[i],
+            "total_times_on_special": total_l[i],
+        })
+
+    return results
+
+
+def compute_intel_groups(
+    histories: List[List[dict]],
+    is_on_special_now: List[bool],
+    current_discount: List[Optional[int]],
+    today: Optional[date] = None,
+) -> List[dict]:
+    """Batch form of compute_intel over per-product special_history row lists."""
+    with metrics.span("intel.compute"):
+        metrics.count("products", len(histories))
+        return _compute_intel_groups(histories, is_on_special_now, current_discount, today)
+
+
+def _compute_intel_groups(histories, is_on_special_now, current_discount, today):
+    import numpy as np
+
+    product_idx = np.repeat(np.arange(len(histories)), [len(h) for h in histories])
+    rows = [h for hist in histories for h in hist]
+
+    discount = np.array(
+        [h.get("discount_pct") for h in rows], dtype=float
+    ) if rows else np.zeros(0)
+
+    return compute_intel_batch(
+        product_idx,
+        _to_ordinals([h.get("first_seen") for h in rows]),
+        _to_ordinals([h.get("last_seen") for h in rows]),
+        discount,
+        is_on_special_now,
+        [np.nan if d is None else d for d in current_discount],
+        today=today,
+    )
+
+
+def _to_ordinals(values: list):
+    """Day ordinals for ISO date strings/dates, 0 where missing or unparsable."""
+    import numpy as np
+
+    try:
+        days = np.array(values, dtype="datetime64[D]")
+    except ValueError:
+        parsed = [_parse_date(v) for v in values]
+        return np.array([d.toordinal() if d else 0 for d in parsed], dtype=np.int64)
+
+    ordinals = days.astype(np.int64) + _EPOCH_ORDINAL
+    ordinals[np.isnat(days)] = 0
+    return ordinals
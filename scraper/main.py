@@ -4,25 +4,42 @@ Scrapes Woolworths & Coles specials and/or full product catalogue,
 archives history, and recomputes intelligence.
 
 Usage:
-    python -m scraper.main specials                # Both stores specials
+    python -m scraper.main specials                # Both stores specials, concurrently
+    python -m scraper.main specials --sequential   # Both stores, one after the other
     python -m scraper.main specials coles          # Coles specials only
     python -m scraper.main specials woolworths     # Woolworths specials only
     python -m scraper.main catalogue               # Both stores catalogue
     python -m scraper.main catalogue coles         # Coles catalogue only
     python -m scraper.main catalogue woolworths    # Woolworths catalogue only
+    python -m scraper.main catalogue --resume      # Continue an interrupted catalogue crawl
     python -m scraper.main intel                   # Recompute intelligence only
+    python -m scraper.main intel --incremental     # Recompute only keys changed since last run
+    python -m scraper.main match                   # Re-match changed catalogue products across stores
+    python -m scraper.main match --full            # Re-match every catalogue product
+    python -m scraper.main export                  # Write the static JSON snapshot for the web app
     python -m scraper.main demo                    # Seed demo data
+
+Set BRAVO_HTTP_MODE=record to archive every fetched page, or BRAVO_HTTP_MODE=replay
+to rerun specials/catalogue offline from that archive (see scraper/replay.py).
 """
 
+import hashlib
+import json
 import os
 import sys
-from datetime import date
-from typing import List
+import time
+from datetime import date, timedelta
+from typing import Iterator, List, Optional, Tuple
 
 from dotenv import load_dotenv
 from supabase import create_client
 
+from scraper import httpcache, replay
 from scraper.logger import get_logger, gha_error
+from scraper.metrics import metrics, describe as describe_metrics, write_summary
+from scraper.products import Product, ProductBatch
+from scraper.scheduler import scheduler
+from scraper.writer import BulkWriter
 
 load_dotenv(os.path.join(os.path.dirname(__file__), ".env"))
 
@@ -32,17 +49,46 @@ SUPABASE_URL = os.environ["SUPABASE_URL"]
 SUPABASE_KEY = os.environ["SUPABASE_SERVICE_KEY"]
 
 db = create_client(SUPABASE_URL, SUPABASE_KEY)
+writer = BulkWriter(SUPABASE_URL, SUPABASE_KEY)
 
 BATCH = 200
+PAGE_SIZE = 1000
+ID_CHUNK = 100
+INTEL_FULL_EVERY_DAYS = 7  # incremental intel rescans a whole store at least this often
+HISTORY_BATCH = 1000
+TOUCH_BATCH = 5000  # unchanged product ids per touch_products call
+HISTORY_COLUMNS = "id,store,product_id,name,discount_pct,first_seen,last_seen"
+SPECIAL_FIELDS = (
+    "store", "product_id", "name", "brand", "category", "current_price",
+    "original_price", "discount_pct", "image_url", "product_url", "special_type",
+)
+HISTORY_FIELDS = ("store", "product_id", "name", "current_price", "original_price", "discount_pct")
+PRODUCT_FIELDS = ("store", "product_id", "name", "brand", "category", "current_price", "image_url", "product_url")
+# search_key is fingerprinted too, so a change to the normalizer rewrites each key once
+PRODUCT_HASH_FIELDS = ("name", "brand", "category", "regular_price", "image_url", "product_url", "search_key")
+INTEL_FIELDS = (
+    "name", "category", "image_url",
+    "avg_frequency_days", "frequency_class", "days_since_last_special",
+    "expected_days_until_next", "is_on_special_now", "last_special_date",
+    "last_discount_pct", "total_times_on_special", "search_key",
+)
 
 
 def _check_products_table() -> bool:
     """Verify the products table exists. Returns False with clear error if missing."""
     try:
-        db.table("products").select("id").limit(1).execute()
+        db.table("products").select("id,content_hash").limit(1).execute()
         return True
     except Exception as e:
-        if "PGRST205" in str(e) or "does not exist" in str(e):
+        if "content_hash" in str(e):
+            msg = (
+                "products.content_hash is missing. "
+                "Run the migration in supabase/migrations/007_product_content_hash.sql "
+                "via the Supabase SQL Editor."
+            )
+            log.error(msg)
+            gha_error(msg)
+        elif "PGRST205" in str(e) or "does not exist" in str(e):
             msg = (
                 "Products table does not exist. "
                 "Run the migration in supabase/migrations/003_products_catalogue.sql "
@@ -55,225 +101,578 @@ def _check_products_table() -> bool:
         return False
 
 
+def _rpc(fn: str, params: dict, migration: str):
+    """Call a database function, pointing at its migration if it is missing."""
+    metrics.count("db_rpc")
+    try:
+        return db.rpc(fn, params).execute().data
+    except Exception as e:
+        if "PGRST202" in str(e) or "Could not find the function" in str(e):
+            msg = (
+                f"Database function {fn} does not exist. "
+                f"Run the migration in supabase/migrations/{migration} "
+                "via the Supabase SQL Editor."
+            )
+            log.error(msg)
+            gha_error(msg)
+        raise
+
+
 # ---------------------------------------------------------------------------
 # Specials pipeline
 # ---------------------------------------------------------------------------
 
-def _upsert_specials(products: List[dict]):
+def _upsert_specials(products: ProductBatch) -> int:
     """Upsert scraped products into the specials table."""
     if not products:
-        return
-
-    today = str(date.today())
-    rows = []
-    for p in products:
-        rows.append({
-            "store": p["store"],
-            "product_id": p["product_id"],
-            "name": p["name"],
-            "brand": p.get("brand"),
-            "category": p.get("category"),
-            "current_price": p["current_price"],
-            "original_price": p.get("original_price"),
-            "discount_pct": p.get("discount_pct"),
-            "image_url": p.get("image_url"),
-            "product_url": p.get("product_url"),
-            "special_type": p.get("special_type"),
-            "valid_from": today,
-            "valid_to": None,
-        })
-
-    for i in range(0, len(rows), BATCH):
-        db.table("specials").upsert(rows[i:i + BATCH], on_conflict="store,product_id").execute()
-
-    log.info(f"Upserted {len(rows)} specials")
+        return 0
+
+    rows = products.rows(SPECIAL_FIELDS, valid_from=str(date.today()), valid_to=None)
+    for row, key in zip(rows, products.search_keys()):
+        row["search_key"] = key
+    writer.upsert("specials", rows, on_conflict="store,product_id")
+    _record_prices(rows, "current_price")
+
+    log.debug(f"Upserted {len(rows)} specials")
+    return len(rows)
+
+
+def _stream_specials(store: str, pages: Iterator[Tuple[str, int, ProductBatch]]) -> ProductBatch:
+    """Persist each scraped page of specials, then archive expired ones.
+
+    Each page's upsert and history recording is handed to the scheduler, which
+    runs it inside the politeness wait before the next request to the store.
+    """
+    products = ProductBatch()
+    history = {"updated": 0, "inserted": 0}
+
+    def persist(batch: ProductBatch):
+        with metrics.span(f"{store}.persist"):
+            _upsert_specials(batch)
+            updated, inserted = _record_current_to_history(batch)
+        history["updated"] += updated
+        history["inserted"] += inserted
+
+    for _, _, batch in pages:
+        scheduler.defer(persist, batch)
+        products.extend(batch)
+    scheduler.drain()
+
+    log.info(f"Upserted {len(products)} {store} specials")
+    if history["updated"]:
+        log.info(f"Updated last_seen on {history['updated']} {store} history rows")
+    if history["inserted"]:
+        log.info(f"Inserted {history['inserted']} new {store} history rows")
+    if products:
+        _archive_expired(store, set(products.product_id))
+    return products
 
 
 def _archive_expired(store: str, current_ids: set):
-    """Move specials no longer on sale into special_history and delete from specials."""
-    existing = (
-        db.table("specials")
-        .select("store,product_id,name,current_price,original_price,discount_pct,valid_from")
-        .eq("store", store)
-        .execute().data or []
+    """Move specials no longer on sale into special_history and delete from specials.
+
+    Runs server-side as one set-based insert + delete (archive_expired_specials),
+    so the cost no longer scales with the number of expired specials.
+    """
+    started = time.monotonic()
+    result = _rpc(
+        "archive_expired_specials",
+        {"p_store": store, "p_current_ids": sorted(current_ids), "p_today": str(date.today())},
+        migration="005_archive_expired.sql",
     )
+    elapsed_ms = (time.monotonic() - started) * 1000
 
-    expired = [s for s in existing if s["product_id"] not in current_ids]
-    if not expired:
+    stats = result[0] if result else {}
+    archived = stats.get("archived") or 0
+    if not archived:
         log.info(f"No expired specials for {store}")
         return
 
+    log.info(
+        f"Archived {archived} expired {store} specials to history "
+        f"(archive {stats.get('archive_ms')}ms, delete {stats.get('delete_ms')}ms, "
+        f"round-trip {elapsed_ms:.0f}ms)"
+    )
+
+
+def _record_current_to_history(products: ProductBatch) -> Tuple[int, int]:
+    """Record currently active specials in history. Returns (updated, inserted).
+
+    Each batch goes to record_special_history as one JSON array; the database
+    extends last_seen or opens a new interval per product in a single statement.
+    """
     today = str(date.today())
-    history_rows = []
-    expired_keys = []
-    for s in expired:
-        history_rows.append({
-            "store": s["store"],
-            "product_id": s["product_id"],
-            "name": s["name"],
-            "current_price": s.get("current_price"),
-            "original_price": s.get("original_price"),
-            "discount_pct": s.get("discount_pct"),
-            "first_seen": s.get("valid_from") or today,
-            "last_seen": today,
-        })
-        expired_keys.append(s["product_id"])
+    updated = 0
+    inserted = 0
 
-    if history_rows:
-        for i in range(0, len(history_rows), BATCH):
-            db.table("special_history").insert(history_rows[i:i + BATCH]).execute()
+    rows = products.rows(HISTORY_FIELDS)
+    for i in range(0, len(rows), HISTORY_BATCH):
+        batch = rows[i:i + HISTORY_BATCH]
+        result = _rpc(
+            "record_special_history",
+            {"p_rows": batch, "p_today": today},
+            migration="006_record_history.sql",
+        )
+        if result:
+            updated += result[0].get("updated") or 0
+            inserted += result[0].get("inserted") or 0
 
-    for pid in expired_keys:
-        db.table("specials").delete().eq("store", store).eq("product_id", pid).execute()
+    return updated, inserted
 
-    log.info(f"Archived {len(expired)} expired {store} specials to history")
 
+def _record_prices(rows: List[dict], price_field: str):
+    """Feed observed prices into the run-length price_observations store.
 
-def _record_current_to_history(products: List[dict]):
-    """Record currently active specials in history (batch approach)."""
+    Unchanged catalogue products are recorded server-side by touch_products.
+    """
     today = str(date.today())
+    for i in range(0, len(rows), HISTORY_BATCH):
+        batch = [{
+            "store": r["store"],
+            "product_id": r["product_id"],
+            "price": r.get(price_field),
+        } for r in rows[i:i + HISTORY_BATCH]]
+        result = _rpc(
+            "record_price_observations",
+            {"p_rows": batch, "p_today": today},
+            migration="008_price_observations.sql",
+        )
+        if result:
+            log.debug(
+                f"Price observations: {result[0].get('extended') or 0} extended, "
+                f"{result[0].get('opened') or 0} opened"
+            )
+
 
-    all_history = (
-        db.table("special_history")
-        .select("id,store,product_id,first_seen,last_seen")
-        .order("last_seen", desc=True)
-        .execute().data or []
+def _history_cursor_filter(last: dict) -> str:
+    """PostgREST `or` filter selecting history rows strictly after `last` in key order."""
+    s, p, f, i = (f'"{last[k]}"' for k in ("store", "product_id", "first_seen", "id"))
+    return (
+        f"store.gt.{s},"
+        f"and(store.eq.{s},product_id.gt.{p}),"
+        f"and(store.eq.{s},product_id.eq.{p},first_seen.gt.{f}),"
+        f"and(store.eq.{s},product_id.eq.{p},first_seen.eq.{f},id.gt.{i})"
     )
 
-    latest_by_key = {}
-    for h in all_history:
-        key = (h["store"], h["product_id"])
-        if key not in latest_by_key:
-            latest_by_key[key] = h
 
-    to_update = []
-    to_insert = []
+def _scan_history_groups(
+    store: Optional[str] = None, product_ids: Optional[List[str]] = None,
+) -> Iterator[Tuple[Tuple[str, str], List[dict]]]:
+    """Keyset-paged scan of special_history, yielding one (store, product_id) group at a time.
+
+    The key order matches idx_history_scan (migration 012).
+    """
+    cursor = None
+    key, group = None, []
+
+    while True:
+        query = db.table("special_history").select(HISTORY_COLUMNS)
+        if store:
+            query = query.eq("store", store)
+        if product_ids:
+            query = query.in_("product_id", product_ids)
+        if cursor:
+            query = query.or_(_history_cursor_filter(cursor))
+        rows = (
+            query.order("store").order("product_id").order("first_seen").order("id")
+            .limit(PAGE_SIZE)
+            .execute().data or []
+        )
+        if not rows:
+            break
+
+        for h in rows:
+            k = (h["store"], h["product_id"])
+            if k != key:
+                if group:
+                    yield key, group
+                key, group = k, []
+            group.append(h)
+
+        cursor = rows[-1]
+
+    if group:
+        yield key, group
+
+
+def _iter_history_groups(
+    store: Optional[str] = None, product_ids: Optional[set] = None,
+) -> Iterator[Tuple[Tuple[str, str], List[dict]]]:
+    """Stream special_history one (store, product_id) group at a time.
+
+    Pages through the table in (store, product_id, first_seen, id) order with a
+    keyset cursor, so the (store, product_id) prefix of idx_history_product drives
+    the scan and memory holds one page plus the group being assembled. Paging stops
+    on an empty page rather than a short one, so a server-side row cap lower than
+    PAGE_SIZE cannot silently truncate history.
+
+    With `product_ids`, only those products of `store` are read, in chunks of ID_CHUNK.
+    """
+    if product_ids is None:
+        yield from _scan_history_groups(store)
+        return
 
-    for p in products:
-        key = (p["store"], p["product_id"])
-        existing = latest_by_key.get(key)
-        if existing:
-            to_update.append(existing["id"])
+    ids = sorted(product_ids)
+    for i in range(0, len(ids), ID_CHUNK):
+        yield from _scan_history_groups(store, ids[i:i + ID_CHUNK])
+
+
+def _select_pages(build) -> Iterator[dict]:
+    """Yield every row of the query returned by `build()`, paged by a keyset cursor on id."""
+    last_id = None
+    while True:
+        query = build()
+        if last_id:
+            query = query.gt("id", last_id)
+        rows = query.order("id").limit(PAGE_SIZE).execute().data or []
+        if not rows:
+            return
+        yield from rows
+        last_id = rows[-1]["id"]
+
+
+def _get_state(key: str):
+    """Read a value from the scraper_state key/value table."""
+    rows = db.table("scraper_state").select("value").eq("key", key).execute().data or []
+    return rows[0]["value"] if rows else None
+
+
+def _set_state(key: str, value):
+    """Write a value to the scraper_state key/value table."""
+    writer.upsert("scraper_state", [{"key": key, "value": value}], on_conflict="key")
+
+
+def _intel_rows(entries: List[Tuple[Tuple[str, str], List[dict], Optional[Product]]]) -> List[dict]:
+    """Compute special_intel rows for (key, history, live special or None) entries in one batch."""
+    from scraper.intelligence import compute_intel_groups
+    from scraper.search import search_key
+
+    rows = compute_intel_groups(
+        [hist for _, hist, _ in entries],
+        [product is not None for _, _, product in entries],
+        [product.discount_pct if product else None for _, _, product in entries],
+    )
+
+    for intel, (key, hist, product) in zip(rows, entries):
+        if product is not None:
+            intel["name"] = product.name
+            intel["category"] = product.category
+            intel["image_url"] = product.image_url
+            intel["search_key"] = search_key(product.name, product.brand, product.size)
         else:
-            to_insert.append({
-                "store": p["store"],
-                "product_id": p["product_id"],
-                "name": p["name"],
-                "current_price": p.get("current_price"),
-                "original_price": p.get("original_price"),
-                "discount_pct": p.get("discount_pct"),
-                "first_seen": today,
-                "last_seen": today,
-            })
-
-    if to_update:
-        for i in range(0, len(to_update), 50):
-            batch_ids = to_update[i:i + 50]
-            db.table("special_history").update({"last_seen": today}).in_("id", batch_ids).execute()
-        log.info(f"Updated last_seen on {len(to_update)} history rows")
-
-    if to_insert:
-        for i in range(0, len(to_insert), BATCH):
-            db.table("special_history").insert(to_insert[i:i + BATCH]).execute()
-        log.info(f"Inserted {len(to_insert)} new history rows")
-
-
-def _recompute_intel(products: List[dict]):
-    """Recompute special_intel for all products we just scraped."""
-    from scraper.intelligence import compute_intel
-
-    current_keys = {(p["store"], p["product_id"]) for p in products}
-    product_map = {(p["store"], p["product_id"]): p for p in products}
-
-    all_history = db.table("special_history").select("*").execute().data or []
-
-    history_by_key = {}
-    for h in all_history:
-        key = (h["store"], h["product_id"])
-        history_by_key.setdefault(key, []).append(h)
-
-    intel_rows = []
-    processed_keys = set()
-
-    for key in current_keys:
-        hist = history_by_key.get(key, [])
-        p = product_map[key]
-        intel = compute_intel(hist, is_on_special_now=True, current_discount=p.get("discount_pct"))
+            last_entry = max(hist, key=lambda h: h.get("last_seen", ""))
+            intel["name"] = last_entry.get("name", "")
+            intel["category"] = None
+            intel["image_url"] = None
+            intel["search_key"] = search_key(intel["name"])
         intel["store"] = key[0]
         intel["product_id"] = key[1]
-        intel["name"] = p["name"]
-        intel["category"] = p.get("category")
-        intel["image_url"] = p.get("image_url")
-        intel_rows.append(intel)
-        processed_keys.add(key)
 
-    for key, hist in history_by_key.items():
-        if key in processed_keys:
-            continue
-        last_entry = max(hist, key=lambda h: h.get("last_seen", ""))
-        intel = compute_intel(hist, is_on_special_now=False)
-        intel["store"] = key[0]
-        intel["product_id"] = key[1]
-        intel["name"] = last_entry.get("name", "")
-        intel["category"] = None
-        intel["image_url"] = None
-        intel_rows.append(intel)
+    return rows
+
+
+def _changed_intel_rows(store: str, rows: List[dict]) -> List[dict]:
+    """Drop rows whose computed values match what special_intel already holds."""
+    stored = {}
+    for i in range(0, len(rows), BATCH):
+        existing = (
+            db.table("special_intel")
+            .select("product_id," + ",".join(INTEL_FIELDS))
+            .eq("store", store)
+            .in_("product_id", [r["product_id"] for r in rows[i:i + BATCH]])
+            .execute().data or []
+        )
+        stored.update((e["product_id"], e) for e in existing)
+
+    changed = []
+    for r in rows:
+        old = stored.get(r["product_id"])
+        if old is None or any(old.get(f) != r.get(f) for f in INTEL_FIELDS):
+            changed.append(r)
+    return changed
+
+
+def _dirty_intel_keys(store: str, current: dict, watermark: str) -> set:
+    """Product ids of `store` whose intel may differ from the stored row.
+
+    Dirty means: on special now, touched in special_history since the watermark
+    (new interval, extended last_seen or archived), or flagged on special in
+    special_intel but no longer live.
+    """
+    dirty = set(current)
+
+    for h in _select_pages(lambda: (
+        db.table("special_history").select("id,product_id")
+        .eq("store", store).gte("last_seen", watermark)
+    )):
+        dirty.add(h["product_id"])
+
+    for r in _select_pages(lambda: (
+        db.table("special_intel").select("id,product_id")
+        .eq("store", store).eq("is_on_special_now", True)
+    )):
+        dirty.add(r["product_id"])
+
+    return dirty
+
+
+def _recompute_intel_incremental(products: ProductBatch):
+    """Recompute special_intel only for keys whose history changed since the last run.
+
+    A per-store watermark in scraper_state records the last_seen date already
+    folded into intel. Only dirty keys are recomputed, and only rows whose
+    values differ from special_intel are written. Untouched keys keep their
+    stored days-since figures, so a store is rescanned in full when it has no
+    watermark or its last full pass is INTEL_FULL_EVERY_DAYS old.
+    """
+    today = str(date.today())
+    full_before = str(date.today() - timedelta(days=INTEL_FULL_EVERY_DAYS))
+    by_store: dict = {}
+    for p in products:
+        by_store.setdefault(p.store, {})[p.product_id] = p
+
+    for store, current in by_store.items():
+        state_key = f"intel_watermark:{store}"
+        full_key = f"intel_full:{store}"
+        watermark = _get_state(state_key)
+        last_full = _get_state(full_key)
+
+        if watermark is None:
+            log.info(f"No intel watermark for {store}, recomputing all {store} keys")
+            dirty = None
+        elif last_full is None or last_full <= full_before:
+            log.info(f"Last full {store} intel pass {last_full or 'never'}, recomputing all {store} keys")
+            dirty = None
+        else:
+            dirty = _dirty_intel_keys(store, current, watermark)
+
+        pending = set(current)
+        entries = []
+        computed = 0
+        written = 0
+
+        def flush():
+            nonlocal entries, computed, written
+            if entries:
+                changed = _changed_intel_rows(store, _intel_rows(entries))
+                if changed:
+                    writer.upsert("special_intel", changed, on_conflict="store,product_id")
+                computed += len(entries)
+                written += len(changed)
+                entries = []
+
+        for key, hist in _iter_history_groups(store, dirty):
+            pending.discard(key[1])
+            entries.append((key, hist, current.get(key[1])))
+            if len(entries) >= PAGE_SIZE:
+                flush()
+
+        for pid in pending:
+            entries.append(((store, pid), [], current[pid]))
+            if len(entries) >= PAGE_SIZE:
+                flush()
+
+        flush()
+        _set_state(state_key, today)
+        if dirty is None:
+            _set_state(full_key, today)
+
+        log.info(
+            f"Intel updated ({store}, {'full' if dirty is None else f'incremental since {watermark}'}): "
+            f"{computed} keys recomputed, {written} rows changed"
+        )
+
+
+def _recompute_intel(products: ProductBatch, incremental: bool = False):
+    """Recompute special_intel for all products we just scraped.
+
+    History is streamed group by group and computed in batches of PAGE_SIZE
+    products, so memory stays bounded regardless of how large special_history grows.
+    """
+    if incremental:
+        _recompute_intel_incremental(products)
+        return
+
+    product_map = {(p.store, p.product_id): p for p in products}
+    pending = set(product_map)
+
+    entries = []
+    total = 0
+
+    def flush():
+        nonlocal entries, total
+        if entries:
+            writer.upsert("special_intel", _intel_rows(entries), on_conflict="store,product_id")
+            total += len(entries)
+            entries = []
+
+    for key, hist in _iter_history_groups():
+        pending.discard(key)
+        entries.append((key, hist, product_map.get(key)))
+        if len(entries) >= PAGE_SIZE:
+            flush()
 
-    if intel_rows:
-        for i in range(0, len(intel_rows), BATCH):
-            db.table("special_intel").upsert(
-                intel_rows[i:i + BATCH], on_conflict="store,product_id"
-            ).execute()
+    # Live specials with no history yet (e.g. history recording was skipped)
+    for key in pending:
+        entries.append((key, [], product_map[key]))
+        if len(entries) >= PAGE_SIZE:
+            flush()
 
+    flush()
+
+    log.info(
+        f"Intel updated: {total} products "
+        f"({len(product_map)} on special, {total - len(product_map)} historical)"
+    )
+
+
+# ---------------------------------------------------------------------------
+# Read models
+# ---------------------------------------------------------------------------
+
+def _publish_read_models():
+    """Rebuild the app's read models (specials_feed, category_counts) from the
+    specials and intel just written, so each screen is a single indexed query."""
+    with metrics.span("publish"):
+        result = _rpc("publish_read_models", {}, migration="009_read_models.sql")
+    stats = result[0] if result else {}
     log.info(
-        f"Intel updated: {len(intel_rows)} products "
-        f"({len(current_keys)} on special, {len(intel_rows) - len(current_keys)} historical)"
+        f"Published read models: {stats.get('feed_rows')} feed rows, "
+        f"{stats.get('categories')} categories ({stats.get('refresh_ms')}ms)"
     )
 
 
+def _export_snapshot(strict: bool = False):
+    """Write the static snapshot the web app loads from the CDN (see scraper/export.py).
+
+    Runs last in every pipeline. Unless `strict`, a failed export is logged, not
+    raised: the app falls back to querying Supabase when the snapshot is missing.
+    """
+    from scraper import export
+
+    try:
+        with metrics.span("export"):
+            manifest = export.export_snapshot(db)
+    except Exception as e:
+        if strict:
+            raise
+        log.warning(f"Could not export snapshot: {e}")
+        return
+    log.info(f"Exported snapshot to {export.EXPORT_DIR} ({manifest['generated_at']}): {export.describe()}")
+
+
 # ---------------------------------------------------------------------------
 # Catalogue pipeline
 # ---------------------------------------------------------------------------
 
-def _upsert_products(products: List[dict]):
-    """Upsert catalogue products into the products table."""
+def _content_hash(row: dict) -> str:
+    """Fingerprint of the scraped fields of a products row (everything but dates)."""
+    fields = [row[k] for k in PRODUCT_HASH_FIELDS]
+    return hashlib.blake2b(json.dumps(fields).encode(), digest_size=8).hexdigest()
+
+
+def _stored_hashes(store: str) -> dict:
+    """product_id -> content_hash for every catalogue product of `store`."""
+    return {
+        r["product_id"]: r["content_hash"]
+        for r in _select_pages(
+            lambda: db.table("products").select("id,product_id,content_hash").eq("store", store)
+        )
+    }
+
+
+def _touch_products(store: str, product_ids: List[str]) -> int:
+    """Bump last_seen for unchanged products in one set-based call."""
+    if not product_ids:
+        return 0
+    return _rpc(
+        "touch_products",
+        {"p_store": store, "p_product_ids": product_ids, "p_today": str(date.today())},
+        "007_product_content_hash.sql",
+    ) or 0
+
+
+def _upsert_products(products: ProductBatch, hashes: Optional[dict] = None) -> Tuple[int, List[str]]:
+    """Upsert new or changed catalogue products into the products table.
+
+    With `hashes` (product_id -> stored content_hash), products whose fingerprint
+    is unchanged are not rewritten; their ids are returned for a last_seen bump.
+    Returns (rows upserted, unchanged product ids).
+    """
     if not products:
-        return
+        return 0, []
 
-    today = str(date.today())
     rows = []
-    for p in products:
-        rows.append({
-            "store": p["store"],
-            "product_id": p["product_id"],
-            "name": p["name"],
-            "brand": p.get("brand"),
-            "category": p.get("category"),
-            "regular_price": p["current_price"],
-            "image_url": p.get("image_url"),
-            "product_url": p.get("product_url"),
-            "last_seen": today,
-        })
-
-    for i in range(0, len(rows), BATCH):
-        db.table("products").upsert(rows[i:i + BATCH], on_conflict="store,product_id").execute()
+    unchanged = []
+    payload = products.rows(PRODUCT_FIELDS, rename={"current_price": "regular_price"}, last_seen=str(date.today()))
+    for row, key in zip(payload, products.search_keys()):
+        row["search_key"] = key
+        row["content_hash"] = _content_hash(row)
+        if hashes is not None and hashes.get(row["product_id"]) == row["content_hash"]:
+            unchanged.append(row["product_id"])
+            continue
+        if hashes is not None:
+            hashes[row["product_id"]] = row["content_hash"]
+        rows.append(row)
+
+    if rows:
+        writer.upsert("products", rows, on_conflict="store,product_id")
+        _record_prices(rows, "regular_price")
+
+    log.debug(f"Upserted {len(rows)} catalogue products, {len(unchanged)} unchanged")
+    return len(rows), unchanged
+
+
+def _stream_catalogue(store: str, pages: Iterator[Tuple[str, int, ProductBatch]]) -> int:
+    """Upsert each scraped catalogue page as it arrives; only counts and fingerprints are kept in memory.
+
+    Only new or changed products are rewritten; unchanged ones get their
+    last_seen bumped in batches of TOUCH_BATCH ids.
+    """
+    hashes = _stored_hashes(store)
+    log.info(f"Loaded {len(hashes)} stored {store} product fingerprints")
+
+    changed = 0
+    unchanged = 0
+    touched = 0
+    pending: List[str] = []
+    for _, _, batch in pages:
+        with metrics.span(f"{store}.persist"):
+            written, same = _upsert_products(batch, hashes)
+        changed += written
+        unchanged += len(same)
+        pending.extend(same)
+        if len(pending) >= TOUCH_BATCH:
+            touched += _touch_products(store, pending)
+            pending = []
+    touched += _touch_products(store, pending)
 
-    log.info(f"Upserted {len(rows)} catalogue products")
+    log.info(
+        f"{store} catalogue: {changed + unchanged} products, {changed} new or changed (upserted), "
+        f"{unchanged} unchanged ({touched} last_seen bumped)"
+    )
+    return changed + unchanged
 
 
 def _compute_never_on_special_intel():
     """Find catalogue products that have NEVER been on special and add to intel."""
-    from scraper.intelligence import compute_intel
+    with metrics.span("intel.never_on_special"):
+        _add_never_on_special_intel()
 
-    log.info("Computing 'never on special' intel ...")
 
-    all_products = db.table("products").select("store,product_id,name,category,image_url").execute().data or []
-    existing_intel = db.table("special_intel").select("store,product_id").execute().data or []
+def _add_never_on_special_intel():
+    from scraper.intelligence import compute_intel_batch
+    from scraper.search import search_key
+
+    log.info("Computing 'never on special' intel ...")
 
-    intel_keys = {(r["store"], r["product_id"]) for r in existing_intel}
+    intel_keys = {
+        (r["store"], r["product_id"])
+        for r in _select_pages(lambda: db.table("special_intel").select("id,store,product_id"))
+    }
 
     never_products = [
-        p for p in all_products
+        p for p in _select_pages(lambda: db.table("products").select("id,store,product_id,name,category,image_url,search_key"))
         if (p["store"], p["product_id"]) not in intel_keys
     ]
 
@@ -281,136 +680,281 @@ def _compute_never_on_special_intel():
         log.info("No new 'never on special' products to add")
         return
 
-    intel_rows = []
-    for p in never_products:
-        intel = compute_intel([], is_on_special_now=False)
+    intel_rows = compute_intel_batch([], [], [], [], [False] * len(never_products))
+    for intel, p in zip(intel_rows, never_products):
         intel["store"] = p["store"]
         intel["product_id"] = p["product_id"]
         intel["name"] = p["name"]
         intel["category"] = p.get("category")
         intel["image_url"] = p.get("image_url")
+        intel["search_key"] = p.get("search_key") or search_key(p["name"])
         intel["frequency_class"] = "never"
-        intel_rows.append(intel)
 
-    for i in range(0, len(intel_rows), BATCH):
-        db.table("special_intel").upsert(
-            intel_rows[i:i + BATCH], on_conflict="store,product_id"
-        ).execute()
+    writer.upsert("special_intel", intel_rows, on_conflict="store,product_id")
 
     log.info(f"Added {len(intel_rows)} 'never on special' products to intel")
 
 
+# ---------------------------------------------------------------------------
+# Product matching
+# ---------------------------------------------------------------------------
+
+def _rematch_products(full: bool = False) -> int:
+    """Link catalogue products to canonical items and to their counterpart at
+    the other store (see scraper/matcher.py). Returns the number of matches written.
+
+    Only products whose name, brand or search key changed since the last pass,
+    and the products whose counterpart they could become, are scored again;
+    a change to scraper/items.py forces a full pass. Matches of products no
+    longer in the catalogue are deleted.
+    """
+    from scraper.matcher import MATCH_FIELDS, CatalogueIndex, ItemIndex, rematch
+
+    with metrics.span("match"):
+        items = ItemIndex()
+        state = _get_state("matcher") or {}
+        full = full or state.get("items_version") != items.version
+
+        catalogue = CatalogueIndex.from_rows(_select_pages(
+            lambda: db.table("products").select("id,store,product_id,name,brand,search_key")
+        ))
+        stored = {
+            (r["store"], r["product_id"]): r
+            for r in _select_pages(lambda: (
+                db.table("product_matches")
+                .select("id,store,product_id,fingerprint," + ",".join(MATCH_FIELDS))
+            ))
+        }
+        rows, orphans, scored = rematch(catalogue, items, stored, full)
+        metrics.count("products", scored)
+        if rows:
+            writer.upsert("product_matches", rows, on_conflict="store,product_id")
+        # Matches of products that left the catalogue
+        for i in range(0, len(orphans), ID_CHUNK):
+            ids = [stored[key]["id"] for key in orphans[i:i + ID_CHUNK]]
+            db.table("product_matches").delete().in_("id", ids).execute()
+        _set_state("matcher", {"items_version": items.version})
+
+    linked = sum(1 for r in rows if r["counterpart_id"])
+    log.info(
+        f"Matched {'all' if full else 'changed'} products: scored {scored} of {len(catalogue.entries)}, "
+        f"wrote {len(rows)} matches ({linked} with a counterpart), deleted {len(orphans)} orphaned"
+    )
+    return len(rows)
+
+
 # ---------------------------------------------------------------------------
 # Entrypoints
 # ---------------------------------------------------------------------------
 
-def run_specials(stores=None):
-    """Execute the full specials scrape pipeline."""
+def _run_stores(stores: List[str], work, sequential: bool = False) -> Tuple[dict, dict]:
+    """Run `work(store)` for every store, concurrently unless `sequential`.
+
+    Each store runs in its own thread with its own browser/HTTP session; a
+    failure in one store is logged and does not stop the others.
+    Returns ({store: result}, {store: exception}).
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    def guarded(store: str):
+        try:
+            return work(store), None
+        except Exception as e:
+            get_logger(f"main.{store}").error(f"{store} failed: {e}", exc_info=True)
+            gha_error(f"{store} scrape failed: {e}")
+            return None, e
+
+    if sequential or len(stores) < 2:
+        outcomes = [guarded(store) for store in stores]
+    else:
+        with ThreadPoolExecutor(max_workers=len(stores), thread_name_prefix="store") as pool:
+            outcomes = list(pool.map(guarded, stores))
+
+    results = {store: r for store, (r, e) in zip(stores, outcomes) if e is None}
+    errors = {store: e for store, (r, e) in zip(stores, outcomes) if e is not None}
+    return results, errors
+
+
+def _raise_store_errors(errors: dict):
+    if errors:
+        failed = ", ".join(f"{store} ({e})" for store, e in errors.items())
+        raise RuntimeError(f"Store pipelines failed: {failed}")
+
+
+def _specials_worker(store: str) -> ProductBatch:
+    """Scrape, upsert and archive one store's specials."""
+    get_logger(f"main.{store}").info(f"=== {store.upper()} SPECIALS ===")
+    with metrics.span(f"{store}.specials"):
+        if store == "coles":
+            from scraper.coles import iter_coles
+            return _stream_specials("coles", iter_coles(max_pages=200))
+        from scraper.woolworths import iter_woolworths
+        return _stream_specials("woolworths", iter_woolworths(max_pages_per_category=50))
+
+
+def _record_runs(command: str, stores: List[str], results: dict, errors: dict):
+    """Write the run's metrics to the job summary and one scraper_runs row per store.
+
+    Each row's raw_log holds that store's stages plus the shared ones (intel, ...).
+    Failing to record never fails the run.
+    """
+    report = metrics.report(command=command, db=writer.stats, scheduler=scheduler.stats)
+    write_summary(f"Bravo {command}", report)
+    log.info(f"Stages: {describe_metrics(report)}")
+
+    rows = []
+    for store in stores:
+        result = results.get(store)
+        error = errors.get(store)
+        stages = {
+            name: s for name, s in report["stages"].items()
+            if name.split(".")[0] == store or name.split(".")[0] not in stores
+        }
+        rows.append({
+            "store": store,
+            "status": "failed" if error else "success",
+            "items_scraped": result if isinstance(result, int) else len(result or ()),
+            "items_failed": 0,
+            "raw_log": {**report, "stages": stages, "error": str(error) if error else None},
+            "started_at": report["started_at"],
+            "finished_at": report["finished_at"],
+        })
+    try:
+        writer.insert("scraper_runs", rows)
+    except Exception as e:
+        log.warning(f"Could not record scraper_runs: {e}")
+
+
+def run_specials(stores=None, sequential: bool = False):
+    """Execute the full specials scrape pipeline.
+
+    Stores are scraped concurrently, each persisting pages and history while it
+    waits between requests; intel runs once afterwards over every store that
+    succeeded, the read models are republished and the static snapshot exported,
+    then any store failure is re-raised.
+    """
     if stores is None:
         stores = ["coles", "woolworths"]
 
-    all_products = []
-
-    if "coles" in stores:
-        log.info("=== COLES SPECIALS ===")
-        from scraper.coles import scrape_coles
-        coles_products = scrape_coles(max_pages=200)
-        if coles_products:
-            _upsert_specials(coles_products)
-            coles_ids = {p["product_id"] for p in coles_products}
-            _archive_expired("coles", coles_ids)
-            all_products.extend(coles_products)
-
-    if "woolworths" in stores:
-        log.info("=== WOOLWORTHS SPECIALS ===")
-        from scraper.woolworths import scrape_woolworths
-        woolworths_products = scrape_woolworths(max_pages_per_category=50)
-        if woolworths_products:
-            _upsert_specials(woolworths_products)
-            woolworths_ids = {p["product_id"] for p in woolworths_products}
-            _archive_expired("woolworths", woolworths_ids)
-            all_products.extend(woolworths_products)
+    results, errors = _run_stores(stores, _specials_worker, sequential)
+    all_products = ProductBatch()
+    for store in stores:
+        if store in results:
+            all_products.extend(results[store])
 
     if all_products:
-        log.info("=== RECORDING HISTORY & INTEL ===")
-        _record_current_to_history(all_products)
-        _recompute_intel(all_products)
-
+        log.info("=== RECOMPUTING INTEL ===")
+        with metrics.span("intel"):
+            _recompute_intel(all_products, incremental=True)
+        _publish_read_models()
+
+    log.info(f"DB writes: {writer.describe()}")
+    log.info(f"Scheduler: {scheduler.describe()}")
+    if replay.MODE:
+        log.info(f"HTTP archive: {replay.describe()}")
+    if httpcache.ENABLED:
+        log.info(f"HTTP cache: {httpcache.describe()}")
+    _export_snapshot()
+    _record_runs("specials", stores, results, errors)
     log.info(f"=== SPECIALS COMPLETE: {len(all_products)} total products ===")
+    _raise_store_errors(errors)
     return all_products
 
 
-def run_catalogue(stores=None):
-    """Execute the catalogue scrape pipeline."""
+def _catalogue_worker(store: str, resume: bool) -> int:
+    """Scrape and upsert one store's catalogue, checkpointing as it goes."""
+    from scraper.checkpoint import Checkpoint
+
+    get_logger(f"main.{store}").info(f"=== {store.upper()} CATALOGUE ===")
+    checkpoint = Checkpoint.open(store, resume)
+    with metrics.span(f"{store}.catalogue"):
+        if store == "coles":
+            from scraper.coles import iter_coles_catalogue, CATALOGUE_CATEGORIES
+            total = _stream_catalogue("coles", iter_coles_catalogue(checkpoint=checkpoint))
+            checkpoint.finish(c["slug"] for c in CATALOGUE_CATEGORIES)
+        else:
+            from scraper.woolworths import iter_woolworths_catalogue, CATALOGUE_CATEGORIES
+            total = _stream_catalogue("woolworths", iter_woolworths_catalogue(checkpoint=checkpoint))
+            checkpoint.finish(c["id"] for c in CATALOGUE_CATEGORIES)
+    return total
+
+
+def run_catalogue(stores=None, resume: bool = False, sequential: bool = False) -> int:
+    """Execute the catalogue scrape pipeline. Returns the number of products persisted.
+
+    Pages are upserted as they are scraped, so a crash late in the crawl keeps
+    everything fetched so far and memory does not grow with the catalogue.
+    Progress is checkpointed per page; with `resume`, a recent unfinished
+    checkpoint is picked up and completed work is skipped. Stores are crawled
+    concurrently; the never-on-special pass and cross-store matching run once
+    after both.
+    """
     if not _check_products_table():
         sys.exit(1)
 
     if stores is None:
         stores = ["coles", "woolworths"]
 
-    all_products = []
-
-    if "coles" in stores:
-        log.info("=== COLES CATALOGUE ===")
-        from scraper.coles import scrape_coles_catalogue
-        coles_products = scrape_coles_catalogue()
-        if coles_products:
-            _upsert_products(coles_products)
-            all_products.extend(coles_products)
-
-    if "woolworths" in stores:
-        log.info("=== WOOLWORTHS CATALOGUE ===")
-        from scraper.woolworths import scrape_woolworths_catalogue
-        woolworths_products = scrape_woolworths_catalogue()
-        if woolworths_products:
-            _upsert_products(woolworths_products)
-            all_products.extend(woolworths_products)
+    results, errors = _run_stores(stores, lambda store: _catalogue_worker(store, resume), sequential)
+    total = sum(results.values())
 
-    if all_products:
+    if total:
         _compute_never_on_special_intel()
-
-    log.info(f"=== CATALOGUE COMPLETE: {len(all_products)} total products ===")
-    return all_products
-
-
-def run_intel():
+        _rematch_products()
+
+    log.info(f"DB writes: {writer.describe()}")
+    if replay.MODE:
+        log.info(f"HTTP archive: {replay.describe()}")
+    if httpcache.ENABLED:
+        log.info(f"HTTP cache: {httpcache.describe()}")
+    log.info(f"Scheduler: {scheduler.describe()}")
+    _export_snapshot()
+    _record_runs("catalogue", stores, results, errors)
+    log.info(f"=== CATALOGUE COMPLETE: {total} total products ===")
+    _raise_store_errors(errors)
+    return total
+
+
+def run_intel(incremental: bool = False):
     """Recompute all intelligence (specials + never-on-special)."""
-    log.info("=== RECOMPUTING ALL INTEL ===")
-
-    all_specials = db.table("specials").select("*").execute().data or []
-    products = [{
-        "store": s["store"],
-        "product_id": s["product_id"],
-        "name": s["name"],
-        "category": s.get("category"),
-        "image_url": s.get("image_url"),
-        "current_price": s.get("current_price"),
-        "original_price": s.get("original_price"),
-        "discount_pct": s.get("discount_pct"),
-    } for s in all_specials]
+    log.info(f"=== RECOMPUTING {'CHANGED' if incremental else 'ALL'} INTEL ===")
 
-    if products:
-        _recompute_intel(products)
+    products = ProductBatch.from_rows(_select_pages(lambda: db.table("specials").select("*")))
 
-    _compute_never_on_special_intel()
+    with metrics.span("intel"):
+        if products:
+            _recompute_intel(products, incremental=incremental)
+        _compute_never_on_special_intel()
+    _publish_read_models()
+    _export_snapshot()
+    log.info(f"DB writes: {writer.describe()}")
+    stores = ["coles", "woolworths"]
+    _record_runs("intel", stores, {s: products.store.count(s) for s in stores}, {})
     log.info("=== INTEL RECOMPUTE COMPLETE ===")
 
 
 if __name__ == "__main__":
     if len(sys.argv) < 2:
-        print("Usage: python -m scraper.main [specials|catalogue|intel|demo] [coles|woolworths]")
+        print("Usage: python -m scraper.main [specials|catalogue|intel|match|export|demo] [coles|woolworths] [--flags]")
         sys.exit(1)
 
     command = sys.argv[1]
-    stores = [sys.argv[2]] if len(sys.argv) > 2 else None
+    args = [a for a in sys.argv[2:] if not a.startswith("--")]
+    flags = {a for a in sys.argv[2:] if a.startswith("--")}
+    stores = [args[0]] if args else None
 
     try:
+        sequential = "--sequential" in flags
         if command == "specials":
-            run_specials(stores)
+            run_specials(stores, sequential=sequential)
         elif command == "catalogue":
-            run_catalogue(stores)
+            run_catalogue(stores, resume="--resume" in flags, sequential=sequential)
         elif command == "intel":
-            run_intel()
+            run_intel(incremental="--incremental" in flags)
+        elif command == "match":
+            _rematch_products(full="--full" in flags)
+        elif command == "export":
+            _export_snapshot(strict=True)
         elif command == "demo":
             from scraper.seed_demo import run as seed_demo
             seed_demo()
@@ -421,3 +965,5 @@ if __name__ == "__main__":
         log.error(f"Fatal error: {e}", exc_info=True)
         gha_error(f"Scraper failed: {e}")
         sys.exit(1)
+    finally:
+        writer.close()
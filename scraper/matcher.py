@@ -0,0 +1,320 @@
+"""
+Cross-store product matching over the catalogue.
+Each product is linked to the canonical staple it is (scraper/items.py), if
+any, and to its closest counterpart at the other store. Products are indexed
+by the words and the pack size of their search key; candidates for a product
+are the other store's products that share one of its rarest words (and its
+size, when known), so each product is scored against a small block instead of
+the whole catalogue.
+
+Matching is incremental: every match row keeps a fingerprint of the fields it
+was computed from, and only products whose fingerprint changed, plus the
+products they could now displace as a counterpart, are scored again.
+"""
+
+import hashlib
+import json
+import math
+import re
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from scraper.items import ITEMS
+from scraper.search import normalize, search_key
+
+STORES = ("coles", "woolworths")
+STOP_WORDS = frozenset({"and", "the", "with", "of", "in", "for", "a", "each", "ea", "x", "pack", "bottle", "can"})
+SYNONYMS = {"lite": "light", "yogurt": "yoghurt", "choc": "chocolate", "wholegrain": "wholemeal", "tomatoes": "tomato"}
+BLOCK_TOKENS = 2  # rarest words whose postings form a product's candidate block
+MAX_CANDIDATES = 200
+COUNTERPART_MIN = 0.55
+ITEM_MIN = 0.6
+SIZE_MISMATCH = 0.5  # score factor when both sizes are known and differ
+SIZE_UNKNOWN = 0.9   # score factor when either size is unknown
+
+_SIZE_TOKEN = re.compile(r"^(\d+(?:\.\d+)?)(ml|l|g|kg|pk)$")
+_SIZE_UNITS = {"ml": ("L", 0.001), "l": ("L", 1.0), "g": ("kg", 0.001), "kg": ("kg", 1.0), "pk": ("each", 1.0)}
+
+Key = Tuple[str, str]  # (store, product_id)
+Size = Tuple[str, float]  # (measure, quantity), e.g. ("L", 2.0)
+
+
+def parse_size(token: str) -> Optional[Size]:
+    """("L", 1.25) for "1.25l", ("each", 12.0) for "12pk"; None if `token` is not a size."""
+    m = _SIZE_TOKEN.match(token)
+    if not m:
+        return None
+    measure, scale = _SIZE_UNITS[m.group(2)]
+    return measure, round(float(m.group(1)) * scale, 4)
+
+
+def split_key(key: str) -> Tuple[Tuple[str, ...], Optional[Size]]:
+    """Words and pack size of a search key; the first size wins."""
+    words = []
+    size = None
+    for token in key.split():
+        parsed = parse_size(token)
+        if parsed:
+            size = size or parsed
+        elif token not in STOP_WORDS and not token.replace(".", "").isdigit():
+            words.append(SYNONYMS.get(token, token))
+    return tuple(dict.fromkeys(words)), size
+
+
+def fingerprint(name: str, brand: Optional[str], search_key: Optional[str]) -> str:
+    """Hash of the fields a match depends on (prices and images do not count)."""
+    return hashlib.blake2b(json.dumps([name, brand, search_key]).encode(), digest_size=8).hexdigest()
+
+
+@dataclass(slots=True)
+class Entry:
+    """One catalogue product as the matcher sees it."""
+
+    store: str
+    product_id: str
+    words: Tuple[str, ...]
+    size: Optional[Size]
+    brand: str
+    fingerprint: str
+
+
+class CatalogueIndex:
+    """Inverted word and size indexes over the catalogue, per store."""
+
+    def __init__(self, entries: Iterable[Entry]):
+        self.entries: Dict[Key, Entry] = {}
+        self.words: Dict[str, Dict[str, Set[Key]]] = {s: {} for s in STORES}
+        self.sizes: Dict[str, Dict[Size, Set[Key]]] = {s: {} for s in STORES}
+        df: Dict[str, int] = {}
+        for e in entries:
+            key = (e.store, e.product_id)
+            self.entries[key] = e
+            words = self.words.setdefault(e.store, {})
+            for w in e.words:
+                words.setdefault(w, set()).add(key)
+                df[w] = df.get(w, 0) + 1
+            if e.size:
+                self.sizes.setdefault(e.store, {}).setdefault(e.size, set()).add(key)
+        n = max(len(self.entries), 1)
+        self._idf = {w: math.log(1 + n / (1 + c)) for w, c in df.items()}
+        self._unseen_idf = math.log(1 + n)
+        self._weight = {key: sum(self._idf[w] for w in e.words) for key, e in self.entries.items()}
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[dict]) -> "CatalogueIndex":
+        """Index products rows (store, product_id, name, brand, search_key)."""
+        return cls(entry(r) for r in rows)
+
+    def idf(self, word: str) -> float:
+        return self._idf.get(word, self._unseen_idf)
+
+    def query(self, words: Iterable[str]) -> Dict[str, float]:
+        """Word -> IDF weight, the form score() takes its first argument in."""
+        return {w: self.idf(w) for w in words}
+
+    def candidates(self, store: str, words: Tuple[str, ...], size: Optional[Size]) -> Set[Key]:
+        """Products of `store` sharing one of the rarest of `words`, narrowed to `size` when it has any.
+
+        When even the rarest word is common, candidates must share both of the
+        rarest words instead. Blocks are capped at MAX_CANDIDATES (lowest keys
+        first, so the cut is stable).
+        """
+        postings = self.words.get(store, {})
+        rarest = sorted((w for w in words if w in postings), key=lambda w: len(postings[w]))[:BLOCK_TOKENS]
+        if not rarest:
+            return set()
+        if len(postings[rarest[0]]) > MAX_CANDIDATES and len(rarest) > 1:
+            block = postings[rarest[0]] & postings[rarest[1]]
+        else:
+            block = set(postings[rarest[0]])
+            for w in rarest[1:]:
+                block |= postings[w]
+        if size and block:
+            same_size = self.sizes.get(store, {}).get(size)
+            if same_size:
+                block = (block & same_size) or block
+        if len(block) > MAX_CANDIDATES:
+            block = set(sorted(block)[:MAX_CANDIDATES])
+        return block
+
+    def score(self, query: Dict[str, float], size: Optional[Size], other: Entry, brand: str = "") -> float:
+        """IDF-weighted word overlap (Jaccard) in [0, 1], scaled down for a size mismatch; a shared brand helps."""
+        shared = 0.0
+        for w in other.words:
+            if w in query:
+                shared += query[w]
+        union = sum(query.values()) + self._weight[(other.store, other.product_id)] - shared
+        if not union:
+            return 0.0
+        s = shared / union
+        if size and other.size:
+            s *= 1.0 if size == other.size else SIZE_MISMATCH
+        else:
+            s *= SIZE_UNKNOWN
+        if brand and brand == other.brand:
+            s = min(1.0, s + 0.1)
+        return s
+
+    def best_counterpart(self, e: Entry) -> Tuple[Optional[Key], float]:
+        """Closest product at the other store, or (None, 0.0) if none scores COUNTERPART_MIN."""
+        best, best_score = None, 0.0
+        query = self.query(e.words)
+        for store in STORES:
+            if store == e.store:
+                continue
+            for key in self.candidates(store, e.words, e.size):
+                s = self.score(query, e.size, self.entries[key], e.brand)
+                if s > best_score or (s == best_score and best is not None and key < best):
+                    best, best_score = key, s
+        if best_score < COUNTERPART_MIN:
+            return None, 0.0
+        return best, round(best_score, 3)
+
+
+def entry(row: dict) -> Entry:
+    """Matcher view of a products row; rows without a stored key get the one the scraper would store."""
+    key = row.get("search_key") or search_key(row["name"], row.get("brand"))
+    words, size = split_key(key)
+    return Entry(
+        store=row["store"],
+        product_id=row["product_id"],
+        words=words,
+        size=size,
+        brand=normalize(row.get("brand")),
+        fingerprint=fingerprint(row["name"], row.get("brand"), row.get("search_key")),
+    )
+
+
+# ---------------------------------------------------------------------------
+# Canonical items
+# ---------------------------------------------------------------------------
+
+@dataclass(slots=True)
+class _Item:
+    name: str
+    store: str
+    words: Tuple[str, ...]
+    size: Optional[Size]
+
+
+def _item_size(item: dict) -> Optional[Size]:
+    if item["unit_measure"] == "each" and item["unit_quantity"] == 1:
+        return None  # a loaf, a head of broccoli: nothing to compare
+    return item["unit_measure"], round(float(item["unit_quantity"]), 4)
+
+
+class ItemIndex:
+    """The canonical items' per-store search terms, indexed by word."""
+
+    def __init__(self, items: List[dict] = ITEMS):
+        self.items: List[_Item] = []
+        self.words: Dict[Tuple[str, str], List[int]] = {}
+        for item in items:
+            for store in STORES:
+                words, size = split_key(normalize(item[f"{store}_search"]))
+                idx = len(self.items)
+                self.items.append(_Item(item["name"], store, words, size or _item_size(item)))
+                for w in words:
+                    self.words.setdefault((store, w), []).append(idx)
+        self.version = hashlib.blake2b(json.dumps(items, sort_keys=True).encode(), digest_size=8).hexdigest()
+
+    def best_item(self, catalogue: CatalogueIndex, e: Entry) -> Tuple[Optional[str], float]:
+        """Canonical item `e` is, or (None, 0.0) if none scores ITEM_MIN."""
+        best, best_score = None, 0.0
+        seen = set()
+        for w in e.words:
+            for idx in self.words.get((e.store, w), ()):
+                if idx in seen:
+                    continue
+                seen.add(idx)
+                item = self.items[idx]
+                # Every search-term word must be in the product name
+                if not set(item.words) <= set(e.words):
+                    continue
+                s = catalogue.score(catalogue.query(item.words), item.size, e)
+                if s > best_score:
+                    best, best_score = item.name, s
+        if best_score < ITEM_MIN:
+            return None, 0.0
+        return best, round(best_score, 3)
+
+
+# ---------------------------------------------------------------------------
+# Matching
+# ---------------------------------------------------------------------------
+
+MATCH_FIELDS = ("canonical_item", "item_score", "counterpart_store", "counterpart_id", "counterpart_score")
+
+
+def match_row(catalogue: CatalogueIndex, items: ItemIndex, key: Key) -> dict:
+    """product_matches row for one product."""
+    e = catalogue.entries[key]
+    item, item_score = items.best_item(catalogue, e)
+    counterpart, counterpart_score = catalogue.best_counterpart(e)
+    return {
+        "store": e.store,
+        "product_id": e.product_id,
+        "canonical_item": item,
+        "item_score": item_score or None,
+        "counterpart_store": counterpart[0] if counterpart else None,
+        "counterpart_id": counterpart[1] if counterpart else None,
+        "counterpart_score": counterpart_score or None,
+        "fingerprint": e.fingerprint,
+    }
+
+
+def stale_keys(catalogue: CatalogueIndex, stored: Dict[Key, dict], full: bool = False) -> Set[Key]:
+    """Products whose match must be recomputed.
+
+    That is every product with no stored match or a changed fingerprint, every
+    product whose stored counterpart changed or disappeared, and every product
+    a changed one would now beat the stored counterpart of.
+    """
+    if full:
+        return set(catalogue.entries)
+    changed = {
+        key for key, e in catalogue.entries.items()
+        if stored.get(key, {}).get("fingerprint") != e.fingerprint
+    }
+    stale = set(changed)
+    for key, row in stored.items():
+        if key not in catalogue.entries or not row.get("counterpart_id"):
+            continue
+        counterpart = (row["counterpart_store"], row["counterpart_id"])
+        if counterpart in changed or counterpart not in catalogue.entries:
+            stale.add(key)
+    for key in changed:
+        e = catalogue.entries[key]
+        query = catalogue.query(e.words)
+        for store in STORES:
+            if store == e.store:
+                continue
+            for other in catalogue.candidates(store, e.words, e.size):
+                if other in stale:
+                    continue
+                s = catalogue.score(query, e.size, catalogue.entries[other], e.brand)
+                if s >= COUNTERPART_MIN and s > float(stored.get(other, {}).get("counterpart_score") or 0):
+                    stale.add(other)
+    return stale
+
+
+def rematch(
+    catalogue: CatalogueIndex,
+    items: ItemIndex,
+    stored: Dict[Key, dict],
+    full: bool = False,
+) -> Tuple[List[dict], List[Key], int]:
+    """Recompute stale matches.
+
+    Returns (rows that differ from `stored`, stored keys no longer in the
+    catalogue, products scored).
+    """
+    stale = stale_keys(catalogue, stored, full)
+    rows = []
+    for key in sorted(stale):
+        row = match_row(catalogue, items, key)
+        old = stored.get(key)
+        if old is None or any(old.get(f) != row[f] for f in MATCH_FIELDS + ("fingerprint",)):
+            rows.append(row)
+    orphans = sorted(key for key in stored if key not in catalogue.entries)
+    return rows, orphans, len(stale)
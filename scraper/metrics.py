@@ -0,0 +1,155 @@
+"""
+Run metrics for Bravo scrapers.
+Stages are timed with spans (wall time, split into sleeping and working) and
+tallied with counters (pages, bytes, products, DB batches, retries, rows).
+At the end of a run the report goes to scraper_runs.raw_log and, in GitHub
+Actions, to the job summary, so run times can be compared week over week.
+"""
+
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Dict, List
+
+from scraper.logger import get_logger
+
+log = get_logger("metrics")
+
+SUMMARY_COLUMNS = (
+    ("pages", "Pages"), ("bytes", "KiB"), ("products", "Products"),
+    ("db_batches", "DB batches"), ("db_rows", "Rows written"), ("db_retries", "Retries"),
+)
+
+
+class Metrics:
+    """Stage timings and counters for one run; safe to use from several store threads.
+
+    Spans nest per thread: time slept and counters are credited to every span
+    open on the calling thread (so a stage includes its sub-stages) and to the
+    run totals.
+    """
+
+    def __init__(self):
+        self.started = time.monotonic()
+        self.started_at = datetime.now(timezone.utc)
+        self.stages: Dict[str, dict] = {}
+        self.totals: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def _open(self) -> List[dict]:
+        if not hasattr(self._local, "stack"):
+            self._local.stack = []
+        return self._local.stack
+
+    @contextmanager
+    def span(self, name: str):
+        """Time a stage. Repeated spans with the same name accumulate."""
+        with self._lock:
+            stage = self.stages.setdefault(name, {"calls": 0, "wall_s": 0.0, "sleep_s": 0.0, "counters": {}})
+        stack = self._open()
+        stack.append(stage)
+        started = time.monotonic()
+        try:
+            yield stage
+        finally:
+            stack.pop()
+            with self._lock:
+                stage["calls"] += 1
+                if all(s is not stage for s in stack):  # re-entered spans are timed once, by the outermost
+                    stage["wall_s"] += time.monotonic() - started
+
+    def count(self, name: str, n: float = 1):
+        """Add `n` to a counter for the open spans and the run."""
+        with self._lock:
+            self.totals[name] = self.totals.get(name, 0) + n
+            for stage in self._unique(self._open()):
+                stage["counters"][name] = stage["counters"].get(name, 0) + n
+
+    def slept(self, seconds: float):
+        """Record time spent sleeping (politeness delays, backoffs) rather than working."""
+        if seconds <= 0:
+            return
+        with self._lock:
+            self.totals["sleep_s"] = self.totals.get("sleep_s", 0.0) + seconds
+            for stage in self._unique(self._open()):
+                stage["sleep_s"] += seconds
+
+    @staticmethod
+    def _unique(stack: List[dict]) -> List[dict]:
+        return list({id(s): s for s in stack}.values())
+
+    def report(self, **extra) -> dict:
+        """JSON-serialisable snapshot of the run so far."""
+        with self._lock:
+            stages = {name: _stage_report(s) for name, s in self.stages.items()}
+            totals = {k: round(v, 3) for k, v in self.totals.items()}
+        return {
+            "started_at": self.started_at.isoformat(timespec="seconds"),
+            "finished_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "wall_s": round(time.monotonic() - self.started, 3),
+            "stages": stages,
+            "totals": totals,
+            **extra,
+        }
+
+
+def _stage_report(stage: dict) -> dict:
+    wall = stage["wall_s"]
+    sleep = min(stage["sleep_s"], wall)
+    out = {
+        "calls": stage["calls"],
+        "wall_s": round(wall, 3),
+        "sleep_s": round(sleep, 3),
+        "work_s": round(wall - sleep, 3),
+        **stage["counters"],
+    }
+    if stage["counters"].get("products") and wall > sleep:
+        out["products_per_s"] = round(stage["counters"]["products"] / (wall - sleep), 1)
+    return out
+
+
+def summary_markdown(title: str, report: dict) -> str:
+    """A job-summary table of the report's stages."""
+    head = ["Stage", "Calls", "Wall (s)", "Working (s)", "Sleeping (s)"] + [label for _, label in SUMMARY_COLUMNS] + ["Products/s"]
+    lines = [
+        f"### {title}",
+        "",
+        f"Started {report['started_at']}, {report['wall_s']:.0f}s wall time.",
+        "",
+        "| " + " | ".join(head) + " |",
+        "|" + "---|" * len(head),
+    ]
+    for name, s in sorted(report["stages"].items()):
+        cells = [name, s["calls"], f"{s['wall_s']:.1f}", f"{s['work_s']:.1f}", f"{s['sleep_s']:.1f}"]
+        for key, _ in SUMMARY_COLUMNS:
+            value = s.get(key, 0)
+            cells.append(f"{value / 1024:.0f}" if key == "bytes" else f"{value:.0f}")
+        cells.append(s.get("products_per_s", ""))
+        lines.append("| " + " | ".join(str(c) for c in cells) + " |")
+    return "\n".join(lines) + "\n"
+
+
+def write_summary(title: str, report: dict):
+    """Append the report to the GitHub Actions job summary, when there is one."""
+    path = os.environ.get("GITHUB_STEP_SUMMARY")
+    if not path:
+        return
+    try:
+        with open(path, "a") as f:
+            f.write(summary_markdown(title, report))
+    except OSError as e:
+        log.warning(f"Could not write job summary: {e}")
+
+
+def describe(report: dict) -> str:
+    parts = []
+    for name, s in sorted(report["stages"].items()):
+        rate = f", {s['products_per_s']}/s" if "products_per_s" in s else ""
+        parts.append(f"{name} {s['wall_s']:.1f}s ({s['sleep_s']:.1f}s asleep{rate})")
+    return "; ".join(parts) or "no stages recorded"
+
+
+metrics = Metrics()
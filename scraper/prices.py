@@ -0,0 +1,52 @@
+"""
+Read API for price_observations: run-length price intervals per product.
+"""
+
+from datetime import date, timedelta
+from typing import List, Optional
+
+OBSERVATION_COLUMNS = "price,from_date,to_date"
+
+
+def price_series(db, store: str, product_id: str, since: Optional[str] = None) -> List[dict]:
+    """Price intervals for one product, oldest first.
+
+    Each item is {price: float, from_date: str, to_date: str}; the price held on
+    every observed day from from_date to to_date inclusive. Gaps between
+    intervals are days on which the product was not observed. `db` is a
+    supabase client.
+    """
+    query = (
+        db.table("price_observations")
+        .select(OBSERVATION_COLUMNS)
+        .eq("store", store)
+        .eq("product_id", product_id)
+    )
+    if since:
+        query = query.gte("to_date", since)
+    rows = query.order("from_date").order("id").execute().data or []
+    return [
+        {"price": float(r["price"]), "from_date": r["from_date"], "to_date": r["to_date"]}
+        for r in rows
+    ]
+
+
+def price_on(series: List[dict], day: str) -> Optional[float]:
+    """Price in effect on `day` (ISO date), or None if the product was not observed then."""
+    price = None
+    for interval in series:
+        if interval["from_date"] <= day <= interval["to_date"]:
+            price = interval["price"]  # later intervals win on same-day changes
+    return price
+
+
+def daily_prices(series: List[dict]) -> List[dict]:
+    """Expand intervals into one {date, price} point per observed day, e.g. for charts."""
+    points = {}
+    for interval in series:
+        day = date.fromisoformat(interval["from_date"])
+        end = date.fromisoformat(interval["to_date"])
+        while day <= end:
+            points[day.isoformat()] = interval["price"]
+            day += timedelta(days=1)
+    return [{"date": d, "price": p} for d, p in sorted(points.items())]
@@ -0,0 +1,140 @@
+"""
+Compact product records shared by the scrapers and the writers.
+A scraped page is a ProductBatch: one list per field, with store, brand,
+category and special-type strings interned, instead of a dict per product.
+Batches serialise straight to the row payloads the pipeline upserts; Product
+is the slotted record handed out when iterating one product at a time.
+"""
+
+import sys
+from dataclasses import dataclass
+from typing import Dict, Iterable, Iterator, List, Optional
+
+FIELDS = (
+    "store", "product_id", "name", "brand", "category",
+    "current_price", "original_price", "discount_pct",
+    "image_url", "product_url", "special_type", "size",
+)
+
+
+def _intern(value: Optional[str]) -> Optional[str]:
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+@dataclass(slots=True)
+class Product:
+    """One scraped product."""
+
+    store: str
+    product_id: str
+    name: str
+    brand: Optional[str] = None
+    category: Optional[str] = None
+    current_price: Optional[float] = None
+    original_price: Optional[float] = None
+    discount_pct: Optional[int] = None
+    image_url: Optional[str] = None
+    product_url: Optional[str] = None
+    special_type: Optional[str] = None
+    size: Optional[str] = None
+
+
+class ProductBatch:
+    """Column-oriented products, in scrape order."""
+
+    __slots__ = FIELDS
+
+    def __init__(self):
+        for f in FIELDS:
+            setattr(self, f, [])
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[dict]) -> "ProductBatch":
+        """Build a batch from product dicts (DB rows, old archives); missing fields are None."""
+        batch = cls()
+        for r in rows:
+            batch.add(**{f: r.get(f) for f in FIELDS})
+        return batch
+
+    def add(
+        self,
+        store: str,
+        product_id: str,
+        name: str,
+        brand: Optional[str] = None,
+        category: Optional[str] = None,
+        current_price: Optional[float] = None,
+        original_price: Optional[float] = None,
+        discount_pct: Optional[int] = None,
+        image_url: Optional[str] = None,
+        product_url: Optional[str] = None,
+        special_type: Optional[str] = None,
+        size: Optional[str] = None,
+    ):
+        self.store.append(sys.intern(store))
+        self.product_id.append(product_id)
+        self.name.append(name)
+        self.brand.append(_intern(brand))
+        self.category.append(_intern(category))
+        self.current_price.append(current_price)
+        self.original_price.append(original_price)
+        self.discount_pct.append(discount_pct)
+        self.image_url.append(image_url)
+        self.product_url.append(product_url)
+        self.special_type.append(_intern(special_type))
+        self.size.append(size)
+
+    def append(self, p: Product):
+        self.add(
+            p.store, p.product_id, p.name, p.brand, p.category,
+            p.current_price, p.original_price, p.discount_pct,
+            p.image_url, p.product_url, p.special_type, p.size,
+        )
+
+    def extend(self, other: "ProductBatch"):
+        for f in FIELDS:
+            getattr(self, f).extend(getattr(other, f))
+
+    def __len__(self) -> int:
+        return len(self.product_id)
+
+    def __iter__(self) -> Iterator[Product]:
+        for values in zip(*(getattr(self, f) for f in FIELDS)):
+            yield Product(*values)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return self.take(range(*index.indices(len(self))))
+        return Product(*(getattr(self, f)[index] for f in FIELDS))
+
+    def take(self, indices: Iterable[int]) -> "ProductBatch":
+        """A new batch of the products at `indices`."""
+        indices = list(indices)
+        batch = ProductBatch()
+        for f in FIELDS:
+            column = getattr(self, f)
+            setattr(batch, f, [column[i] for i in indices])
+        return batch
+
+    def new(self, seen: set) -> "ProductBatch":
+        """Products whose id is not in `seen` (first occurrence only); adds their ids to `seen`."""
+        keep = []
+        for i, pid in enumerate(self.product_id):
+            if pid not in seen:
+                seen.add(pid)
+                keep.append(i)
+        return self if len(keep) == len(self) else self.take(keep)
+
+    def search_keys(self) -> List[str]:
+        """Normalized search key per product (see scraper/search.py)."""
+        from scraper.search import search_keys
+
+        return search_keys(self.name, self.brand, self.size)
+
+    def rows(self, fields: Iterable[str], rename: Optional[Dict[str, str]] = None, **constants) -> List[dict]:
+        """Row payloads with the given fields (renamed per `rename`) plus constant columns."""
+        fields = list(fields)
+        rename = rename or {}
+        names = [rename.get(f, f) for f in fields]
+        columns = [getattr(self, f) for f in fields]
+        return [dict(zip(names, values), **constants) for values in zip(*columns)]
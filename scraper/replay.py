@@ -0,0 +1,85 @@
+"""
+Record/replay archive for scraper HTTP traffic.
+BRAVO_HTTP_MODE=record saves every fetched page (Coles HTML and _next/data JSON,
+Woolworths browse API responses) as a gzip file keyed by URL and request body.
+BRAVO_HTTP_MODE=replay serves them back without a browser, network or stealth
+delays, so a whole run against a captured corpus takes seconds.
+BRAVO_HTTP_ARCHIVE overrides the archive directory (default scraper/http_archive).
+"""
+
+import gzip
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Optional, Union
+
+from scraper.logger import get_logger
+
+log = get_logger("replay")
+
+MODE = os.environ.get("BRAVO_HTTP_MODE", "").strip().lower()
+ARCHIVE_DIR = Path(os.environ.get("BRAVO_HTTP_ARCHIVE") or Path(__file__).parent / "http_archive")
+
+if MODE not in ("", "live", "record", "replay"):
+    raise ValueError(f"BRAVO_HTTP_MODE must be record or replay, got {MODE!r}")
+
+RECORD = MODE == "record"
+REPLAY = MODE == "replay"
+
+# Stands in for the Playwright page when replaying; fetchers never touch it.
+OFFLINE_PAGE = object()
+
+_stats = {"recorded": 0, "replayed": 0, "missing": 0}
+
+
+def _path(url: str, body: Optional[str]) -> Path:
+    digest = hashlib.sha256(f"{url}\n{body or ''}".encode()).hexdigest()[:32]
+    return ARCHIVE_DIR / f"{digest}.json.gz"
+
+
+def record(url: str, content: Union[str, bytes, None], body: Optional[str] = None):
+    """Archive a fetched response when recording; always returns `content` unchanged.
+
+    Raw bytes are stored as text and come back from load() as bytes again.
+    """
+    if RECORD and content is not None:
+        raw = isinstance(content, bytes)
+        entry = {
+            "url": url,
+            "body": body,
+            "bytes": raw,
+            "content": content.decode("utf-8", "surrogateescape") if raw else content,
+        }
+        path = _path(url, body)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(".tmp")
+        with gzip.open(tmp, "wt", encoding="utf-8") as f:
+            json.dump(entry, f)
+        os.replace(tmp, path)
+        _stats["recorded"] += 1
+    return content
+
+
+def load(url: str, body: Optional[str] = None) -> Union[str, bytes, None]:
+    """Return the archived response for (url, body), or None if it was never recorded."""
+    path = _path(url, body)
+    try:
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            entry = json.load(f)
+    except FileNotFoundError:
+        _stats["missing"] += 1
+        log.warning(f"replay: no archived response for {url}")
+        return None
+    _stats["replayed"] += 1
+    if entry.get("bytes"):
+        return entry["content"].encode("utf-8", "surrogateescape")
+    return entry["content"]
+
+
+def describe() -> str:
+    if RECORD:
+        return f"recorded {_stats['recorded']} responses to {ARCHIVE_DIR}"
+    if REPLAY:
+        return f"replayed {_stats['replayed']} responses from {ARCHIVE_DIR} ({_stats['missing']} missing)"
+    return "live"
@@ -0,0 +1,117 @@
+"""
+Request scheduler: per-host pacing plus deferred work that runs while waiting.
+Politeness delays are measured from the previous request to the same host, not
+from the end of whatever processing followed it, and the wait itself is spent
+running queued work (DB flushes, history recording) before sleeping the rest.
+BRAVO_HOST_MIN_INTERVAL sets per-host floors, e.g.
+"www.coles.com.au=20,www.woolworths.com.au=20" (seconds between requests).
+"""
+
+import os
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, Optional
+
+from scraper import replay
+from scraper.logger import get_logger
+from scraper.metrics import metrics
+
+log = get_logger("scheduler")
+
+DEFAULT_MIN_INTERVAL = {
+    "www.coles.com.au": 3.0,
+    "www.woolworths.com.au": 3.0,
+}
+
+
+def _parse_intervals(spec: str) -> Dict[str, float]:
+    intervals = dict(DEFAULT_MIN_INTERVAL)
+    for part in spec.split(","):
+        host, _, seconds = part.partition("=")
+        if host.strip() and seconds.strip():
+            intervals[host.strip()] = float(seconds)
+    return intervals
+
+
+class Scheduler:
+    """Paces requests per host and runs deferred tasks in the idle time.
+
+    Deferred tasks are queued per thread, so each store's worker only ever runs
+    its own work; they run in FIFO order during wait() or on drain().
+    """
+
+    def __init__(self, min_intervals: Optional[Dict[str, float]] = None):
+        self.min_intervals = min_intervals or {}
+        self.stats = {"waits": 0, "idle_s": 0.0, "work_s": 0.0, "tasks": 0}
+        self._last: Dict[Optional[str], float] = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def _queue(self) -> deque:
+        if not hasattr(self._local, "queue"):
+            self._local.queue = deque()
+        return self._local.queue
+
+    def defer(self, fn: Callable, *args, **kwargs):
+        """Queue work for this thread's next wait (or drain)."""
+        self._queue().append((fn, args, kwargs))
+
+    def drain(self):
+        """Run every queued task for this thread now."""
+        queue = self._queue()
+        while queue:
+            self._run_one(queue)
+
+    def _run_one(self, queue: deque):
+        fn, args, kwargs = queue.popleft()
+        started = time.monotonic()
+        try:
+            fn(*args, **kwargs)
+        finally:
+            with self._lock:
+                self.stats["tasks"] += 1
+                self.stats["work_s"] += time.monotonic() - started
+
+    def wait(self, host: Optional[str], delay: float, label: str = "") -> float:
+        """Block until `delay` seconds (at least the host's minimum interval) after
+        the previous request to `host`, running deferred tasks first.
+
+        The caller issues its next request to `host` right after this returns.
+        Returns the seconds actually slept.
+        """
+        queue = self._queue()
+        if replay.REPLAY:
+            self.drain()
+            return 0.0
+
+        delay = max(delay, self.min_intervals.get(host, 0.0))
+        with self._lock:
+            last = self._last.get(host)
+        deadline = (last if last is not None else time.monotonic()) + delay
+
+        while queue and time.monotonic() < deadline:
+            self._run_one(queue)
+
+        remaining = deadline - time.monotonic()
+        if label:
+            log.debug(f"{label}: sleeping {max(0.0, remaining):.1f}s of {delay:.1f}s")
+        if remaining > 0:
+            time.sleep(remaining)
+            metrics.slept(remaining)
+
+        with self._lock:
+            self._last[host] = time.monotonic()
+            self.stats["waits"] += 1
+            self.stats["idle_s"] += max(0.0, remaining)
+        return max(0.0, remaining)
+
+    def describe(self) -> str:
+        s = self.stats
+        return (
+            f"{s['waits']} waits, {s['idle_s']:.0f}s idle, "
+            f"{s['tasks']} deferred tasks ({s['work_s']:.1f}s of work, mostly inside those waits)"
+        )
+
+
+scheduler = Scheduler(_parse_intervals(os.environ.get("BRAVO_HOST_MIN_INTERVAL", "")))
@@ -0,0 +1,93 @@
+"""
+Normalized search keys and the search API over them.
+A search key is a product name reduced to what shoppers type: lower-cased,
+accents and punctuation dropped, the brand removed, and pack sizes spelled one
+way ("1,000 mL" and "1 Litre" both become "1l"). The scraper stores it with
+every specials, products and special_intel row; migration 010 indexes it with
+pg_trgm, and the search_* functions there rank matches on it. search_normalize()
+in migration 014 is normalize() in SQL; keep the two in step.
+"""
+
+import re
+import unicodedata
+from typing import List, Optional
+
+SEARCH_LIMIT = 50
+
+_NON_WORD = re.compile(r"[^a-z0-9.]+")
+_THOUSANDS = re.compile(r"(?<=\d),(?=\d{3}\b)")
+_SIZE = re.compile(
+    r"\b(\d+(?:\.\d+)?)\s*"
+    r"(ml|millilitres?|l|lt|ltr|litres?|liters?|g|gm|grams?|kg|kgs|kilos?|kilograms?|pk|packs?)\b"
+)
+_UNITS = {
+    "ml": "ml", "millilitre": "ml", "millilitres": "ml",
+    "l": "l", "lt": "l", "ltr": "l", "litre": "l", "litres": "l", "liter": "l", "liters": "l",
+    "g": "g", "gm": "g", "gram": "g", "grams": "g",
+    "kg": "kg", "kgs": "kg", "kilo": "kg", "kilos": "kg", "kilogram": "kg", "kilograms": "kg",
+    "pk": "pk", "pack": "pk", "packs": "pk",
+}
+_LARGER = {"ml": "l", "g": "kg"}  # 1000 of the unit -> 1 of the larger one
+
+
+def normalize(text: Optional[str]) -> str:
+    """Lower-case ASCII words and canonical sizes, single-spaced; the query side of a key."""
+    if not text:
+        return ""
+    text = unicodedata.normalize("NFKD", text).encode("ascii", "ignore").decode("ascii").lower()
+    text = _THOUSANDS.sub("", text.replace("&", " and ").replace("'", ""))
+    text = _SIZE.sub(_size_token, text)
+    return " ".join(w.strip(".") for w in _NON_WORD.sub(" ", text).split() if w.strip("."))
+
+
+def _size_token(m: re.Match) -> str:
+    value = float(m.group(1))
+    unit = _UNITS[m.group(2)]
+    if unit in _LARGER and value >= 1000:
+        value, unit = value / 1000, _LARGER[unit]
+    return f"{value:g}{unit}"
+
+
+def search_key(name: str, brand: Optional[str] = None, size: Optional[str] = None) -> str:
+    """Key stored for a product: its normalized name without the brand, plus its size if the name lacks it.
+
+    "Coles Full Cream Milk 2 Litre" (brand Coles) -> "full cream milk 2l".
+    """
+    words = normalize(name).split()
+    brand_words = normalize(brand).split()
+    if brand_words:
+        n = len(brand_words)
+        for i in range(len(words) - n + 1):
+            if words[i:i + n] == brand_words:
+                del words[i:i + n]
+                break
+        if not words:  # the name is just the brand
+            words = brand_words
+    for token in normalize(size).split():
+        if token not in words:
+            words.append(token)
+    return " ".join(words)
+
+
+def search_keys(names: List[str], brands: List[Optional[str]], sizes: List[Optional[str]]) -> List[str]:
+    return [search_key(n, b, s) for n, b, s in zip(names, brands, sizes)]
+
+
+def search_products(db, query: str, store: Optional[str] = None, limit: int = SEARCH_LIMIT) -> List[dict]:
+    """Catalogue products matching `query`, best match first.
+
+    Substring matches on the search key come first, then full-text matches on
+    brand and name, each ordered by trigram similarity. `db` is a supabase client.
+    """
+    q = normalize(query)
+    if not q:
+        return []
+    return db.rpc("search_products", {"p_query": q, "p_store": store, "p_limit": limit}).execute().data or []
+
+
+def search_specials(db, query: str, limit: int = SEARCH_LIMIT) -> List[dict]:
+    """Current specials (specials_feed rows) matching `query`, best match first."""
+    q = normalize(query)
+    if not q:
+        return []
+    return db.rpc("search_specials", {"p_query": q, "p_limit": limit}).execute().data or []
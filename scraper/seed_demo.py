@@ -9,6 +9,8 @@ from datetime import datetime, timedelta, date
 from dotenv import load_dotenv
 from supabase import create_client
 
+from scraper.search import search_key
+
 load_dotenv(os.path.join(os.path.dirname(__file__), ".env"))
 
 db = create_client(os.environ["SUPABASE_URL"], os.environ["SUPABASE_SERVICE_KEY"])
@@ -165,6 +167,9 @@ def run():
             }
         )
 
+    for row in specials_rows + intel_rows:
+        row["search_key"] = search_key(row["name"], row.get("brand"))
+
     # Batch upserts
     print("  Writing specials …")
     db.table("specials").upsert(specials_rows, on_conflict="store,product_id").execute()
@@ -4,11 +4,12 @@ Provides human-like delays, User-Agent rotation, and session management.
 """
 
 import math
+import os
 import random
-import time
 from typing import Optional
 
 from scraper.logger import get_logger
+from scraper.scheduler import scheduler
 
 log = get_logger("stealth")
 
@@ -28,6 +29,18 @@ VIEWPORTS = [
     {"width": 1920, "height": 1080},
 ]
 
+# Lean mode: abort heavy/non-essential requests and wait on readiness signals
+# (with the old fixed waits as ceilings) instead of sleeping a fixed time.
+LEAN_BROWSER = os.environ.get("BRAVO_LEAN_BROWSER", "").strip().lower() in ("1", "true", "yes")
+LEAN_BLOCKED_TYPES = {"image", "media", "font"}
+LEAN_BLOCKED_HOSTS = (
+    "google-analytics.com", "googletagmanager.com", "doubleclick.net", "facebook.net",
+    "hotjar.com", "nr-data.net", "newrelic.com", "demdex.net", "omtrdc.net",
+    "adobedtm.com", "tiktok.com", "bing.com", "pinterest.com", "clarity.ms",
+)
+
+lean_stats = {"blocked": 0, "allowed": 0}
+
 STEALTH_INIT_SCRIPT = """
     Object.defineProperty(navigator, 'webdriver', {get: () => undefined});
     delete navigator.__proto__.webdriver;
@@ -37,26 +50,26 @@ STEALTH_INIT_SCRIPT = """
 """
 
 
-def stealth_delay(min_s: float, max_s: float, label: str = ""):
+def stealth_delay(min_s: float, max_s: float, label: str = "", host: Optional[str] = None):
     """
-    Sleep for a human-like duration using log-normal distribution.
+    Wait a human-like duration (log-normal) since the last request to `host`.
     Most delays cluster around the lower end, with occasional longer pauses.
+    The scheduler runs deferred work during the wait; replay mode skips it.
     """
     mu = math.log((min_s + max_s) / 2)
     sigma = 0.5
     delay = max(min_s, min(max_s, random.lognormvariate(mu, sigma)))
-    if label:
-        log.debug(f"{label}: sleeping {delay:.1f}s")
-    time.sleep(delay)
-    return delay
+    return scheduler.wait(host, delay, label)
 
 
-def session_break(min_min: float = 2.0, max_min: float = 5.0, label: str = "session break"):
+def session_break(
+    min_min: float = 2.0, max_min: float = 5.0,
+    label: str = "session break", host: Optional[str] = None,
+):
     """Take a longer pause to simulate a human stepping away."""
     seconds = random.uniform(min_min * 60, max_min * 60)
     log.info(f"{label}: pausing {seconds / 60:.1f} min")
-    time.sleep(seconds)
-    return seconds
+    return scheduler.wait(host, seconds, label)
 
 
 def pick_user_agent() -> str:
@@ -78,9 +91,39 @@ def create_stealth_context(playwright_browser, ua: Optional[str] = None):
         user_agent=user_agent,
     )
     ctx.add_init_script(STEALTH_INIT_SCRIPT)
+    if LEAN_BROWSER:
+        ctx.route("**/*", _lean_route)
     return ctx
 
 
+def _lean_route(route):
+    request = route.request
+    host = request.url.split("/")[2] if "://" in request.url else ""
+    if request.resource_type in LEAN_BLOCKED_TYPES or any(host.endswith(h) for h in LEAN_BLOCKED_HOSTS):
+        lean_stats["blocked"] += 1
+        route.abort()
+    else:
+        lean_stats["allowed"] += 1
+        route.continue_()
+
+
+def wait_for_selector(page, selector: str, timeout_ms: int) -> bool:
+    """Wait until `selector` is in the DOM (lean mode) or for `timeout_ms` (default)."""
+    if not LEAN_BROWSER:
+        page.wait_for_timeout(timeout_ms)
+        return True
+    try:
+        page.wait_for_selector(selector, state="attached", timeout=timeout_ms)
+        return True
+    except Exception:
+        return False
+
+
+def describe_lean() -> str:
+    total = lean_stats["blocked"] + lean_stats["allowed"]
+    return f"lean browser: blocked {lean_stats['blocked']}/{total} requests"
+
+
 def bot_challenge_detected(page) -> bool:
     """Check if the current page is a bot challenge."""
     try:
@@ -0,0 +1,19 @@
+"""
+Shared fixtures for the scraper tests.
+"""
+
+import pytest
+
+from scraper import httpcache, replay
+
+
+@pytest.fixture
+def http_cache(tmp_path, monkeypatch):
+    """An empty, enabled conditional-request cache in a temporary directory."""
+    monkeypatch.setattr(httpcache, "ENABLED", True)
+    monkeypatch.setattr(httpcache, "CACHE_DIR", tmp_path)
+    monkeypatch.setattr(httpcache, "_entries", {})
+    monkeypatch.setattr(httpcache, "_stats", dict.fromkeys(httpcache._stats, 0))
+    monkeypatch.setattr(replay, "REPLAY", False)
+    monkeypatch.setattr(replay, "RECORD", False)
+    return httpcache
@@ -0,0 +1,130 @@
+"""
+Catalogue checkpoints: open, resume, expiry and per-page tracking.
+"""
+
+import json
+from datetime import datetime, timedelta
+
+import pytest
+
+from scraper import checkpoint
+from scraper.checkpoint import MAX_AGE_HOURS, Checkpoint
+from scraper.products import ProductBatch
+
+
+@pytest.fixture(autouse=True)
+def checkpoint_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(checkpoint, "CHECKPOINT_DIR", tmp_path)
+    return tmp_path
+
+
+def _batch(*ids) -> ProductBatch:
+    return ProductBatch.from_rows(
+        {"store": "coles", "product_id": pid, "name": pid, "current_price": 1.0} for pid in ids
+    )
+
+
+def _crawl(cp: Checkpoint, pages):
+    """Consume tracked (category, page_num, products) items, as the catalogue writer does."""
+    progress = {}
+
+    def gen():
+        found = 0
+        for category, page_num, batch in pages:
+            found += len(batch)
+            cp.seen_ids.update(batch.product_id)
+            progress["found"] = found
+            yield category, page_num, batch
+        return True
+
+    return [item[1] for item in cp.track(gen(), progress)]
+
+
+def test_resume_restores_progress(checkpoint_dir):
+    cp = Checkpoint.open("coles")
+    _crawl(cp, [("pantry", 1, _batch("a", "b")), ("pantry", 2, _batch("c"))])
+    cp.mark_done("pantry")
+    _crawl(cp, [("drinks", 1, _batch("d"))])
+    cp.finish(["pantry", "drinks"])
+
+    resumed = Checkpoint.open("coles", resume=True)
+    assert resumed.started == cp.started
+    assert resumed.is_done("pantry")
+    assert not resumed.is_done("drinks")
+    assert resumed.next_page("drinks") == 2
+    assert resumed.next_page("bakery") == 1
+    assert resumed.found("drinks") == 1
+    assert resumed.seen_ids == {"a", "b", "c", "d"}
+
+
+def test_seen_ids_are_appended_not_rewritten(checkpoint_dir):
+    cp = Checkpoint.open("coles")
+    _crawl(cp, [("pantry", 1, _batch("a", "b")), ("pantry", 2, _batch("c"))])
+    assert "seen_ids" not in json.loads(cp.path.read_text())
+    assert cp.seen_path.read_text().split() == ["a", "b", "c"]
+
+
+def test_page_is_marked_only_once_consumed(checkpoint_dir):
+    cp = Checkpoint.open("coles")
+    tracked = cp.track(iter([("pantry", 1, _batch("a")), ("pantry", 2, _batch("b"))]))
+    next(tracked)
+    assert cp.next_page("pantry") == 1  # page 1 handed out, not yet persisted
+    next(tracked)
+    assert cp.next_page("pantry") == 2
+
+
+def test_open_without_resume_starts_fresh(checkpoint_dir):
+    cp = Checkpoint.open("coles")
+    _crawl(cp, [("pantry", 1, _batch("a"))])
+
+    fresh = Checkpoint.open("coles")
+    assert fresh.categories == {}
+    assert fresh.seen_ids == set()
+    assert not fresh.seen_path.exists()
+
+
+def test_stale_checkpoint_is_not_resumed(checkpoint_dir):
+    cp = Checkpoint.open("coles")
+    cp.started = (datetime.now() - timedelta(hours=MAX_AGE_HOURS + 1)).isoformat(timespec="seconds")
+    _crawl(cp, [("pantry", 1, _batch("a"))])
+
+    resumed = Checkpoint.open("coles", resume=True)
+    assert resumed.next_page("pantry") == 1
+    assert resumed.seen_ids == set()
+
+
+def test_recent_checkpoint_is_resumed(checkpoint_dir):
+    cp = Checkpoint.open("coles")
+    cp.started = (datetime.now() - timedelta(hours=MAX_AGE_HOURS - 1)).isoformat(timespec="seconds")
+    _crawl(cp, [("pantry", 1, _batch("a"))])
+
+    assert Checkpoint.open("coles", resume=True).next_page("pantry") == 2
+
+
+def test_complete_checkpoint_is_not_resumed(checkpoint_dir):
+    cp = Checkpoint.open("coles")
+    _crawl(cp, [("pantry", 1, _batch("a"))])
+    cp.mark_done("pantry")
+    cp.finish(["pantry"])
+
+    resumed = Checkpoint.open("coles", resume=True)
+    assert not resumed.is_done("pantry")
+    assert resumed.seen_ids == set()
+
+
+def test_unreadable_checkpoint_starts_fresh(checkpoint_dir):
+    (checkpoint_dir / "catalogue_coles.json").write_text("{not json")
+    assert Checkpoint.open("coles", resume=True).categories == {}
+
+
+def test_legacy_seen_ids_still_load(checkpoint_dir):
+    (checkpoint_dir / "catalogue_coles.json").write_text(json.dumps({
+        "store": "coles",
+        "started": datetime.now().isoformat(timespec="seconds"),
+        "complete": False,
+        "categories": {"pantry": {"pages": [1], "done": False}},
+        "seen_ids": ["a", "b"],
+    }))
+    resumed = Checkpoint.open("coles", resume=True)
+    assert resumed.seen_ids == {"a", "b"}
+    assert resumed.next_page("pantry") == 2
@@ -0,0 +1,139 @@
+"""
+Coles _next/data fetches against the conditional-request cache.
+"""
+
+import json
+
+from scraper import coles
+
+ROUTE = ("https://www.coles.com.au/_next/data/build-1/en/on-special.json", {"slug": "on-special"})
+SEARCH = {"noOfResults": 1, "results": [{"id": 1, "name": "Milk"}]}
+BODY = json.dumps({"pageProps": {"searchResults": SEARCH}}).encode()
+
+
+def _serve(monkeypatch, responses):
+    """Answer coles fetches with `responses` in order, recording the validators sent."""
+    sent = []
+
+    def fetch(url, user_agent, validators):
+        sent.append(validators)
+        return responses.pop(0)
+
+    monkeypatch.setattr(coles, "FETCH_BACKEND", "httpx")
+    monkeypatch.setattr(coles, "_fetch_page_httpx", fetch)
+    return sent
+
+
+def _count_parses(monkeypatch):
+    calls = []
+    loads = coles._loads
+
+    def counting(data):
+        calls.append(data)
+        return loads(data)
+
+    monkeypatch.setattr(coles, "_loads", counting)
+    return calls
+
+
+def test_search_data_304_reuses_parse(http_cache, monkeypatch):
+    sent = _serve(monkeypatch, [(200, {"etag": '"v1"'}, BODY, len(BODY))])
+    parses = _count_parses(monkeypatch)
+    assert coles._fetch_search_data(ROUTE, 2, "jar", "ua") == SEARCH
+    assert len(parses) == 1
+
+    # Next run: the page is revalidated and its stored parse reused
+    http_cache._entries.clear()
+    sent = _serve(monkeypatch, [(304, {}, None, 0)])
+    assert coles._fetch_search_data(ROUTE, 2, "jar", "ua") == SEARCH
+    assert sent == [{"If-None-Match": '"v1"'}]
+    assert len(parses) == 1
+    assert http_cache._stats["hits"] == 1
+    assert http_cache._stats["parses_saved"] == 1
+
+
+def test_search_data_200_parses_again(http_cache, monkeypatch):
+    _serve(monkeypatch, [(200, {"etag": '"v1"'}, BODY, len(BODY))])
+    parses = _count_parses(monkeypatch)
+    coles._fetch_search_data(ROUTE, 2, "jar", "ua")
+
+    # A changed page is never answered from the previous parse
+    http_cache._entries.clear()
+    changed = {"noOfResults": 2, "results": []}
+    body = json.dumps({"pageProps": {"searchResults": changed}}).encode()
+    _serve(monkeypatch, [(200, {"etag": '"v2"'}, body, len(body))])
+    assert coles._fetch_search_data(ROUTE, 2, "jar", "ua") == changed
+    assert len(parses) == 2
+
+
+# ---------------------------------------------------------------------------
+# Catalogue checkpointing
+# ---------------------------------------------------------------------------
+
+CATEGORY = {"slug": "pantry", "name": "Pantry"}
+PAGE_LEN = 3
+
+
+def _catalogue_page(page_num: int, total: int) -> dict:
+    """__NEXT_DATA__ / _next/data payload for one browse page of `total` products."""
+    first = (page_num - 1) * PAGE_LEN
+    results = [
+        {"_type": "PRODUCT", "id": i, "name": f"Product {i}", "pricing": {"now": 1.0}}
+        for i in range(first, min(first + PAGE_LEN, total))
+    ]
+    return {"buildId": "build-1", "pageProps": {"searchResults": {"noOfResults": total, "results": results}}}
+
+
+def _crawl(monkeypatch, tmp_path, total: int, blocked: set = frozenset(), resume: bool = False):
+    """Run iter_coles_catalogue over CATEGORY with a checkpoint; returns (checkpoint, pages yielded, pages fetched)."""
+    from contextlib import contextmanager
+
+    from scraper import checkpoint as checkpoint_module
+
+    fetched = []
+
+    def load(page, name, url):
+        page_num = int(url.rsplit("=", 1)[1]) if "page=" in url else 1
+        fetched.append(page_num)
+        return None if page_num in blocked else _catalogue_page(page_num, total)
+
+    def fetch_data(page, route, page_num):
+        fetched.append(page_num)
+        return None if page_num in blocked else _catalogue_page(page_num, total)
+
+    @contextmanager
+    def browser():
+        yield object()
+
+    monkeypatch.setattr(checkpoint_module, "CHECKPOINT_DIR", tmp_path)
+    monkeypatch.setattr(coles, "_catalogue_browser", browser)
+    monkeypatch.setattr(coles, "_load_browse_page", load)
+    monkeypatch.setattr(coles, "_fetch_data_route", fetch_data)
+    monkeypatch.setattr(coles, "stealth_delay", lambda *a, **kw: None)
+    monkeypatch.setattr(coles, "session_break", lambda *a, **kw: None)
+
+    cp = checkpoint_module.Checkpoint.open("coles", resume=resume)
+    pages = [page_num for _, page_num, _ in coles.iter_coles_catalogue([CATEGORY], checkpoint=cp)]
+    return cp, pages, fetched
+
+
+def test_catalogue_block_mid_category_keeps_it_open(monkeypatch, tmp_path):
+    cp, pages, _ = _crawl(monkeypatch, tmp_path, total=10, blocked={3})
+    assert pages == [1, 2]
+    assert not cp.is_done("pantry")
+    assert cp.next_page("pantry") == 3
+
+
+def test_catalogue_finished_category_is_done(monkeypatch, tmp_path):
+    cp, pages, _ = _crawl(monkeypatch, tmp_path, total=10)
+    assert pages == [1, 2, 3, 4]
+    assert cp.is_done("pantry")
+
+
+def test_catalogue_resume_stops_at_total(monkeypatch, tmp_path):
+    _crawl(monkeypatch, tmp_path, total=10, blocked={3})
+    cp, pages, fetched = _crawl(monkeypatch, tmp_path, total=10, resume=True)
+    assert pages == [3, 4]
+    assert fetched == [3, 4]  # no extra page past the last one
+    assert cp.found("pantry") == 10
+    assert cp.is_done("pantry")
@@ -0,0 +1,142 @@
+"""
+Incremental matching: which products are scored again, and orphaned matches.
+"""
+
+import importlib
+from types import SimpleNamespace
+
+import pytest
+
+from scraper import matcher
+from scraper.matcher import CatalogueIndex, ItemIndex, rematch, stale_keys
+
+ITEMS = ItemIndex([])
+
+
+def _product(store, product_id, name, brand=None):
+    return {"store": store, "product_id": product_id, "name": name, "brand": brand}
+
+
+CATALOGUE = [
+    _product("coles", "c1", "Farmers Full Cream Milk 2L", "Farmers"),
+    _product("woolworths", "w1", "Farmers Full Cream Milk Carton 2L", "Farmers"),
+    _product("coles", "c2", "Crunchy Peanut Butter 375g", "Bega"),
+    _product("woolworths", "w2", "Bega Crunchy Peanut Butter 375g", "Bega"),
+]
+
+
+def _stored(products=CATALOGUE):
+    """Matches as a full pass over `products` would have stored them."""
+    rows, _, _ = rematch(CatalogueIndex.from_rows(products), ITEMS, {}, full=True)
+    return {(r["store"], r["product_id"]): dict(r, id=f"m-{r['product_id']}") for r in rows}
+
+
+def test_unchanged_catalogue_scores_nothing():
+    stored = _stored()
+    assert stale_keys(CatalogueIndex.from_rows(CATALOGUE), stored) == set()
+    assert rematch(CatalogueIndex.from_rows(CATALOGUE), ITEMS, stored) == ([], [], 0)
+
+
+def test_changed_product_displaces_stored_counterpart():
+    stored = _stored()
+    assert stored[("coles", "c1")]["counterpart_id"] == "w1"
+
+    # w2 is relisted as the exact milk c1 is, beating c1's stored counterpart
+    catalogue = CatalogueIndex.from_rows(
+        CATALOGUE[:3] + [_product("woolworths", "w2", "Farmers Full Cream Milk 2L", "Farmers")]
+    )
+
+    assert stale_keys(catalogue, stored) == {("woolworths", "w2"), ("coles", "c1"), ("coles", "c2")}
+    rows, orphans, scored = rematch(catalogue, ITEMS, stored)
+    by_key = {(r["store"], r["product_id"]): r for r in rows}
+    assert by_key[("coles", "c1")]["counterpart_id"] == "w2"
+    assert by_key[("woolworths", "w2")]["counterpart_id"] == "c1"
+    assert by_key[("coles", "c2")]["counterpart_id"] is None
+    assert orphans == [] and scored == 3
+
+
+def test_deleted_counterpart_marks_product_stale():
+    stored = _stored()
+    catalogue = CatalogueIndex.from_rows(CATALOGUE[:3])
+
+    assert stale_keys(catalogue, stored) == {("coles", "c2")}
+    rows, orphans, _ = rematch(catalogue, ITEMS, stored)
+    assert [(r["product_id"], r["counterpart_id"]) for r in rows] == [("c2", None)]
+    assert orphans == [("woolworths", "w2")]
+
+
+# -- main._rematch_products ----------------------------------------------------
+
+
+class FakeQuery:
+    """The slice of the PostgREST query builder _select_pages and deletes use."""
+
+    def __init__(self, table):
+        self.table = table
+        self.rows = list(table.rows)
+
+    def select(self, columns):
+        return self
+
+    def gt(self, column, value):
+        self.rows = [r for r in self.rows if r[column] > value]
+        return self
+
+    def order(self, column):
+        self.rows.sort(key=lambda r: r[column])
+        return self
+
+    def limit(self, n):
+        self.rows = self.rows[:n]
+        return self
+
+    def delete(self):
+        return self
+
+    def in_(self, column, values):
+        self.table.deleted.extend(values)
+        return self
+
+    def execute(self):
+        return SimpleNamespace(data=self.rows)
+
+
+class FakeDB:
+    def __init__(self, **tables):
+        self.tables = {
+            name: SimpleNamespace(rows=rows, deleted=[]) for name, rows in tables.items()
+        }
+
+    def table(self, name):
+        return FakeQuery(self.tables[name])
+
+
+@pytest.fixture
+def main(monkeypatch):
+    pytest.importorskip("supabase")
+    monkeypatch.setenv("SUPABASE_URL", "http://localhost:1")
+    monkeypatch.setenv("SUPABASE_SERVICE_KEY", "test")
+    main = importlib.import_module("scraper.main")
+    monkeypatch.setattr(matcher, "ItemIndex", lambda: ITEMS)
+    state = {"matcher": {"items_version": ITEMS.version}}
+    monkeypatch.setattr(main, "_get_state", state.get)
+    monkeypatch.setattr(main, "_set_state", state.__setitem__)
+    return main
+
+
+def test_rematch_products_deletes_orphaned_matches(main, monkeypatch):
+    products = [dict(p, id=f"p-{p['product_id']}") for p in CATALOGUE[:3]]
+    stored = _stored()
+    db = FakeDB(products=products, product_matches=list(stored.values()))
+    upserts = []
+    monkeypatch.setattr(main, "db", db)
+    monkeypatch.setattr(main, "writer", SimpleNamespace(
+        upsert=lambda table, rows, on_conflict=None: upserts.append((table, rows))
+    ))
+
+    assert main._rematch_products() == 1
+
+    assert db.tables["product_matches"].deleted == ["m-w2"]
+    [(table, rows)] = upserts
+    assert table == "product_matches"
+    assert [(r["product_id"], r["counterpart_id"]) for r in rows] == [("c2", None)]
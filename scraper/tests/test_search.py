@@ -0,0 +1,63 @@
+"""
+scraper.search.normalize and its SQL twin, search_normalize() (migration 014).
+Both are checked against NORMALIZE_CASES; the SQL side runs only when
+SUPABASE_URL and SUPABASE_SERVICE_KEY point at a migrated database.
+"""
+
+import os
+
+import pytest
+
+from scraper.search import normalize, search_key
+
+NORMALIZE_CASES = [
+    (None, ""),
+    ("", ""),
+    ("Coles Full Cream Milk 2 Litre", "coles full cream milk 2l"),
+    ("Pauls Smarter White Milk 1,000 mL", "pauls smarter white milk 1l"),
+    ("Sprite 1250ml", "sprite 1.25l"),
+    ("Bega Cheese 500 Grams", "bega cheese 500g"),
+    ("Potatoes 2000g", "potatoes 2kg"),
+    ("Rice 10 kgs", "rice 10kg"),
+    ("Kellogg's Corn Flakes 380g", "kelloggs corn flakes 380g"),
+    ("Arnott’s Tim Tam Original 200g", "arnotts tim tam original 200g"),
+    ("Fish & Chips", "fish and chips"),
+    ("Crème Brûlée 2 x 100g", "creme brulee 2 x 100g"),
+    ("Coca-Cola Classic Soft Drink Cans 24 Pack 375mL", "coca cola classic soft drink cans 24pk 375ml"),
+    ("Eggs 12 pack of free range", "eggs 12pk of free range"),
+    ("Mount Franklin Water 1.50 Litres", "mount franklin water 1.5l"),
+    ("Olive Oil 0.75 L", "olive oil 0.75l"),
+    ("Water 10,000 mL", "water 10l"),
+    ("Bulk Flour 1,500,000 g", "bulk flour 1500kg"),
+    ("Tank 1000000 L", "tank 1e 06l"),
+    ("Vitamin C 0.00001g", "vitamin c 1e 05g"),
+    ("Pringles 134G...", "pringles 134g"),
+    ("v2.5l ...dots... 3.", "v2.5l dots 3"),
+    ("Price 1,23 and 12,345,6789", "price 1 23 and 12345 6789"),
+    ("  Mixed   CASE\tand\nspaces  ", "mixed case and spaces"),
+    ("500ml2l", "500ml2l"),
+    ("Fish 0g", "fish 0g"),
+]
+
+
+@pytest.mark.parametrize("text,expected", NORMALIZE_CASES)
+def test_normalize(text, expected):
+    assert normalize(text) == expected
+
+
+def test_search_key_drops_brand_and_adds_size():
+    assert search_key("Coles Full Cream Milk 2 Litre", "Coles") == "full cream milk 2l"
+    assert search_key("Bread", "Tip Top", "700 Grams") == "bread 700g"
+    assert search_key("Coles", "Coles") == "coles"
+
+
+@pytest.mark.skipif(
+    not (os.environ.get("SUPABASE_URL") and os.environ.get("SUPABASE_SERVICE_KEY")),
+    reason="needs a migrated Supabase database",
+)
+@pytest.mark.parametrize("text,expected", NORMALIZE_CASES)
+def test_sql_normalize_matches(text, expected):
+    from supabase import create_client
+
+    db = create_client(os.environ["SUPABASE_URL"], os.environ["SUPABASE_SERVICE_KEY"])
+    assert db.rpc("search_normalize", {"p_text": text}).execute().data == expected
@@ -0,0 +1,64 @@
+"""
+Woolworths browse API fetches against the conditional-request cache.
+"""
+
+import json
+
+from scraper import woolworths
+
+CATEGORY = {"id": "1_DEB537E", "name": "Bakery", "url": "/shop/browse/bakery"}
+DATA = {"TotalRecordCount": 1, "Bundles": [{"Products": [{"Stockcode": 1, "Name": "Bread"}]}]}
+
+
+class FakePage:
+    """Answers page.evaluate (the in-browser fetch) with canned results."""
+
+    def __init__(self, *results):
+        self.results = list(results)
+        self.scripts = []
+
+    def evaluate(self, js):
+        self.scripts.append(js)
+        return self.results.pop(0)
+
+
+def test_browse_page_304_reuses_parse(http_cache, monkeypatch):
+    body = json.dumps(DATA)
+    parses = []
+    parse = woolworths._parse_browse
+
+    def counting(s):
+        parses.append(s)
+        return parse(s)
+
+    monkeypatch.setattr(woolworths, "_parse_browse", counting)
+
+    page = FakePage({"status": 200, "body": body, "etag": '"v1"', "lastModified": None})
+    assert woolworths._fetch_browse_page(page, CATEGORY, 1, True) == DATA
+    assert len(parses) == 1
+
+    # Next run: the page is revalidated and its stored parse reused
+    http_cache._entries.clear()
+    page = FakePage({"status": 304, "body": "", "etag": None, "lastModified": None})
+    assert woolworths._fetch_browse_page(page, CATEGORY, 1, True) == DATA
+    assert '"If-None-Match": "\\"v1\\""' in page.scripts[0]
+    assert len(parses) == 1
+    assert http_cache._stats["parses_saved"] == 1
+
+
+def _browse_page(codes, total):
+    bundles = [{"Products": [{"Stockcode": c, "Name": f"Product {c}", "Price": 1.0}]} for c in codes]
+    return {"status": 200, "body": json.dumps({"TotalRecordCount": total, "Bundles": bundles})}
+
+
+def test_resumed_category_stops_at_total(http_cache, monkeypatch):
+    monkeypatch.setattr(woolworths, "stealth_delay", lambda *a, **kw: None)
+    monkeypatch.setattr(woolworths, "session_break", lambda *a, **kw: None)
+
+    # Pages 1 and 2 (products 0-5) were persisted by the failed run
+    page = FakePage(_browse_page([6, 7], 8))
+    progress = {}
+    pages = woolworths._iter_category(page, CATEGORY, 10, is_special=False, start_page=3, found=6, progress=progress)
+    assert [page_num for _, page_num, _ in pages] == [3]
+    assert len(page.scripts) == 1  # no extra fetch past the last page
+    assert progress["found"] == 8
@@ -0,0 +1,146 @@
+"""
+Bulk writer: byte-bounded batching, retries and close.
+"""
+
+import json
+import threading
+
+import httpx
+import pytest
+
+from scraper import writer
+from scraper.writer import BulkWriter, WriteError
+
+
+def _writer(handler, **kwargs) -> BulkWriter:
+    """A writer whose requests go to `handler` instead of the network."""
+    w = BulkWriter("http://supabase.test", "key", **kwargs)
+    w._client.close()
+    w._client = httpx.Client(transport=httpx.MockTransport(handler))
+    return w
+
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    monkeypatch.setattr(writer.time, "sleep", lambda s: None)
+
+
+def _rows(n: int, pad: int = 0):
+    return [{"id": i, "name": "x" * pad} for i in range(n)]
+
+
+def test_batches_split_at_byte_limit():
+    bodies = []
+
+    def handler(request):
+        bodies.append(request.content)
+        return httpx.Response(201)
+
+    row_bytes = len(json.dumps(_rows(1, pad=100)[0], separators=(",", ":")))
+    w = _writer(handler, max_in_flight=1, max_batch_bytes=3 * row_bytes + 10)
+    try:
+        assert w.insert("specials", _rows(7, pad=100)) == 7
+    finally:
+        w.close()
+
+    assert [len(json.loads(b)) for b in bodies] == [3, 3, 1]
+    assert all(len(b) <= w.max_batch_bytes for b in bodies)
+    assert [r["id"] for b in bodies for r in json.loads(b)] == list(range(7))
+    assert w.stats["batches"] == 3 and w.stats["rows"] == 7
+
+
+def test_payload_too_large_halves_the_batch():
+    sizes = []
+
+    def handler(request):
+        n = len(json.loads(request.content))
+        sizes.append(n)
+        return httpx.Response(413 if n > 2 else 201)
+
+    w = _writer(handler, max_in_flight=1)
+    try:
+        assert w.upsert("products", _rows(4), on_conflict="id") == 4
+    finally:
+        w.close()
+
+    assert sizes == [4, 2, 2]
+    assert w.stats["splits"] == 1
+
+
+def test_retries_server_errors_then_succeeds():
+    statuses = iter([503, 502, 201])
+
+    w = _writer(lambda request: httpx.Response(next(statuses)), max_in_flight=1)
+    try:
+        assert w.insert("specials", _rows(2)) == 2
+    finally:
+        w.close()
+
+    assert w.stats["retries"] == 2
+
+
+def test_gives_up_after_max_retries():
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        return httpx.Response(500, text="boom")
+
+    w = _writer(handler, max_in_flight=1, max_retries=2)
+    try:
+        with pytest.raises(WriteError, match="after 2 retries"):
+            w.insert("specials", _rows(2))
+    finally:
+        w.close()
+
+    assert len(calls) == 3
+    assert w.stats["rows"] == 0
+
+
+def test_client_errors_are_not_retried():
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        return httpx.Response(400, text="bad column")
+
+    w = _writer(handler, max_in_flight=1)
+    try:
+        with pytest.raises(WriteError, match="HTTP 400"):
+            w.insert("specials", _rows(1))
+    finally:
+        w.close()
+
+    assert len(calls) == 1
+
+
+def test_close_flushes_in_flight_batches_before_closing_client():
+    release = threading.Event()
+    in_flight = threading.Semaphore(0)
+    events = []
+
+    def handler(request):
+        in_flight.release()
+        release.wait(5)
+        events.append("sent")
+        return httpx.Response(201)
+
+    w = _writer(handler, max_in_flight=2, max_batch_rows=1)
+    real_close = w._client.close
+    w._client.close = lambda: (events.append("client closed"), real_close())
+
+    result = {}
+    write = threading.Thread(target=lambda: result.update(n=w.insert("specials", _rows(2))))
+    write.start()
+    assert in_flight.acquire(timeout=5) and in_flight.acquire(timeout=5)
+    closer = threading.Thread(target=w.close)
+    closer.start()
+
+    closer.join(0.2)
+    assert closer.is_alive()
+    release.set()
+    write.join(5)
+    closer.join(5)
+
+    assert result["n"] == 2
+    assert events == ["sent", "sent", "client closed"]
@@ -6,20 +6,28 @@ with pagination to fetch specials and/or full catalogue.
 
 import json
 import os
-from typing import List, Optional
+from contextlib import contextmanager
+from typing import Iterator, List, Optional, Tuple
 
+from scraper import httpcache, replay
+from scraper.checkpoint import Checkpoint
 from scraper.logger import get_logger, gha_warning, gha_error
+from scraper.metrics import metrics
+from scraper.products import Product, ProductBatch
 from scraper.stealth import (
     stealth_delay,
     session_break,
     create_stealth_context,
     bot_challenge_detected,
+    LEAN_BROWSER,
+    describe_lean,
 )
 
 log = get_logger("woolworths")
 
 IMAGE_CDN = "https://cdn0.woolworths.media/content/wowproductimages/medium"
-BASE_URL = "https://www.woolworths.com.au"
+HOST = "www.woolworths.com.au"
+BASE_URL = f"https://{HOST}"
 
 SPECIALS_CATEGORIES = [
     {"id": "specialsgroup.3676", "name": "Half Price", "url": "/shop/browse/specials/half-price"},
@@ -45,7 +53,7 @@ _GROCERY_DEPARTMENTS = {
 SESSION_BREAK_EVERY = 10  # pages between session breaks
 
 
-def _parse_product(p: dict, category_name: str) -> Optional[dict]:
+def _parse_product(p: dict, category_name: str) -> Optional[Product]:
     """Parse a single Woolworths product from the browse API response.
     Returns None for marketplace/third-party items.
     """
@@ -78,20 +86,20 @@ def _parse_product(p: dict, category_name: str) -> Optional[dict]:
     category = _extract_category(attrs) or category_name
     brand = p.get("Brand")
 
-    return {
-        "store": "woolworths",
-        "product_id": str(stockcode or ""),
-        "name": p.get("DisplayName") or p.get("Name", ""),
-        "brand": brand,
-        "category": category,
-        "current_price": float(price),
-        "original_price": float(was_price) if was_price and was_price > 0 else None,
-        "discount_pct": discount_pct if discount_pct > 0 else None,
-        "image_url": image_url,
-        "product_url": f"{BASE_URL}/shop/productdetails/{stockcode}" if stockcode else None,
-        "special_type": special_type,
-        "size": p.get("PackageSize"),
-    }
+    return Product(
+        store="woolworths",
+        product_id=str(stockcode or ""),
+        name=p.get("DisplayName") or p.get("Name", ""),
+        brand=brand,
+        category=category,
+        current_price=float(price),
+        original_price=float(was_price) if was_price and was_price > 0 else None,
+        discount_pct=discount_pct if discount_pct > 0 else None,
+        image_url=image_url,
+        product_url=f"{BASE_URL}/shop/productdetails/{stockcode}" if stockcode else None,
+        special_type=special_type,
+        size=p.get("PackageSize"),
+    )
 
 
 def _extract_category(attrs: dict) -> Optional[str]:
@@ -116,18 +124,42 @@ def _extract_category(attrs: dict) -> Optional[str]:
     return None
 
 
+def _parse_browse(body: str) -> dict:
+    with metrics.span("woolworths.parse"):
+        return json.loads(body)
+
+
 def _fetch_browse_page(page, category: dict, page_num: int, is_special: bool) -> Optional[dict]:
-    """Call the Woolworths browse API for a single page."""
+    """Call the Woolworths browse API for a single page.
+
+    Sends cached ETag/Last-Modified validators; a 304 reuses the cached body and
+    its parse.
+    """
     cat_id = category["id"]
     cat_name = category["name"]
     cat_url = category["url"]
 
+    api_url = f"{BASE_URL}/apis/ui/browse/category"
+    archive_key = json.dumps({"categoryId": cat_id, "pageNumber": page_num, "isSpecial": is_special})
+    if replay.REPLAY:
+        body = replay.load(api_url, archive_key)
+        if body is None:
+            return None
+        metrics.count("pages")
+        return json.loads(body)
+
+    request_headers = {
+        "Content-Type": "application/json",
+        "Accept": "application/json",
+        **httpcache.conditional_headers(api_url, archive_key),
+    }
+
     js = f"""
     (async () => {{
         const r = await fetch("/apis/ui/browse/category", {{
             method: "POST",
             credentials: "include",
-            headers: {{"Content-Type": "application/json", "Accept": "application/json"}},
+            headers: {json.dumps(request_headers)},
             body: JSON.stringify({{
                 categoryId: "{cat_id}",
                 pageNumber: {page_num},
@@ -140,69 +172,107 @@ def _fetch_browse_page(page, category: dict, page_num: int, is_special: bool) ->
             }})
         }});
         const t = await r.text();
-        return {{status: r.status, body: t}};
+        return {{
+            status: r.status, body: t,
+            etag: r.headers.get("etag"), lastModified: r.headers.get("last-modified"),
+        }};
     }})()
     """
 
     try:
-        result = page.evaluate(js)
+        with metrics.span("woolworths.fetch"):
+            result = page.evaluate(js)
     except Exception as e:
         log.error(f"{cat_name} page {page_num}: evaluate error: {e}")
         return None
 
-    if result.get("status") != 200:
+    body = result.get("body")
+    if result.get("status") == 304:
+        body = httpcache.not_modified(api_url, archive_key)
+    elif result.get("status") == 200:
+        httpcache.store(
+            api_url, {"etag": result.get("etag"), "last-modified": result.get("lastModified")},
+            body, body=archive_key,
+        )
+
+    if body is None or result.get("status") not in (200, 304):
         log.warning(f"{cat_name} page {page_num}: HTTP {result.get('status')}")
         return None
 
-    try:
-        return json.loads(result["body"])
-    except json.JSONDecodeError:
-        log.error(f"{cat_name} page {page_num}: invalid JSON response")
-        return None
+    metrics.count("pages")
+    metrics.count("bytes", len(body) if result.get("status") == 200 else 0)
+    data = httpcache.parsed(api_url, archive_key)
+    if data is None:
+        try:
+            data = _parse_browse(body)
+        except json.JSONDecodeError:
+            log.error(f"{cat_name} page {page_num}: invalid JSON response")
+            return None
+        httpcache.store_parsed(api_url, data, archive_key)
+    replay.record(api_url, body, archive_key)
+    return data
 
 
-def _scrape_category(
+def _iter_category(
     page, category: dict, max_pages: int,
     is_special: bool = True,
     delay_min: float = 30.0, delay_max: float = 90.0,
-) -> List[dict]:
-    """Scrape all products in a category using the browse API with stealth delays."""
-    products = []
-    seen_ids: set = set()
+    seen_ids: Optional[set] = None,
+    start_page: int = 1,
+    found: int = 0,
+    progress: Optional[dict] = None,
+):
+    """Scrape a category via the browse API with stealth delays, yielding each page's new products.
+
+    Products already in `seen_ids` (shared across categories) are not yielded again.
+    A resumed crawl passes the products `found` on the pages before `start_page`;
+    the running count is kept in `progress["found"]` as each page is yielded.
+    Returns True once the category is exhausted, False if a page fetch failed.
+    """
+    cat_seen: set = set()
+    if seen_ids is None:
+        seen_ids = set()
+    if progress is None:
+        progress = {}
     cat_name = category["name"]
     pages_since_break = 0
 
-    for page_num in range(1, max_pages + 1):
+    for page_num in range(start_page, max_pages + 1):
         data = _fetch_browse_page(page, category, page_num, is_special)
         if data is None:
-            break
+            return False
 
         total = data.get("TotalRecordCount", 0)
         bundles = data.get("Bundles", [])
 
-        new_count = 0
+        products = ProductBatch()
         for bundle in bundles:
             for raw_product in bundle.get("Products", []):
                 parsed = _parse_product(raw_product, cat_name)
-                if parsed and parsed["product_id"] not in seen_ids:
-                    seen_ids.add(parsed["product_id"])
+                if parsed:
                     products.append(parsed)
-                    new_count += 1
+        metrics.count("products", len(products))
+        new_products = products.new(cat_seen)
+        found += len(new_products)
 
-        log.info(f"{cat_name} p{page_num}: +{new_count} ({len(products)}/{total})")
+        log.info(f"{cat_name} p{page_num}: +{len(new_products)} ({found}/{total})")
+        fresh = new_products.new(seen_ids)
+        if fresh:
+            progress["found"] = found
+            yield category["id"], page_num, fresh
 
-        if len(products) >= total or new_count == 0:
+        if found >= total or not new_products:
             break
 
         if page_num < max_pages:
             pages_since_break += 1
             if pages_since_break >= SESSION_BREAK_EVERY:
-                session_break(2.0, 5.0, label=f"{cat_name} session break")
+                session_break(2.0, 5.0, label=f"{cat_name} session break", host=HOST)
                 pages_since_break = 0
             else:
-                stealth_delay(delay_min, delay_max, label=f"{cat_name} p{page_num}")
+                stealth_delay(delay_min, delay_max, label=f"{cat_name} p{page_num}", host=HOST)
 
-    return products
+    return True
 
 
 def _launch_browser_and_session(playwright, session_url: str):
@@ -218,8 +288,9 @@ def _launch_browser_and_session(playwright, session_url: str):
     page = ctx.new_page()
 
     log.info(f"Establishing session via {session_url} ...")
-    page.goto(f"{BASE_URL}{session_url}", wait_until="domcontentloaded", timeout=30000)
-    page.wait_for_timeout(6000)
+    with metrics.span("woolworths.render"):
+        page.goto(f"{BASE_URL}{session_url}", wait_until="domcontentloaded", timeout=30000)
+        _wait_for_session(page, 6000)
 
     if bot_challenge_detected(page):
         log.error("BLOCKED by Woolworths. Try again later.")
@@ -231,79 +302,129 @@ def _launch_browser_and_session(playwright, session_url: str):
     return browser, ctx, page
 
 
-def scrape_woolworths(max_pages_per_category: int = 50) -> List[dict]:
-    """Scrape Woolworths specials with stealth delays."""
+def _wait_for_session(page, timeout_ms: int):
+    """Let the session page settle. Lean mode waits for the network to go idle
+    (trackers and images are blocked, so it does quickly), capped at the old fixed wait."""
+    if not LEAN_BROWSER:
+        page.wait_for_timeout(timeout_ms)
+        return
+    try:
+        page.wait_for_load_state("networkidle", timeout=timeout_ms)
+    except Exception:
+        log.debug("Session page still busy after the wait ceiling, continuing")
+
+
+@contextmanager
+def _browse_session(session_url: str):
+    """Yield a page with an established session (None if blocked), or the offline placeholder in replay mode."""
+    if replay.REPLAY:
+        yield replay.OFFLINE_PAGE
+        return
+
     from playwright.sync_api import sync_playwright
 
-    all_products = []
+    with sync_playwright() as p:
+        browser, ctx, page = _launch_browser_and_session(p, session_url)
+        try:
+            yield page
+        finally:
+            if browser:
+                browser.close()
+                if LEAN_BROWSER:
+                    log.info(describe_lean())
+
+
+def iter_woolworths(max_pages_per_category: int = 50) -> Iterator[Tuple[str, int, ProductBatch]]:
+    """Scrape Woolworths specials with stealth delays.
+
+    Yields (category_id, page_num, new_products) per page, deduplicated across categories.
+    """
     seen_ids: set = set()
 
-    with sync_playwright() as p:
-        browser, ctx, page = _launch_browser_and_session(
-            p, "/shop/browse/specials/half-price"
-        )
-        if not browser:
-            return []
+    with _browse_session("/shop/browse/specials/half-price") as page:
+        if not page:
+            return
 
         for category in SPECIALS_CATEGORIES:
             log.info(f"Scraping specials: {category['name']} ...")
-            cat_products = _scrape_category(
+            yield from _iter_category(
                 page, category, max_pages_per_category,
                 is_special=True, delay_min=30.0, delay_max=90.0,
+                seen_ids=seen_ids,
             )
-            for cp in cat_products:
-                if cp["product_id"] not in seen_ids:
-                    seen_ids.add(cp["product_id"])
-                    all_products.append(cp)
 
             if category != SPECIALS_CATEGORIES[-1]:
-                session_break(1.0, 3.0, label="between specials categories")
+                session_break(1.0, 3.0, label="between specials categories", host=HOST)
+
+    log.info(f"Specials done: {len(seen_ids)} products")
 
-        browser.close()
 
-    log.info(f"Specials done: {len(all_products)} products")
-    return all_products
+def scrape_woolworths(max_pages_per_category: int = 50) -> ProductBatch:
+    """Scrape Woolworths specials with stealth delays."""
+    products = ProductBatch()
+    for _, _, batch in iter_woolworths(max_pages_per_category):
+        products.extend(batch)
+    return products
 
 
-def scrape_woolworths_catalogue(
+def iter_woolworths_catalogue(
     categories: Optional[List[dict]] = None,
     max_pages_per_category: int = 100,
-) -> List[dict]:
-    """Scrape full product catalogue for the given categories."""
-    from playwright.sync_api import sync_playwright
+    checkpoint: Optional[Checkpoint] = None,
+) -> Iterator[Tuple[str, int, ProductBatch]]:
+    """Scrape full product catalogue for the given categories.
 
+    Yields (category_id, page_num, new_products) per page, deduplicated across categories.
+    With a checkpoint, finished categories are skipped, partly done ones resume at
+    their next page, and each page is recorded once the caller has consumed it.
+    """
     if categories is None:
         categories = CATALOGUE_CATEGORIES
 
-    all_products = []
-    seen_ids: set = set()
+    seen_ids: set = checkpoint.seen_ids if checkpoint else set()
 
-    with sync_playwright() as p:
-        first_url = categories[0]["url"] if categories else "/shop/browse/pantry"
-        browser, ctx, page = _launch_browser_and_session(p, first_url)
-        if not browser:
-            return []
+    first_url = categories[0]["url"] if categories else "/shop/browse/pantry"
+    with _browse_session(first_url) as page:
+        if not page:
+            return
 
         for i, category in enumerate(categories):
-            log.info(f"Catalogue [{i+1}/{len(categories)}]: {category['name']} ...")
-            cat_products = _scrape_category(
+            if checkpoint and checkpoint.is_done(category["id"]):
+                log.info(f"Catalogue [{i+1}/{len(categories)}]: {category['name']} done in previous run, skipping")
+                continue
+
+            start_page = checkpoint.next_page(category["id"]) if checkpoint else 1
+            resume_note = f" (resuming at p{start_page})" if start_page > 1 else ""
+            log.info(f"Catalogue [{i+1}/{len(categories)}]: {category['name']} ...{resume_note}")
+            before = len(seen_ids)
+            progress: dict = {}
+            pages = _iter_category(
                 page, category, max_pages_per_category,
                 is_special=False, delay_min=45.0, delay_max=120.0,
+                seen_ids=seen_ids, start_page=start_page,
+                found=checkpoint.found(category["id"]) if checkpoint else 0, progress=progress,
             )
-            for cp in cat_products:
-                if cp["product_id"] not in seen_ids:
-                    seen_ids.add(cp["product_id"])
-                    all_products.append(cp)
+            complete = yield from (checkpoint.track(pages, progress) if checkpoint else pages)
+            if checkpoint and complete:
+                checkpoint.mark_done(category["id"])
 
-            log.info(f"  {category['name']}: {len(cat_products)} products")
+            log.info(f"  {category['name']}: {len(seen_ids) - before} products")
 
             if i < len(categories) - 1:
-                session_break(3.0, 7.0, label=f"between categories ({category['name']})")
+                session_break(3.0, 7.0, label=f"between categories ({category['name']})", host=HOST)
+
+    log.info(f"Catalogue done: {len(seen_ids)} products across {len(categories)} categories")
 
-        browser.close()
 
-    log.info(f"Catalogue done: {len(all_products)} products across {len(categories)} categories")
-    return all_products
+def scrape_woolworths_catalogue(
+    categories: Optional[List[dict]] = None,
+    max_pages_per_category: int = 100,
+) -> ProductBatch:
+    """Scrape full product catalogue for the given categories."""
+    products = ProductBatch()
+    for _, _, batch in iter_woolworths_catalogue(categories, max_pages_per_category):
+        products.extend(batch)
+    return products
 
 
 if __name__ == "__main__":
@@ -315,4 +436,4 @@ if __name__ == "__main__":
         products = scrape_woolworths(max_pages_per_category=2)
     print(f"\nGot {len(products)} products")
     for p in products[:5]:
-        print(f"  {p['name']} | ${p['current_price']} (was ${p.get('original_price', 'N/A')})")
+        print(f"  {p.name} | ${p.current_price} (was ${p.original_price or 'N/A'})")
@@ -0,0 +1,175 @@
+"""
+Pooled bulk writer for Supabase (PostgREST).
+Splits rows into byte-bounded batches and sends them concurrently over one
+keep-alive httpx client, retrying 5xx responses and timeouts with backoff.
+"""
+
+import json
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional
+
+import httpx
+
+from scraper.logger import get_logger
+from scraper.metrics import metrics
+
+log = get_logger("writer")
+
+MAX_IN_FLIGHT = 4                 # concurrent batches per writer
+MAX_BATCH_BYTES = 512 * 1024      # JSON payload ceiling per request
+MAX_BATCH_ROWS = 1000
+MAX_RETRIES = 4
+RETRY_BACKOFF = 1.0               # seconds, doubled per attempt
+
+
+class WriteError(RuntimeError):
+    """A batch could not be written after all retries."""
+
+
+class BulkWriter:
+    """Concurrent, retrying upsert/insert client for PostgREST tables."""
+
+    def __init__(
+        self,
+        url: str,
+        key: str,
+        max_in_flight: int = MAX_IN_FLIGHT,
+        max_batch_bytes: int = MAX_BATCH_BYTES,
+        max_batch_rows: int = MAX_BATCH_ROWS,
+        max_retries: int = MAX_RETRIES,
+        timeout: float = 60.0,
+    ):
+        self.base_url = f"{url.rstrip('/')}/rest/v1"
+        self.max_batch_bytes = max_batch_bytes
+        self.max_batch_rows = max_batch_rows
+        self.max_retries = max_retries
+        self.stats = {"rows": 0, "batches": 0, "bytes": 0, "retries": 0, "splits": 0}
+
+        self._lock = threading.Lock()
+        self._client = httpx.Client(
+            headers={
+                "apikey": key,
+                "Authorization": f"Bearer {key}",
+                "Content-Type": "application/json",
+            },
+            timeout=timeout,
+            limits=httpx.Limits(
+                max_connections=max_in_flight,
+                max_keepalive_connections=max_in_flight,
+            ),
+        )
+        self._pool = ThreadPoolExecutor(max_workers=max_in_flight, thread_name_prefix="writer")
+
+    def upsert(self, table: str, rows: List[dict], on_conflict: Optional[str] = None) -> int:
+        """Upsert rows (merge on `on_conflict`); blocks until every batch is written."""
+        params = {"on_conflict": on_conflict} if on_conflict else {}
+        return self._write(table, rows, params, "resolution=merge-duplicates,return=minimal")
+
+    def insert(self, table: str, rows: List[dict]) -> int:
+        """Insert rows; blocks until every batch is written."""
+        return self._write(table, rows, {}, "return=minimal")
+
+    def describe(self) -> str:
+        s = self.stats
+        return (
+            f"{s['rows']} rows in {s['batches']} batches, "
+            f"{s['bytes'] / 1024:.0f} KiB, {s['retries']} retries, {s['splits']} splits"
+        )
+
+    def close(self):
+        self._pool.shutdown(wait=True)
+        self._client.close()
+
+    # -- internals ----------------------------------------------------------
+
+    def _write(self, table: str, rows: List[dict], params: dict, prefer: str) -> int:
+        if not rows:
+            return 0
+
+        # Tell PostgREST the column set up front so it skips per-row key discovery
+        params = dict(params, columns=",".join(rows[0].keys()))
+
+        futures = [
+            self._pool.submit(self._send, table, parts, params, prefer)
+            for parts in self._batches(rows)
+        ]
+
+        written = 0
+        errors = []
+        for f in futures:
+            try:
+                written += f.result()
+            except Exception as e:
+                errors.append(e)
+        metrics.count("db_batches", len(futures))
+        metrics.count("db_rows", written)
+        if errors:
+            raise errors[0]
+        return written
+
+    def _batches(self, rows: List[dict]):
+        """Group encoded rows into batches bounded by payload bytes and row count."""
+        parts: List[bytes] = []
+        size = 2
+        for row in rows:
+            encoded = json.dumps(row, separators=(",", ":"), default=str).encode()
+            if parts and (size + len(encoded) + 1 > self.max_batch_bytes or len(parts) >= self.max_batch_rows):
+                yield parts
+                parts, size = [], 2
+            parts.append(encoded)
+            size += len(encoded) + 1
+        if parts:
+            yield parts
+
+    def _send(self, table: str, parts: List[bytes], params: dict, prefer: str) -> int:
+        """POST one batch, retrying with backoff. Oversized or timed-out batches are halved."""
+        body = b"[" + b",".join(parts) + b"]"
+        url = f"{self.base_url}/{table}"
+        error: Exception = WriteError(f"{table}: no attempt made")
+
+        for attempt in range(self.max_retries + 1):
+            try:
+                resp = self._client.post(url, content=body, params=params, headers={"Prefer": prefer})
+            except httpx.TimeoutException as e:
+                if len(parts) > 1:
+                    return self._split(table, parts, params, prefer, "timeout")
+                error = e
+            except httpx.TransportError as e:
+                error = e
+            else:
+                if resp.status_code < 300:
+                    with self._lock:
+                        self.stats["rows"] += len(parts)
+                        self.stats["batches"] += 1
+                        self.stats["bytes"] += len(body)
+                    return len(parts)
+                if resp.status_code == 413 and len(parts) > 1:
+                    return self._split(table, parts, params, prefer, "payload too large")
+                error = WriteError(f"{table}: HTTP {resp.status_code} {resp.text[:300]}")
+                if resp.status_code < 500:
+                    raise error
+
+            if attempt == self.max_retries:
+                break
+
+            delay = RETRY_BACKOFF * (2 ** attempt) * random.uniform(0.5, 1.5)
+            with self._lock:
+                self.stats["retries"] += 1
+            metrics.count("db_retries")
+            log.warning(f"{table}: {error}; retry {attempt + 1}/{self.max_retries} in {delay:.1f}s")
+            time.sleep(delay)
+
+        raise WriteError(f"{table}: batch of {len(parts)} rows failed after {self.max_retries} retries: {error}")
+
+    def _split(self, table: str, parts: List[bytes], params: dict, prefer: str, reason: str) -> int:
+        mid = len(parts) // 2
+        with self._lock:
+            self.stats["splits"] += 1
+        log.warning(f"{table}: {reason} on {len(parts)} rows, splitting batch")
+        return (
+            self._send(table, parts[:mid], params, prefer)
+            + self._send(table, parts[mid:], params, prefer)
+        )
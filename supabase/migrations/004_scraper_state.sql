@@ -0,0 +1,14 @@
+-- Scraper bookkeeping: small key/value state that must survive between runs,
+-- e.g. the per-store special_history watermark already folded into special_intel.
+
+CREATE TABLE IF NOT EXISTS scraper_state (
+  key TEXT PRIMARY KEY,
+  value JSONB,
+  updated_at TIMESTAMPTZ DEFAULT now()
+);
+
+-- Incremental intel looks up history rows touched since the watermark
+CREATE INDEX IF NOT EXISTS idx_history_store_last_seen ON special_history(store, last_seen);
+
+-- Service role only: no public read policy
+ALTER TABLE scraper_state ENABLE ROW LEVEL SECURITY;
@@ -0,0 +1,41 @@
+-- Set-based expiry archive: copy specials that are no longer on sale into
+-- special_history and delete them from specials in one call, instead of one
+-- DELETE round-trip per expired product.
+-- Returns row counts and server-side timing for each phase.
+
+CREATE OR REPLACE FUNCTION archive_expired_specials(
+  p_store TEXT,
+  p_current_ids TEXT[],
+  p_today DATE DEFAULT CURRENT_DATE
+)
+RETURNS TABLE (archived INT, deleted INT, archive_ms NUMERIC, delete_ms NUMERIC)
+LANGUAGE plpgsql
+AS $$
+DECLARE
+  t0 TIMESTAMPTZ;
+  t1 TIMESTAMPTZ;
+BEGIN
+  t0 := clock_timestamp();
+
+  INSERT INTO special_history (
+    store, product_id, name, current_price, original_price, discount_pct, first_seen, last_seen
+  )
+  SELECT s.store, s.product_id, s.name, s.current_price, s.original_price, s.discount_pct,
+         COALESCE(s.valid_from, p_today), p_today
+  FROM specials s
+  WHERE s.store = p_store
+    AND NOT (s.product_id = ANY (p_current_ids));
+  GET DIAGNOSTICS archived = ROW_COUNT;
+
+  t1 := clock_timestamp();
+  archive_ms := round((extract(epoch FROM t1 - t0) * 1000)::NUMERIC, 1);
+
+  DELETE FROM specials s
+  WHERE s.store = p_store
+    AND NOT (s.product_id = ANY (p_current_ids));
+  GET DIAGNOSTICS deleted = ROW_COUNT;
+
+  delete_ms := round((extract(epoch FROM clock_timestamp() - t1) * 1000)::NUMERIC, 1);
+  RETURN NEXT;
+END;
+$$;
@@ -0,0 +1,52 @@
+-- Server-side history recording for currently live specials.
+-- Takes the scraped batch as one JSON array. For each (store, product_id) it
+-- extends last_seen on the latest history row, or opens a new interval when
+-- the product has no history yet. Replaces downloading all of special_history
+-- and issuing id-chunked UPDATEs from the scraper.
+
+CREATE OR REPLACE FUNCTION record_special_history(
+  p_rows JSONB,
+  p_today DATE DEFAULT CURRENT_DATE
+)
+RETURNS TABLE (updated INT, inserted INT)
+LANGUAGE sql
+AS $$
+  WITH incoming AS (
+    SELECT DISTINCT ON (r.store, r.product_id) r.*
+    FROM jsonb_to_recordset(p_rows) AS r(
+      store TEXT,
+      product_id TEXT,
+      name TEXT,
+      current_price NUMERIC,
+      original_price NUMERIC,
+      discount_pct INT
+    )
+  ),
+  latest AS (
+    SELECT DISTINCT ON (h.store, h.product_id) h.id
+    FROM special_history h
+    JOIN incoming i ON i.store = h.store AND i.product_id = h.product_id
+    ORDER BY h.store, h.product_id, h.last_seen DESC
+  ),
+  upd AS (
+    UPDATE special_history h
+    SET last_seen = p_today
+    FROM latest l
+    WHERE h.id = l.id
+    RETURNING 1
+  ),
+  ins AS (
+    INSERT INTO special_history (
+      store, product_id, name, current_price, original_price, discount_pct, first_seen, last_seen
+    )
+    SELECT i.store, i.product_id, i.name, i.current_price, i.original_price, i.discount_pct,
+           p_today, p_today
+    FROM incoming i
+    WHERE NOT EXISTS (
+      SELECT 1 FROM special_history h
+      WHERE h.store = i.store AND h.product_id = i.product_id
+    )
+    RETURNING 1
+  )
+  SELECT (SELECT count(*) FROM upd)::INT, (SELECT count(*) FROM ins)::INT;
+$$;
@@ -0,0 +1,25 @@
+-- Change detection for catalogue ingest.
+-- content_hash fingerprints the scraped fields of a product (name, brand,
+-- category, price, image, URL). The scraper sends full upserts only for new or
+-- changed products and bumps last_seen for everything else with one call.
+
+ALTER TABLE products ADD COLUMN IF NOT EXISTS content_hash TEXT;
+
+CREATE OR REPLACE FUNCTION touch_products(
+  p_store TEXT,
+  p_product_ids TEXT[],
+  p_today DATE DEFAULT CURRENT_DATE
+)
+RETURNS INT
+LANGUAGE sql
+AS $$
+  WITH upd AS (
+    UPDATE products
+    SET last_seen = p_today
+    WHERE store = p_store
+      AND product_id = ANY (p_product_ids)
+      AND last_seen < p_today
+    RETURNING 1
+  )
+  SELECT count(*)::INT FROM upd;
+$$;
@@ -0,0 +1,91 @@
+-- Append-only price history for every product we observe (catalogue and specials).
+-- Prices are run-length encoded: one row per (store, product_id) interval at a
+-- constant price. Re-observing the same price extends to_date; a different
+-- price opens a new interval. Storage grows with price changes, not with runs.
+
+CREATE TABLE IF NOT EXISTS price_observations (
+  id BIGINT GENERATED ALWAYS AS IDENTITY PRIMARY KEY,
+  store TEXT NOT NULL,
+  product_id TEXT NOT NULL,
+  price DECIMAL(10,2) NOT NULL,
+  from_date DATE NOT NULL,
+  to_date DATE NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_price_obs_product ON price_observations(store, product_id, from_date DESC, id DESC);
+
+ALTER TABLE price_observations ENABLE ROW LEVEL SECURITY;
+
+CREATE POLICY "Public read price_observations" ON price_observations
+  FOR SELECT USING (true);
+
+-- Record one observation per row of p_rows ([{store, product_id, price}, ...]).
+CREATE OR REPLACE FUNCTION record_price_observations(
+  p_rows JSONB,
+  p_today DATE DEFAULT CURRENT_DATE
+)
+RETURNS TABLE (extended INT, opened INT)
+LANGUAGE sql
+AS $$
+  WITH incoming AS (
+    SELECT DISTINCT ON (r.store, r.product_id) r.*
+    FROM jsonb_to_recordset(p_rows) AS r(store TEXT, product_id TEXT, price NUMERIC)
+    WHERE r.price IS NOT NULL
+  ),
+  latest AS (
+    SELECT DISTINCT ON (o.store, o.product_id) o.id, o.store, o.product_id, o.price
+    FROM price_observations o
+    JOIN incoming i ON i.store = o.store AND i.product_id = o.product_id
+    ORDER BY o.store, o.product_id, o.from_date DESC, o.id DESC
+  ),
+  ext AS (
+    UPDATE price_observations o
+    SET to_date = GREATEST(o.to_date, p_today)
+    FROM latest l
+    JOIN incoming i ON i.store = l.store AND i.product_id = l.product_id
+    WHERE o.id = l.id AND l.price = i.price
+    RETURNING 1
+  ),
+  ins AS (
+    INSERT INTO price_observations (store, product_id, price, from_date, to_date)
+    SELECT i.store, i.product_id, i.price, p_today, p_today
+    FROM incoming i
+    LEFT JOIN latest l ON l.store = i.store AND l.product_id = i.product_id
+    WHERE l.id IS NULL OR l.price <> i.price
+    RETURNING 1
+  )
+  SELECT (SELECT count(*) FROM ext)::INT, (SELECT count(*) FROM ins)::INT;
+$$;
+
+-- Unchanged catalogue products (see 007) still count as a price observation:
+-- touch_products now also records their stored regular_price.
+CREATE OR REPLACE FUNCTION touch_products(
+  p_store TEXT,
+  p_product_ids TEXT[],
+  p_today DATE DEFAULT CURRENT_DATE
+)
+RETURNS INT
+LANGUAGE plpgsql
+AS $$
+DECLARE
+  touched INT;
+BEGIN
+  UPDATE products
+  SET last_seen = p_today
+  WHERE store = p_store
+    AND product_id = ANY (p_product_ids)
+    AND last_seen < p_today;
+  GET DIAGNOSTICS touched = ROW_COUNT;
+
+  PERFORM record_price_observations(
+    COALESCE((
+      SELECT jsonb_agg(jsonb_build_object('store', store, 'product_id', product_id, 'price', regular_price))
+      FROM products
+      WHERE store = p_store AND product_id = ANY (p_product_ids)
+    ), '[]'::jsonb),
+    p_today
+  );
+
+  RETURN touched;
+END;
+$$;
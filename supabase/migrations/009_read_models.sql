@@ -0,0 +1,75 @@
+-- Read models for the app, rebuilt by the scraper after each specials/intel run.
+-- specials_feed denormalises specials with their intel so every specials screen
+-- (browse, top discounts, rare deals, big savings, search) is one indexed query;
+-- category_counts replaces scanning every special for the category list.
+-- publish_read_models() refreshes both without blocking readers.
+
+CREATE MATERIALIZED VIEW IF NOT EXISTS specials_feed AS
+SELECT
+  s.id,
+  s.store,
+  s.product_id,
+  s.name,
+  s.brand,
+  s.category,
+  s.current_price,
+  s.original_price,
+  s.discount_pct,
+  (s.original_price - s.current_price) AS saving,
+  s.image_url,
+  s.product_url,
+  s.special_type,
+  s.valid_from,
+  s.valid_to,
+  s.scraped_at,
+  i.frequency_class,
+  i.avg_frequency_days,
+  i.expected_days_until_next,
+  i.total_times_on_special,
+  i.last_special_date
+FROM specials s
+LEFT JOIN special_intel i ON i.store = s.store AND i.product_id = s.product_id;
+
+-- Unique key: required by REFRESH ... CONCURRENTLY
+CREATE UNIQUE INDEX IF NOT EXISTS idx_feed_key ON specials_feed(store, product_id);
+CREATE INDEX IF NOT EXISTS idx_feed_discount ON specials_feed(discount_pct DESC NULLS LAST);
+CREATE INDEX IF NOT EXISTS idx_feed_store_discount ON specials_feed(store, discount_pct DESC NULLS LAST);
+CREATE INDEX IF NOT EXISTS idx_feed_category_discount ON specials_feed(category, discount_pct DESC NULLS LAST);
+CREATE INDEX IF NOT EXISTS idx_feed_rare ON specials_feed(discount_pct DESC NULLS LAST)
+  WHERE frequency_class = 'rare';
+CREATE INDEX IF NOT EXISTS idx_feed_saving ON specials_feed(discount_pct DESC NULLS LAST)
+  WHERE saving >= 3;
+
+-- One row per (store, category) plus store = 'all' totals
+CREATE MATERIALIZED VIEW IF NOT EXISTS category_counts AS
+SELECT store, category, count(*)::INT AS specials, max(discount_pct) AS max_discount_pct
+FROM specials
+WHERE category IS NOT NULL
+GROUP BY store, category
+UNION ALL
+SELECT 'all', category, count(*)::INT, max(discount_pct)
+FROM specials
+WHERE category IS NOT NULL
+GROUP BY category;
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_category_counts_key ON category_counts(store, category);
+
+-- Materialized views have no RLS; expose them read-only like the tables they derive from
+GRANT SELECT ON specials_feed, category_counts TO anon, authenticated;
+
+CREATE OR REPLACE FUNCTION publish_read_models()
+RETURNS TABLE (feed_rows INT, categories INT, refresh_ms NUMERIC)
+LANGUAGE plpgsql
+AS $$
+DECLARE
+  t0 TIMESTAMPTZ := clock_timestamp();
+BEGIN
+  REFRESH MATERIALIZED VIEW CONCURRENTLY specials_feed;
+  REFRESH MATERIALIZED VIEW CONCURRENTLY category_counts;
+
+  SELECT count(*)::INT INTO feed_rows FROM specials_feed;
+  SELECT count(*)::INT INTO categories FROM category_counts WHERE store = 'all';
+  refresh_ms := round((extract(epoch FROM clock_timestamp() - t0) * 1000)::NUMERIC, 1);
+  RETURN NEXT;
+END;
+$$;
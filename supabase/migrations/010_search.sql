@@ -0,0 +1,145 @@
+-- Indexed product search.
+-- search_key is the name as shoppers type it (lower-cased, brand removed, sizes
+-- spelled one way), written by the scraper at ingest (scraper/search.py).
+-- Trigram indexes serve substring matches on it; full-text indexes over brand
+-- and name serve word matches in any order. Search goes through the search_*
+-- functions below instead of ILIKE on name, which could only scan.
+
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+-- Query-side normalisation, close to scraper.search.normalize (no accent
+-- folding or unit conversion). Also used to backfill keys for rows written
+-- before this migration; the scraper replaces them as it sees each product.
+CREATE OR REPLACE FUNCTION search_normalize(p_text TEXT)
+RETURNS TEXT
+LANGUAGE sql
+IMMUTABLE
+AS $$
+  SELECT btrim(regexp_replace(regexp_replace(regexp_replace(regexp_replace(regexp_replace(regexp_replace(
+    lower(replace(coalesce(p_text, ''), '&', ' and ')),
+    '(\d)\s*(litres?|liters?|ltr|lt)\M', '\1l', 'g'),
+    '(\d)\s*(grams?|gm)\M', '\1g', 'g'),
+    '(\d)\s*(packs?|pk)\M', '\1pk', 'g'),
+    '(\d)\s+(ml|l|g|kg|pk)\M', '\1\2', 'g'),
+    '[^a-z0-9.]+', ' ', 'g'),
+    '\s+', ' ', 'g'));
+$$;
+
+ALTER TABLE specials ADD COLUMN IF NOT EXISTS search_key TEXT;
+ALTER TABLE products ADD COLUMN IF NOT EXISTS search_key TEXT;
+ALTER TABLE special_intel ADD COLUMN IF NOT EXISTS search_key TEXT;
+
+UPDATE specials SET search_key = search_normalize(name) WHERE search_key IS NULL;
+UPDATE products SET search_key = search_normalize(name) WHERE search_key IS NULL;
+UPDATE special_intel SET search_key = search_normalize(name) WHERE search_key IS NULL;
+
+CREATE INDEX IF NOT EXISTS idx_products_search_key ON products USING GIN (search_key gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_products_search_text ON products
+  USING GIN (to_tsvector('simple', coalesce(brand, '') || ' ' || name));
+CREATE INDEX IF NOT EXISTS idx_intel_search_key ON special_intel USING GIN (search_key gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_intel_search_text ON special_intel
+  USING GIN (to_tsvector('simple', name));
+
+-- specials_feed gains search_key: rebuild it as in 009 with the new column
+DROP MATERIALIZED VIEW IF EXISTS specials_feed;
+
+CREATE MATERIALIZED VIEW specials_feed AS
+SELECT
+  s.id,
+  s.store,
+  s.product_id,
+  s.name,
+  s.brand,
+  s.category,
+  s.current_price,
+  s.original_price,
+  s.discount_pct,
+  (s.original_price - s.current_price) AS saving,
+  s.image_url,
+  s.product_url,
+  s.special_type,
+  s.valid_from,
+  s.valid_to,
+  s.scraped_at,
+  s.search_key,
+  i.frequency_class,
+  i.avg_frequency_days,
+  i.expected_days_until_next,
+  i.total_times_on_special,
+  i.last_special_date
+FROM specials s
+LEFT JOIN special_intel i ON i.store = s.store AND i.product_id = s.product_id;
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_feed_key ON specials_feed(store, product_id);
+CREATE INDEX IF NOT EXISTS idx_feed_discount ON specials_feed(discount_pct DESC NULLS LAST);
+CREATE INDEX IF NOT EXISTS idx_feed_store_discount ON specials_feed(store, discount_pct DESC NULLS LAST);
+CREATE INDEX IF NOT EXISTS idx_feed_category_discount ON specials_feed(category, discount_pct DESC NULLS LAST);
+CREATE INDEX IF NOT EXISTS idx_feed_rare ON specials_feed(discount_pct DESC NULLS LAST)
+  WHERE frequency_class = 'rare';
+CREATE INDEX IF NOT EXISTS idx_feed_saving ON specials_feed(discount_pct DESC NULLS LAST)
+  WHERE saving >= 3;
+CREATE INDEX IF NOT EXISTS idx_feed_search_key ON specials_feed USING GIN (search_key gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_feed_search_text ON specials_feed
+  USING GIN (to_tsvector('simple', coalesce(brand, '') || ' ' || name));
+
+GRANT SELECT ON specials_feed TO anon, authenticated;
+
+-- Substring matches on the key rank first, then word matches; ties go to the
+-- closest key by trigram similarity.
+CREATE OR REPLACE FUNCTION search_specials(p_query TEXT, p_limit INT DEFAULT 50)
+RETURNS SETOF specials_feed
+LANGUAGE sql
+STABLE
+AS $$
+  SELECT f.*
+  FROM specials_feed f
+  WHERE search_normalize(p_query) <> ''
+    AND (
+      f.search_key LIKE '%' || search_normalize(p_query) || '%'
+      OR to_tsvector('simple', coalesce(f.brand, '') || ' ' || f.name)
+         @@ plainto_tsquery('simple', search_normalize(p_query))
+    )
+  ORDER BY
+    f.search_key LIKE '%' || search_normalize(p_query) || '%' DESC,
+    similarity(f.search_key, search_normalize(p_query)) DESC,
+    f.discount_pct DESC NULLS LAST
+  LIMIT p_limit;
+$$;
+
+CREATE OR REPLACE FUNCTION search_intel(p_query TEXT, p_limit INT DEFAULT 60)
+RETURNS SETOF special_intel
+LANGUAGE sql
+STABLE
+AS $$
+  SELECT i.*
+  FROM special_intel i
+  WHERE search_normalize(p_query) <> ''
+    AND (
+      i.search_key LIKE '%' || search_normalize(p_query) || '%'
+      OR to_tsvector('simple', i.name) @@ plainto_tsquery('simple', search_normalize(p_query))
+    )
+  ORDER BY
+    i.search_key LIKE '%' || search_normalize(p_query) || '%' DESC,
+    similarity(i.search_key, search_normalize(p_query)) DESC
+  LIMIT p_limit;
+$$;
+
+CREATE OR REPLACE FUNCTION search_products(p_query TEXT, p_store TEXT DEFAULT NULL, p_limit INT DEFAULT 50)
+RETURNS SETOF products
+LANGUAGE sql
+STABLE
+AS $$
+  SELECT p.*
+  FROM products p
+  WHERE search_normalize(p_query) <> ''
+    AND (p_store IS NULL OR p.store = p_store)
+    AND (
+      p.search_key LIKE '%' || search_normalize(p_query) || '%'
+      OR to_tsvector('simple', coalesce(p.brand, '') || ' ' || p.name)
+         @@ plainto_tsquery('simple', search_normalize(p_query))
+    )
+  ORDER BY
+    p.search_key LIKE '%' || search_normalize(p_query) || '%' DESC,
+    similarity(p.search_key, search_normalize(p_query)) DESC
+  LIMIT p_limit;
+$$;
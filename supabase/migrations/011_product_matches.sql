@@ -0,0 +1,29 @@
+-- Cross-store product matches, maintained by the scraper after each catalogue
+-- run (scraper/matcher.py). One row per catalogue product: the canonical staple
+-- it is (scraper/items.py) and its closest counterpart at the other store, with
+-- match scores in [0, 1]. fingerprint records the product fields the match was
+-- computed from, so re-matching skips products that have not changed.
+
+CREATE TABLE IF NOT EXISTS product_matches (
+  id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+  store TEXT NOT NULL,
+  product_id TEXT NOT NULL,
+  canonical_item TEXT,
+  item_score NUMERIC(4,3),
+  counterpart_store TEXT,
+  counterpart_id TEXT,
+  counterpart_score NUMERIC(4,3),
+  fingerprint TEXT NOT NULL,
+  matched_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+  UNIQUE(store, product_id)
+);
+
+CREATE INDEX IF NOT EXISTS idx_matches_item ON product_matches(canonical_item)
+  WHERE canonical_item IS NOT NULL;
+CREATE INDEX IF NOT EXISTS idx_matches_counterpart ON product_matches(counterpart_store, counterpart_id)
+  WHERE counterpart_id IS NOT NULL;
+
+ALTER TABLE product_matches ENABLE ROW LEVEL SECURITY;
+
+CREATE POLICY "Public read product_matches" ON product_matches
+  FOR SELECT USING (true);
@@ -0,0 +1,6 @@
+-- Intel reads special_history in (store, product_id, first_seen, id) keyset
+-- order (scraper/main.py _scan_history_groups). idx_history_product sorts by
+-- last_seen and stays for record_history; this index serves the scan's ORDER BY
+-- and cursor filter without a sort per page.
+
+CREATE INDEX IF NOT EXISTS idx_history_scan ON special_history(store, product_id, first_seen, id);
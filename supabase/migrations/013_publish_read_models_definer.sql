@@ -0,0 +1,26 @@
+-- publish_read_models() refreshes views owned by the migration role, which
+-- REFRESH requires of its caller: run it as its owner, with a fixed search_path
+-- so callers cannot shadow the views, and let only the scraper's service role
+-- call it (PostgREST would otherwise expose it to anon as /rpc/publish_read_models).
+
+CREATE OR REPLACE FUNCTION publish_read_models()
+RETURNS TABLE (feed_rows INT, categories INT, refresh_ms NUMERIC)
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+DECLARE
+  t0 TIMESTAMPTZ := clock_timestamp();
+BEGIN
+  REFRESH MATERIALIZED VIEW CONCURRENTLY specials_feed;
+  REFRESH MATERIALIZED VIEW CONCURRENTLY category_counts;
+
+  SELECT count(*)::INT INTO feed_rows FROM specials_feed;
+  SELECT count(*)::INT INTO categories FROM category_counts WHERE store = 'all';
+  refresh_ms := round((extract(epoch FROM clock_timestamp() - t0) * 1000)::NUMERIC, 1);
+  RETURN NEXT;
+END;
+$$;
+
+REVOKE EXECUTE ON FUNCTION publish_read_models() FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION publish_read_models() TO service_role;
@@ -0,0 +1,88 @@
+-- search_normalize() now mirrors scraper.search.normalize step for step, so
+-- queries normalised in the database match the keys the scraper writes: accents
+-- folded, apostrophes dropped, thousands separators removed and pack sizes
+-- spelled one way, with 1000 ml/g and up rewritten in l/kg ("1,000 mL" and
+-- "1 Litre" both become "1l"). scraper/tests/test_search.py checks both sides
+-- against the same cases.
+
+-- One size as _size_token writes it: canonical unit, and the value as Python's
+-- f"{value:g}" prints it. The arithmetic stays in double precision, and
+-- to_char's EEEE form rounds as C's %.5e does, so the six significant digits
+-- (and the exponent) come out as Python's.
+CREATE OR REPLACE FUNCTION search_size_token(p_value TEXT, p_unit TEXT)
+RETURNS TEXT
+LANGUAGE plpgsql
+IMMUTABLE
+AS $$
+DECLARE
+  v DOUBLE PRECISION;
+  u TEXT := CASE
+    WHEN p_unit IN ('ml', 'millilitre', 'millilitres') THEN 'ml'
+    WHEN p_unit IN ('g', 'gm', 'gram', 'grams') THEN 'g'
+    WHEN p_unit IN ('kg', 'kgs', 'kilo', 'kilos', 'kilogram', 'kilograms') THEN 'kg'
+    WHEN p_unit IN ('pk', 'pack', 'packs') THEN 'pk'
+    ELSE 'l'
+  END;
+  e TEXT;
+  x INT;
+BEGIN
+  BEGIN
+    v := p_value::DOUBLE PRECISION;
+  EXCEPTION WHEN numeric_value_out_of_range THEN
+    RETURN 'inf' || CASE u WHEN 'ml' THEN 'l' WHEN 'g' THEN 'kg' ELSE u END;
+  END;
+  IF u IN ('ml', 'g') AND v >= 1000 THEN
+    v := v / 1000;
+    u := CASE u WHEN 'ml' THEN 'l' ELSE 'kg' END;
+  END IF;
+  IF v = 0 THEN
+    RETURN '0' || u;
+  END IF;
+
+  e := btrim(to_char(v, '9.99999EEEE'));  -- e.g. "4.46419e+03"
+  x := split_part(e, 'e', 2)::INT;
+  IF x < -4 OR x >= 6 THEN
+    RETURN trim_scale(split_part(e, 'e', 1)::NUMERIC) || 'e' || split_part(e, 'e', 2) || u;
+  END IF;
+  RETURN trim_scale(e::NUMERIC) || u;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION search_normalize(p_text TEXT)
+RETURNS TEXT
+LANGUAGE plpgsql
+IMMUTABLE
+AS $$
+DECLARE
+  t TEXT := coalesce(p_text, '');
+BEGIN
+  -- ASCII-fold (NFKD, then drop whatever is not ASCII) and lower-case
+  t := lower(regexp_replace(normalize(t, NFKD), '[^\u0001-\u007f]', '', 'g'));
+  t := replace(replace(t, '&', ' and '), '''', '');
+  t := regexp_replace(t, '(?<=\d),(?=\d{3}\y)', '', 'g');
+
+  -- Sizes: mark each «value·unit», then rewrite the marks with search_size_token
+  t := regexp_replace(
+    t,
+    '\y(\d+(?:\.\d+)?)\s*'
+    '(ml|millilitres?|l|lt|ltr|litres?|liters?|g|gm|grams?|kg|kgs|kilos?|kilograms?|pk|packs?)\y',
+    '«\1·\2»', 'g'
+  );
+  SELECT string_agg(
+    CASE WHEN n = 1 THEN part
+    ELSE search_size_token(split_part(part, '·', 1), split_part(split_part(part, '·', 2), '»', 1))
+      || split_part(part, '»', 2)
+    END,
+    '' ORDER BY n
+  )
+  INTO t
+  FROM regexp_split_to_table(t, '«') WITH ORDINALITY AS s(part, n);
+
+  -- Words: runs of [a-z0-9.] with dots trimmed from their ends, single-spaced
+  SELECT coalesce(string_agg(btrim(w, '.'), ' ' ORDER BY n), '')
+  INTO t
+  FROM regexp_split_to_table(regexp_replace(t, '[^a-z0-9.]+', ' ', 'g'), ' ') WITH ORDINALITY AS s(w, n)
+  WHERE btrim(w, '.') <> '';
+  RETURN t;
+END;
+$$;
@@ -1,5 +1,9 @@
 import type { NextConfig } from "next";
 
-const nextConfig: NextConfig = {};
+// Static export to web/out (published by netlify.toml and deploy-web.yml);
+// every page is a client component reading Supabase or the /data snapshot.
+const nextConfig: NextConfig = {
+  output: "export",
+};
 
 export default nextConfig;
@@ -6,12 +6,14 @@ import { cn, formatPrice, computeVerdict, storeDisplayName, predictionText } fro
 import { VerdictCard, VerdictDot } from "@/components/verdict-card";
 import { ProductTile } from "@/components/product-tile";
 import { useWatchlist } from "@/hooks/use-my-list";
+import { type Special, type SpecialIntel } from "@/lib/supabase";
 import {
-  supabase,
-  type Special,
-  type SpecialIntel,
-} from "@/lib/supabase";
-import { searchAll, getBigDeals, type SearchResult } from "@/lib/queries";
+  searchAll,
+  getBigDeals,
+  getIntelForProducts,
+  getSpecialsForProducts,
+  type SearchResult,
+} from "@/lib/queries";
 
 const ONBOARDING_CATEGORIES = [
   { emoji: "🧴", label: "Dishwasher tablets", search: "dishwasher" },
@@ -44,23 +46,25 @@ export default function HomePage() {
   const inputRef = useRef<HTMLInputElement>(null);
   const debounceRef = useRef<NodeJS.Timeout>(null);
 
+  // Specials for the watchlist, intel for the watchlist and the big deals shown
   useEffect(() => {
     async function load() {
-      const [specialsRes, intelRes, deals] = await Promise.all([
-        supabase
-          .from("specials")
-          .select("*")
-          .order("discount_pct", { ascending: false }),
-        supabase.from("special_intel").select("*"),
-        getBigDeals(30),
+      const keys = watchlistItems.map((w) => ({ store: w.store, productId: w.productId }));
+      const deals = await getBigDeals(30);
+      const [watchedSpecials, itemIntel] = await Promise.all([
+        getSpecialsForProducts(keys),
+        getIntelForProducts([
+          ...keys,
+          ...deals.map((s) => ({ store: s.store, productId: s.product_id })),
+        ]),
       ]);
-      setSpecials(specialsRes.data ?? []);
-      setIntel(intelRes.data ?? []);
+      setSpecials(watchedSpecials);
+      setIntel(itemIntel);
       setBigDeals(deals);
       setLoading(false);
     }
     load();
-  }, []);
+  }, [watchlistItems]);
 
   const doSearch = useCallback(async (q: string) => {
     if (q.trim().length < 2) {
@@ -6,7 +6,8 @@ import { VerdictDot, VerdictCard } from "@/components/verdict-card";
 import { SwipeToRemove } from "@/components/swipe-to-remove";
 import { UndoToast } from "@/components/undo-toast";
 import { useWatchlist, type WatchlistItem } from "@/hooks/use-my-list";
-import { supabase, type Special, type SpecialIntel } from "@/lib/supabase";
+import { type Special, type SpecialIntel } from "@/lib/supabase";
+import { getIntelForProducts, getSpecialsForProducts } from "@/lib/queries";
 
 export default function WatchingPage() {
   const { items: watchlistItems, removeItem, addItem } = useWatchlist();
@@ -16,18 +17,20 @@ export default function WatchingPage() {
   const [expandedItem, setExpandedItem] = useState<string | null>(null);
   const [removedItem, setRemovedItem] = useState<WatchlistItem | null>(null);
 
+  // Fetch only the watched products; refetches when the list changes
   useEffect(() => {
     async function load() {
-      const [specialsRes, intelRes] = await Promise.all([
-        supabase.from("specials").select("*"),
-        supabase.from("special_intel").select("*"),
+      const keys = watchlistItems.map((w) => ({ store: w.store, productId: w.productId }));
+      const [watchedSpecials, watchedIntel] = await Promise.all([
+        getSpecialsForProducts(keys),
+        getIntelForProducts(keys),
       ]);
-      setSpecials(specialsRes.data ?? []);
-      setIntel(intelRes.data ?? []);
+      setSpecials(watchedSpecials);
+      setIntel(watchedIntel);
       setLoading(false);
     }
     load();
-  }, []);
+  }, [watchlistItems]);
 
   const getSpecial = (store: string, productId: string) =>
     specials.find((s) => s.store === store && s.product_id === productId) ?? null;
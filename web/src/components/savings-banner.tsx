@@ -5,7 +5,8 @@ import Link from "next/link";
 import { TrendingDown } from "lucide-react";
 import { formatPrice } from "@/lib/utils";
 import { useWatchlist } from "@/hooks/use-my-list";
-import { supabase, type Special } from "@/lib/supabase";
+import { type Special } from "@/lib/supabase";
+import { getSpecialsForProducts } from "@/lib/queries";
 
 export function SavingsBanner() {
   const { items: watchlistItems } = useWatchlist();
@@ -13,11 +14,10 @@ export function SavingsBanner() {
 
   useEffect(() => {
     if (watchlistItems.length === 0) return;
-    supabase
-      .from("specials")
-      .select("*")
-      .then(({ data }) => setSpecials(data ?? []));
-  }, [watchlistItems.length]);
+    getSpecialsForProducts(
+      watchlistItems.map((w) => ({ store: w.store, productId: w.productId }))
+    ).then(setSpecials);
+  }, [watchlistItems]);
 
   if (watchlistItems.length === 0) return null;
 
@@ -1,11 +1,20 @@
-import { supabase, type Special, type SpecialIntel } from "./supabase";
+import { supabase, type CategoryCount, type FeedSpecial, type SpecialIntel } from "./supabase";
+import { byDiscount, snapshotCategoryCounts, snapshotIntel, snapshotSpecials } from "./snapshot";
+
+// Specials screens read the specials_feed read model (specials joined with
+// intel, refreshed by the scraper after each run); each query is served by one
+// of its indexes. Where the static snapshot covers a query it is answered from
+// the CDN instead, and Supabase is only asked when the snapshot is unavailable.
 
 export async function getCurrentSpecials(
   store?: string,
   category?: string
-): Promise<Special[]> {
+): Promise<FeedSpecial[]> {
+  const cached = await snapshotSpecials(store, category);
+  if (cached) return cached.sort(byDiscount);
+
   let query = supabase
-    .from("specials")
+    .from("specials_feed")
     .select("*")
     .order("discount_pct", { ascending: false, nullsFirst: false });
 
@@ -16,36 +25,38 @@ export async function getCurrentSpecials(
   return data ?? [];
 }
 
-export async function getTopDiscounts(limit = 10): Promise<Special[]> {
-  const { data } = await supabase
-    .from("specials")
+export async function getTopDiscounts(limit = 10, store?: string): Promise<FeedSpecial[]> {
+  const cached = await snapshotSpecials(store);
+  if (cached) return cached.filter((s) => s.discount_pct !== null).sort(byDiscount).slice(0, limit);
+
+  let query = supabase
+    .from("specials_feed")
     .select("*")
     .not("discount_pct", "is", null)
     .order("discount_pct", { ascending: false })
     .limit(limit);
-  return data ?? [];
-}
 
-export async function getRareDeals(limit = 10): Promise<Special[]> {
-  const { data: intel } = await supabase
-    .from("special_intel")
-    .select("store, product_id")
-    .eq("is_on_special_now", true)
-    .eq("frequency_class", "rare");
+  if (store && store !== "all") query = query.eq("store", store);
 
-  if (!intel || intel.length === 0) return [];
+  const { data } = await query;
+  return data ?? [];
+}
 
-  const keys = intel.map((i) => `${i.store}:${i.product_id}`);
+export async function getRareDeals(limit = 10, store?: string): Promise<FeedSpecial[]> {
+  const cached = await snapshotSpecials(store);
+  if (cached) return cached.filter((s) => s.frequency_class === "rare").sort(byDiscount).slice(0, limit);
 
-  const { data } = await supabase
-    .from("specials")
+  let query = supabase
+    .from("specials_feed")
     .select("*")
-    .order("discount_pct", { ascending: false });
+    .eq("frequency_class", "rare")
+    .order("discount_pct", { ascending: false, nullsFirst: false })
+    .limit(limit);
+
+  if (store && store !== "all") query = query.eq("store", store);
 
-  if (!data) return [];
-  return data
-    .filter((s) => keys.includes(`${s.store}:${s.product_id}`))
-    .slice(0, limit);
+  const { data } = await query;
+  return data ?? [];
 }
 
 export async function getSpecialIntel(
@@ -61,35 +72,74 @@ export async function getSpecialIntel(
   return data;
 }
 
-export async function getIntelForProducts(
-  keys: { store: string; productId: string }[]
-): Promise<SpecialIntel[]> {
+type ProductKey = { store: string; productId: string };
+
+// PostgREST `or` filter with one (store, product_id IN ...) clause per store,
+// matched on the (store, product_id) key index.
+function keyFilter(keys: ProductKey[]): string {
+  const idsByStore = new Map<string, string[]>();
+  for (const k of keys) {
+    idsByStore.set(k.store, [...(idsByStore.get(k.store) ?? []), k.productId]);
+  }
+  return [...idsByStore]
+    .map(([store, ids]) => `and(store.eq.${store},product_id.in.(${ids.map((id) => `"${id}"`).join(",")}))`)
+    .join(",");
+}
+
+export async function getIntelForProducts(keys: ProductKey[]): Promise<SpecialIntel[]> {
   if (keys.length === 0) return [];
 
-  const { data } = await supabase.from("special_intel").select("*");
-  if (!data) return [];
+  const cached = await snapshotIntel(keys);
+  if (cached) return cached;
 
-  const keySet = new Set(keys.map((k) => `${k.store}:${k.productId}`));
-  return data.filter((d) => keySet.has(`${d.store}:${d.product_id}`));
+  const { data } = await supabase.from("special_intel").select("*").or(keyFilter(keys));
+  return data ?? [];
 }
 
-export async function getCategories(): Promise<string[]> {
+export async function getSpecialsForProducts(keys: ProductKey[]): Promise<FeedSpecial[]> {
+  if (keys.length === 0) return [];
+
+  const cached = await snapshotSpecials();
+  if (cached) {
+    const wanted = new Set(keys.map((k) => `${k.store}:${k.productId}`));
+    return cached.filter((s) => wanted.has(`${s.store}:${s.product_id}`));
+  }
+
+  const { data } = await supabase.from("specials_feed").select("*").or(keyFilter(keys));
+  return data ?? [];
+}
+
+export async function getCategories(store = "all"): Promise<string[]> {
+  const cached = await snapshotCategoryCounts(store);
+  if (cached) return cached.map((c) => c.category).sort();
+
   const { data } = await supabase
-    .from("specials")
+    .from("category_counts")
     .select("category")
-    .not("category", "is", null);
+    .eq("store", store)
+    .order("category");
 
-  if (!data) return [];
-  return [...new Set(data.map((d) => d.category).filter(Boolean) as string[])].sort();
+  return (data ?? []).map((d) => d.category);
 }
 
-export async function searchSpecials(query: string): Promise<Special[]> {
+export async function getCategoryCounts(store = "all"): Promise<CategoryCount[]> {
+  const cached = await snapshotCategoryCounts(store);
+  if (cached) return cached.sort((a, b) => b.specials - a.specials);
+
   const { data } = await supabase
-    .from("specials")
+    .from("category_counts")
     .select("*")
-    .ilike("name", `%${query}%`)
-    .order("discount_pct", { ascending: false })
-    .limit(50);
+    .eq("store", store)
+    .order("specials", { ascending: false });
+  return data ?? [];
+}
+
+// Search goes through the search_* functions (migration 010), which match the
+// normalized search_key with trigram indexes and brand/name words with
+// full-text indexes instead of scanning names with ILIKE.
+
+export async function searchSpecials(query: string): Promise<FeedSpecial[]> {
+  const { data } = await supabase.rpc("search_specials", { p_query: query, p_limit: 50 });
   return data ?? [];
 }
 
@@ -103,7 +153,7 @@ export async function getLastScrapeTime(): Promise<string | null> {
 }
 
 export type SearchResult = {
-  special: Special | null;
+  special: FeedSpecial | null;
   intel: SpecialIntel | null;
   name: string;
   store: "woolworths" | "coles";
@@ -113,21 +163,12 @@ export type SearchResult = {
 
 export async function searchAll(query: string): Promise<SearchResult[]> {
   const [specialsRes, intelRes] = await Promise.all([
-    supabase
-      .from("specials")
-      .select("*")
-      .ilike("name", `%${query}%`)
-      .order("discount_pct", { ascending: false })
-      .limit(40),
-    supabase
-      .from("special_intel")
-      .select("*")
-      .ilike("name", `%${query}%`)
-      .limit(60),
+    supabase.rpc("search_specials", { p_query: query, p_limit: 40 }),
+    supabase.rpc("search_intel", { p_query: query, p_limit: 60 }),
   ]);
 
-  const specials = specialsRes.data ?? [];
-  const intelItems = intelRes.data ?? [];
+  const specials: FeedSpecial[] = specialsRes.data ?? [];
+  const intelItems: SpecialIntel[] = intelRes.data ?? [];
 
   const resultMap = new Map<string, SearchResult>();
 
@@ -173,17 +214,21 @@ export async function searchAll(query: string): Promise<SearchResult[]> {
   return results;
 }
 
-export async function getBigDeals(limit = 20): Promise<Special[]> {
+export async function getBigDeals(limit = 20): Promise<FeedSpecial[]> {
+  const cached = await snapshotSpecials();
+  if (cached) {
+    return cached
+      .filter((s) => (s.saving ?? 0) >= 3 && (s.discount_pct ?? 0) >= 30)
+      .sort(byDiscount)
+      .slice(0, limit);
+  }
+
   const { data } = await supabase
-    .from("specials")
+    .from("specials_feed")
     .select("*")
-    .not("original_price", "is", null)
-    .not("discount_pct", "is", null)
+    .gte("saving", 3)
     .gte("discount_pct", 30)
     .order("discount_pct", { ascending: false })
     .limit(limit);
-
-  return (data ?? []).filter(
-    (s) => s.original_price && s.original_price - s.current_price >= 3
-  );
+  return data ?? [];
 }
@@ -0,0 +1,108 @@
+import type { CategoryCount, FeedSpecial, SpecialIntel } from "./supabase";
+
+// Static snapshot of the read models, exported by the scraper after each run
+// (scraper/export.py) and served from the CDN under /data. Shard file names are
+// content-hashed, so only manifest.json is revalidated; every loader resolves
+// to null when the snapshot is unavailable and callers fall back to Supabase.
+
+const BASE = "/data";
+
+type Shard = { file: string; rows: number };
+
+type Manifest = {
+  version: number;
+  generated_at: string;
+  specials: Record<string, Record<string, Shard>>;
+  intel: Record<string, { buckets: number; shards: Record<string, Shard> }>;
+  categories: Shard;
+};
+
+const MANIFEST_VERSION = 1;
+
+let manifestPromise: Promise<Manifest | null> | null = null;
+const shardCache = new Map<string, Promise<unknown[] | null>>();
+
+async function fetchJson<T>(path: string, init?: RequestInit): Promise<T | null> {
+  try {
+    const res = await fetch(`${BASE}/${path}`, init);
+    // The SPA fallback answers unknown paths with index.html
+    if (!res.ok || !res.headers.get("content-type")?.includes("json")) return null;
+    return (await res.json()) as T;
+  } catch {
+    return null;
+  }
+}
+
+function loadManifest(): Promise<Manifest | null> {
+  manifestPromise ??= fetchJson<Manifest>("manifest.json", { cache: "no-cache" }).then((m) =>
+    m?.version === MANIFEST_VERSION ? m : null
+  );
+  return manifestPromise;
+}
+
+function loadShard<T>(shard: Shard): Promise<T[] | null> {
+  if (!shardCache.has(shard.file)) {
+    shardCache.set(shard.file, fetchJson<T[]>(shard.file));
+  }
+  return shardCache.get(shard.file) as Promise<T[] | null>;
+}
+
+async function loadAll<T>(shards: Shard[]): Promise<T[] | null> {
+  const parts = await Promise.all(shards.map((s) => loadShard<T>(s)));
+  if (parts.some((p) => p === null)) return null;
+  return (parts as T[][]).flat();
+}
+
+// 32-bit FNV-1a of the UTF-8 product id, as scraper/export.py buckets intel
+function bucket(productId: string, buckets: number): number {
+  let h = 0x811c9dc5;
+  for (const b of new TextEncoder().encode(productId)) {
+    h = Math.imul(h ^ b, 0x01000193) >>> 0;
+  }
+  return h % buckets;
+}
+
+/** Current specials for a store ("all" or undefined for both), optionally one category. */
+export async function snapshotSpecials(store?: string, category?: string): Promise<FeedSpecial[] | null> {
+  const manifest = await loadManifest();
+  if (!manifest) return null;
+
+  const stores = store && store !== "all" ? [store] : Object.keys(manifest.specials);
+  const shards = stores.flatMap((s) => {
+    const byCategory = manifest.specials[s] ?? {};
+    if (category && category !== "All") return byCategory[category] ? [byCategory[category]] : [];
+    return Object.values(byCategory);
+  });
+  return loadAll<FeedSpecial>(shards);
+}
+
+/** Intel rows for the given products, loading only the buckets they fall in. */
+export async function snapshotIntel(keys: { store: string; productId: string }[]): Promise<SpecialIntel[] | null> {
+  const manifest = await loadManifest();
+  if (!manifest) return null;
+
+  const shards = new Map<string, Shard>();
+  for (const k of keys) {
+    const intel = manifest.intel[k.store];
+    const shard = intel?.shards[bucket(k.productId, intel.buckets)];
+    if (shard) shards.set(shard.file, shard);
+  }
+  const rows = await loadAll<SpecialIntel>([...shards.values()]);
+  if (!rows) return null;
+
+  const wanted = new Set(keys.map((k) => `${k.store}:${k.productId}`));
+  return rows.filter((i) => wanted.has(`${i.store}:${i.product_id}`));
+}
+
+/** The category index: one row per (store, category) plus store = "all" totals. */
+export async function snapshotCategoryCounts(store = "all"): Promise<CategoryCount[] | null> {
+  const manifest = await loadManifest();
+  if (!manifest) return null;
+
+  const rows = await loadShard<CategoryCount>(manifest.categories);
+  return rows && rows.filter((c) => c.store === store);
+}
+
+export function byDiscount(a: FeedSpecial, b: FeedSpecial): number {
+  return (b.discount_pct ?? -1) - (a.discount_pct ?? -1);
+}
@@ -21,6 +21,24 @@ export type Special = {
   valid_from: string | null;
   valid_to: string | null;
   scraped_at: string;
+  search_key: string | null;
+};
+
+/** A row of the specials_feed read model: a special with its intel columns. */
+export type FeedSpecial = Special & {
+  saving: number | null;
+  frequency_class: SpecialIntel["frequency_class"];
+  avg_frequency_days: number | null;
+  expected_days_until_next: number | null;
+  total_times_on_special: number | null;
+  last_special_date: string | null;
+};
+
+export type CategoryCount = {
+  store: "woolworths" | "coles" | "all";
+  category: string;
+  specials: number;
+  max_discount_pct: number | null;
 };
 
 export type SpecialHistory = {
@@ -50,6 +68,7 @@ export type SpecialIntel = {
   last_special_date: string | null;
   last_discount_pct: number | null;
   total_times_on_special: number;
+  search_key: string | null;
   updated_at: string;
 };
 